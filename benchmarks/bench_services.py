@@ -0,0 +1,209 @@
+# benchmarks/bench_services.py
+"""
+services 層のマイクロベンチマーク。結果は JSON に書き出してコミット間で比較する。
+
+  python -m benchmarks.bench_services                       # 10k
+  python -m benchmarks.bench_services --sizes 10k,100k,1m
+  python -m benchmarks.bench_services --compare benchmarks/results/<前回>.json
+
+- データセットは datagen.ensure_dataset（シード固定・作成済みなら再利用）
+- 書き込み系も測るので、毎回データセットの一時コピーに対して実行する
+- 各ケース：warmup 後に repeat 回呼んで min / median / p95 / mean（ms）を記録
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import random
+import sqlite3
+import statistics
+import subprocess
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.datagen import ROOT, SIZES, ensure_dataset
+
+from tool_asset_system.db import db as db_mod
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.services import dictionaries
+from tool_asset_system.services.assemblies import list_assembly_items
+from tool_asset_system.services.idgen import issue_asset_code
+from tool_asset_system.services.parts import add_part, list_parts
+from tool_asset_system.services.tooling_lists import list_tooling_list_items, replace_tooling_list_items
+
+RESULTS_DIR = ROOT / "benchmarks" / "results"
+
+
+@dataclass
+class CaseResult:
+    size: str
+    name: str
+    repeat: int
+    min_ms: float
+    median_ms: float
+    p95_ms: float
+    mean_ms: float
+
+
+def _measure(size: str, name: str, fn: Callable[[int], Any], *, repeat: int, warmup: int) -> CaseResult:
+    for i in range(warmup):
+        fn(i)
+    times: list[float] = []
+    for i in range(repeat):
+        t0 = time.perf_counter()
+        fn(warmup + i)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return CaseResult(
+        size=size,
+        name=name,
+        repeat=repeat,
+        min_ms=round(times[0], 4),
+        median_ms=round(statistics.median(times), 4),
+        p95_ms=round(times[min(len(times) - 1, int(len(times) * 0.95))], 4),
+        mean_ms=round(statistics.fmean(times), 4),
+    )
+
+
+def _cases(rng: random.Random) -> dict[str, Callable[[int], Any]]:
+    with connect() as con:
+        asm_codes = [r[0] for r in con.execute("SELECT assembly_code FROM assemblies ORDER BY id")]
+        list_code = con.execute("SELECT list_code FROM tooling_lists ORDER BY id LIMIT 1").fetchone()[0]
+
+    # replace_tooling_list_items：2つの構成を交互に入れる（毎回 数本の入れ替え＋qty 変更の差分になる）
+    base = [
+        {"assembly_code": it["assembly_code"], "tool_no": it["tool_no"], "qty": it["qty"]}
+        for it in list_tooling_list_items(list_code)
+    ]
+    alt = [dict(it) for it in base]
+    swap_in = [c for c in rng.sample(asm_codes, 10) if c not in {it["assembly_code"] for it in base}]
+    for it, code in zip(alt[: len(swap_in) // 2], swap_in):
+        it["assembly_code"] = code
+    for it in alt[-3:]:
+        it["qty"] = it["qty"] + 1
+    variants = [alt, base]
+
+    def add(i: int) -> None:
+        add_part("SCREW", None, f"BENCH-{i:07d}", "BENCH")
+
+    def issue(i: int) -> None:
+        with transaction() as con:
+            issue_asset_code(con, "INSERT")
+
+    return {
+        "list_parts": lambda i: list_parts(),
+        "list_parts_layer": lambda i: list_parts(layer_code="INSERT"),
+        "list_parts_q_common": lambda i: list_parts(q="endmill"),
+        "list_parts_q_rare": lambda i: list_parts(q="aluminium D63"),
+        "list_parts_q_short": lambda i: list_parts(q="D6"),
+        "add_part": add,
+        "list_assembly_items": lambda i: list_assembly_items(rng.choice(asm_codes)),
+        "replace_tooling_list_items": lambda i: replace_tooling_list_items(list_code, items=variants[i % 2]),
+        "issue_asset_code": issue,
+        "get_label_maps": lambda i: dictionaries.get_label_maps(),
+        "dictionaries_snapshot": lambda i: dictionaries.snapshot(),
+    }
+
+
+def run_size(size: str, *, repeat: int, warmup: int, seed: int, only: list[str] | None) -> list[CaseResult]:
+    src = ensure_dataset(size, seed=seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp) / src.name
+        # WAL に残っている分も含めてコピー（backup API は一貫したスナップショットを取る）
+        s, d = sqlite3.connect(src), sqlite3.connect(work)
+        try:
+            s.backup(d)
+        finally:
+            s.close()
+            d.close()
+        pool = db_mod.configure_pool(work)
+        try:
+            rng = random.Random(seed)
+            results = []
+            for name, fn in _cases(rng).items():
+                if only and name not in only:
+                    continue
+                r = _measure(size, name, fn, repeat=repeat, warmup=warmup)
+                print(f"  {size:>5} {name:<28} median {r.median_ms:9.3f} ms  p95 {r.p95_ms:9.3f} ms", flush=True)
+                results.append(r)
+            return results
+        finally:
+            pool.close()
+
+
+def _git_rev() -> str | None:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def compare(current: list[dict[str, Any]], previous_path: Path, threshold: float) -> int:
+    """median の比（今回 / 前回）を出す。threshold を超えたケースの数を返す"""
+    prev = {(r["size"], r["name"]): r for r in json.loads(previous_path.read_text(encoding="utf-8"))["results"]}
+    worse = 0
+    print(f"\ncompare with {previous_path.name} (median, x{threshold} 超を REGRESSION)")
+    for r in current:
+        p = prev.get((r["size"], r["name"]))
+        if p is None or not p["median_ms"]:
+            continue
+        ratio = r["median_ms"] / p["median_ms"]
+        mark = "REGRESSION" if ratio > threshold else ""
+        worse += bool(mark)
+        print(f"  {r['size']:>5} {r['name']:<28} {p['median_ms']:9.3f} -> {r['median_ms']:9.3f} ms  x{ratio:5.2f} {mark}")
+    return worse
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="service-layer microbenchmarks")
+    ap.add_argument("--sizes", default="10k", help=f"カンマ区切り（{', '.join(SIZES)}）")
+    ap.add_argument("--repeat", type=int, default=50)
+    ap.add_argument("--warmup", type=int, default=5)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--only", help="ケース名（カンマ区切り）")
+    ap.add_argument("--out", help="結果 JSON（省略時 benchmarks/results/<日時>_<rev>.json）")
+    ap.add_argument("--compare", help="比較する過去の結果 JSON")
+    ap.add_argument("--threshold", type=float, default=1.25, help="この倍率を超えたら REGRESSION（終了コード1）")
+    args = ap.parse_args(argv)
+
+    sizes = [s.strip().lower() for s in args.sizes.split(",") if s.strip()]
+    for s in sizes:
+        if s not in SIZES:
+            ap.error(f"unknown size: {s}")
+    only = [s.strip() for s in args.only.split(",")] if args.only else None
+
+    results: list[CaseResult] = []
+    for s in sizes:
+        results += run_size(s, repeat=args.repeat, warmup=args.warmup, seed=args.seed, only=only)
+
+    rev = _git_rev()
+    doc = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_rev": rev,
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": [asdict(r) for r in results],
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}_{rev or 'norev'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nwrote {out}")
+
+    if args.compare:
+        return 1 if compare(doc["results"], Path(args.compare), args.threshold) else 0
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
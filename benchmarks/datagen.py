@@ -0,0 +1,237 @@
+# benchmarks/datagen.py
+"""
+ベンチマーク / 負荷試験用のデータセット生成（乱数シード固定で毎回同じ中身）。
+
+- 空のDBに本物の migrations（manage.upgrade）を流してから入れる
+- parts は part_import.import_parts（画面の取り込みと同じ経路：採番・operation_logs・FTS・トリガー込み）
+- assemblies / tooling_lists は件数が多いので、idgen で採番して executemany でまとめて入れる
+  （where-used / change_counters / FTS はトリガーで維持される。signature は refresh_assembly_signatures）
+
+目安の比率：assemblies = parts / 10、tooling_lists = parts / 1000（各 10〜40 本）
+
+  python -m benchmarks.datagen --size 100k
+  python -m benchmarks.datagen --parts 25000 --out data/bench/custom.db
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+ROOT = Path(__file__).resolve().parents[1]
+SRC = ROOT / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+from tool_asset_system.db import db as db_mod  # noqa: E402
+from tool_asset_system.db.db import transaction  # noqa: E402
+from tool_asset_system.db.scripts.manage import MIG_DIR, upgrade  # noqa: E402
+from tool_asset_system.services.assemblies import refresh_assembly_signatures  # noqa: E402
+from tool_asset_system.services.idgen import reserve_asset_codes  # noqa: E402
+from tool_asset_system.services.part_import import import_parts  # noqa: E402
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_DIR = ROOT / "data" / "bench"
+CHUNK = 5000
+
+MAKERS = [
+    "SANDVIK", "KENNAMETAL", "MITSUBISHI", "KYOCERA", "TUNGALOY", "ISCAR", "SECO", "WALTER",
+    "OSG", "NACHI", "BIG", "MST", "DIJET", "SUMITOMO", "YAMAWA", "NT_TOOL",
+]
+# layer -> (重み, 名前に使う語, カテゴリ)
+LAYERS: dict[str, tuple[int, list[str], list[str | None]]] = {
+    "INSERT": (35, ["APMT", "CNMG", "WNMG", "DNMG", "SEKT", "RDMT", "TPMT"], ["MILLING_INSERT", "TURNING_INSERT"]),
+    "SCREW": (15, ["clamp screw", "torx screw", "set screw"], [None]),
+    "SOLID_TOOL": (15, ["square endmill", "ball endmill", "carbide drill", "center drill"], ["SOLID_ENDMILL", "SOLID_DRILL"]),
+    "HOLDER": (10, ["BT40 collet", "BT40 hydro", "HSK63 shrink"], ["COLLET_CHUCK", "HYD_CHUCK"]),
+    "TOOL_BODY": (10, ["face mill", "shoulder mill", "modular head"], ["MODULAR_HEAD", "MILLING_BODY"]),
+    "SUB_HOLDER": (5, ["arbor", "extension shank"], ["SUBHOLDER_SHANK", "SUBHOLDER_ARBOR"]),
+    "ACCESSORY": (10, ["wrench", "coolant nozzle", "pull stud"], [None]),
+}
+
+
+@dataclass(frozen=True)
+class DatasetSpec:
+    parts: int
+    seed: int = 42
+
+    @property
+    def assemblies(self) -> int:
+        return max(10, self.parts // 10)
+
+    @property
+    def tooling_lists(self) -> int:
+        return max(5, self.parts // 1000)
+
+
+def _part_rows(spec: DatasetSpec, rng: random.Random) -> Iterator[tuple[int, dict[str, Any]]]:
+    layers = list(LAYERS)
+    weights = [LAYERS[lc][0] for lc in layers]
+    for i in range(spec.parts):
+        lc = rng.choices(layers, weights)[0]
+        _, words, cats = LAYERS[lc]
+        maker = rng.choice(MAKERS)
+        word = rng.choice(words)
+        dia = rng.choice([3, 4, 5, 6, 8, 10, 12, 16, 20, 25, 32, 40, 50, 63, 80])
+        yield i + 2, {
+            "layer_code": lc,
+            "category_code": rng.choice(cats),
+            "part_no": f"{word.split()[0].upper()}-{i:07d}",
+            "maker": maker,
+            "display_name": f"{maker} {word} D{dia}",
+            "stock_qty": rng.randint(0, 50),
+            "stock_unit": "EA",
+            "min_stock_qty": rng.choice([None, None, 2, 5, 10]),
+            "note": rng.choice([None, None, None, "coolant through", "long reach", "for aluminium"]),
+        }
+
+
+def _insert_assemblies(spec: DatasetSpec, rng: random.Random) -> None:
+    with transaction() as con:
+        ids: dict[str, list[int]] = {lc: [] for lc in LAYERS}
+        for r in con.execute("SELECT id, layer_code FROM parts"):
+            ids[r["layer_code"]].append(r["id"])
+
+    def items_for_one() -> list[tuple[int, float, str]]:
+        items = [(rng.choice(ids["HOLDER"]), 1.0, "holder")]
+        if rng.random() < 0.2:
+            items.append((rng.choice(ids["SUB_HOLDER"]), 1.0, "sub_holder"))
+        if rng.random() < 0.5:
+            items.append((rng.choice(ids["SOLID_TOOL"]), 1.0, "tool"))
+        else:
+            n = rng.randint(1, 6)
+            items.append((rng.choice(ids["TOOL_BODY"]), 1.0, "body"))
+            items.append((rng.choice(ids["INSERT"]), float(n), "insert"))
+            items.append((rng.choice(ids["SCREW"]), float(n), "screw"))
+        # 同じ part を2回入れない
+        seen: set[int] = set()
+        return [it for it in items if not (it[0] in seen or seen.add(it[0]))]
+
+    done = 0
+    while done < spec.assemblies:
+        n = min(CHUNK, spec.assemblies - done)
+        with transaction() as con:
+            codes = reserve_asset_codes(con, "ASM", n)
+            con.executemany(
+                "INSERT INTO assemblies(assembly_code, display_name, tool_overall_length, tool_diameter) VALUES(?,?,?,?)",
+                [(c, f"ASM {c[-6:]}", rng.choice([80, 100, 120, 150]), rng.choice([6, 10, 16, 25, 50])) for c in codes],
+            )
+            asm_ids = [
+                r[0]
+                for r in con.execute(
+                    "SELECT a.id FROM json_each(?) j JOIN assemblies a ON a.assembly_code = j.value ORDER BY j.key",
+                    (json.dumps(codes),),
+                )
+            ]
+            con.executemany(
+                "INSERT INTO assembly_items(assembly_id, part_id, qty, role) VALUES(?,?,?,?)",
+                [(aid, pid, qty, role) for aid in asm_ids for pid, qty, role in items_for_one()],
+            )
+            refresh_assembly_signatures(con, asm_ids)
+        done += n
+
+
+def _insert_tooling_lists(spec: DatasetSpec, rng: random.Random) -> None:
+    with transaction() as con:
+        asm_ids = [r[0] for r in con.execute("SELECT id FROM assemblies")]
+        codes = reserve_asset_codes(con, "TL", spec.tooling_lists)
+        con.executemany(
+            "INSERT INTO tooling_lists(list_code, title, note) VALUES(?,?,?)",
+            [(c, f"Machine {i % 20 + 1} / job {i:05d}", None) for i, c in enumerate(codes)],
+        )
+        list_ids = [r[0] for r in con.execute("SELECT id FROM tooling_lists ORDER BY id")]
+        items = []
+        for lid in list_ids:
+            picked = rng.sample(asm_ids, min(len(asm_ids), rng.randint(10, 40)))
+            items += [(lid, aid, str(no), float(rng.choice([1, 1, 1, 2]))) for no, aid in enumerate(picked, 1)]
+        con.executemany(
+            "INSERT INTO tooling_list_items(tooling_list_id, assembly_id, tool_no, qty) VALUES(?,?,?,?)",
+            items,
+        )
+
+
+def generate(path: Path | str, spec: DatasetSpec, *, quiet: bool = False) -> Path:
+    """path に spec のデータセットを作る（既存ファイルは作り直す）。接続プールは path に向いたままになる"""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for p in (path, path.with_name(path.name + "-wal"), path.with_name(path.name + "-shm")):
+        p.unlink(missing_ok=True)
+
+    def log(msg: str) -> None:
+        if not quiet:
+            print(f"[datagen] {msg}", flush=True)
+
+    t0 = time.perf_counter()
+    if quiet:
+        _quiet_upgrade(path)
+    else:
+        upgrade(path)
+    db_mod.configure_pool(path)
+    rng = random.Random(spec.seed)
+
+    result = import_parts(_part_rows(spec, rng), batch_size=CHUNK, actor="datagen", reason="benchmark dataset")
+    if result.errors:
+        raise RuntimeError(f"datagen: {len(result.errors)} part rows rejected: {result.errors[0]}")
+    log(f"parts={result.inserted} ({time.perf_counter() - t0:.1f}s)")
+
+    _insert_assemblies(spec, rng)
+    log(f"assemblies={spec.assemblies} ({time.perf_counter() - t0:.1f}s)")
+
+    _insert_tooling_lists(spec, rng)
+    log(f"tooling_lists={spec.tooling_lists} ({time.perf_counter() - t0:.1f}s)")
+
+    with transaction() as con:
+        con.execute("ANALYZE")
+    path.with_name(path.name + ".json").write_text(json.dumps(_meta(spec)), encoding="utf-8")
+    return path
+
+
+def _meta(spec: DatasetSpec) -> dict[str, Any]:
+    """再利用の判定キー。spec に加えて、作ったときのスキーマ（適用した migrations）も含める"""
+    migrations = sorted(p.stem for p in MIG_DIR.iterdir() if p.suffix in (".sql", ".py"))
+    return {**asdict(spec), "migrations": migrations}
+
+
+def _quiet_upgrade(path: Path) -> None:
+    import contextlib
+    import io
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        upgrade(path)
+
+
+def ensure_dataset(size: str | int, *, seed: int = 42, directory: Path = DEFAULT_DIR, quiet: bool = False) -> Path:
+    """同じ spec・同じ migrations で作ったものがあれば再利用、無ければ（スキーマが古ければ）作り直す"""
+    n = SIZES[size] if isinstance(size, str) else int(size)
+    spec = DatasetSpec(parts=n, seed=seed)
+    path = Path(directory) / f"bench_{n}_s{seed}.db"
+    meta = path.with_name(path.name + ".json")
+    if path.exists() and meta.exists() and json.loads(meta.read_text(encoding="utf-8")) == _meta(spec):
+        return path
+    return generate(path, spec, quiet=quiet)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="generate a benchmark dataset")
+    ap.add_argument("--size", choices=list(SIZES), default="10k")
+    ap.add_argument("--parts", type=int, help="parts 件数を直接指定（--size より優先）")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--out", help="出力先（省略時 data/bench/bench_<parts>_s<seed>.db、既存なら再利用）")
+    args = ap.parse_args(argv)
+
+    n = args.parts or SIZES[args.size]
+    if args.out:
+        path = generate(args.out, DatasetSpec(parts=n, seed=args.seed))
+    else:
+        path = ensure_dataset(n, seed=args.seed)
+    print(path)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
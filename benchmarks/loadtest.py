@@ -0,0 +1,361 @@
+# benchmarks/loadtest.py
+"""
+HTTP 負荷試験（ローカル完結：create_app を WSGI のまま test client で叩く。外部サービス不要）。
+
+  python -m benchmarks.loadtest --size 100k --threads 8 --duration 20
+  python -m benchmarks.loadtest --mix browse=40,search=30,assembly=25,edit=5 --processes 4
+
+シナリオ（--mix で重み指定）
+- browse   : /parts を layer で絞って開き、半分は次ページへ進む
+- search   : /parts?q=...
+- assembly : /assemblies/<code>
+- edit     : /tooling_lists/<code>/edit に POST（1本入れ替え＋qty 変更の全置換フォーム）
+
+ルートごとに p50 / p95 / p99 / 件数 / スループット / エラー率 / SQLITE_BUSY 率を出し、JSON に書き出す。
+--processes を付けると各プロセスが --threads 本ずつ走らせる（GIL を避けた書き込み競合の確認用）。
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import multiprocessing as mp
+import random
+import re
+import sqlite3
+import tempfile
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable
+
+from benchmarks.bench_services import RESULTS_DIR, _git_rev
+from benchmarks.datagen import SIZES, ensure_dataset
+
+from tool_asset_system import metrics
+from tool_asset_system.db import db as db_mod
+from tool_asset_system.db.db import connect
+from tool_asset_system.web.app import create_app
+
+DEFAULT_MIX = "browse=50,search=25,assembly=20,edit=5"
+SEARCH_TERMS = ["endmill", "APMT", "D63", "collet", "SANDVIK", "coolant", "torx screw", "hydro", "zzz_nothing"]
+LAYERS = ["INSERT", "SCREW", "SOLID_TOOL", "HOLDER", "TOOL_BODY", "SUB_HOLDER", "ACCESSORY"]
+
+_NEXT_LINK = re.compile(r'href="([^"]*(?:\?|&amp;)after=[^"]*)"')
+
+
+@dataclass
+class Sample:
+    route: str
+    ms: float
+    ok: bool
+    busy: bool
+
+
+@dataclass
+class RouteStats:
+    route: str
+    count: int
+    rps: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    max_ms: float
+    error_rate: float
+    busy_rate: float
+
+
+def parse_mix(text: str) -> dict[str, int]:
+    mix: dict[str, int] = {}
+    for part in text.split(","):
+        name, _, w = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise ValueError(f"unknown scenario: {name}")
+        mix[name] = int(w or 1)
+    if not any(mix.values()):
+        raise ValueError("mix has no weight")
+    return mix
+
+
+def _is_busy(e: BaseException) -> bool:
+    return isinstance(e, sqlite3.OperationalError) and ("locked" in str(e) or "busy" in str(e))
+
+
+# ============================================================
+# scenarios: (client, rng, fixtures) -> [(route, ms, ok, body)]
+# リクエストは1本ずつ計る（シナリオ全体の時間を割り振らない）
+# ============================================================
+
+Result = tuple[str, float, bool, bytes]
+
+
+class RouteFailed(Exception):
+    """シナリオ途中のリクエストが例外を出した。route / ms はそのリクエスト、done はそれまでの結果"""
+
+    def __init__(self, route: str, ms: float, cause: BaseException, done: list[Result]) -> None:
+        super().__init__(f"{route}: {cause!r}")
+        self.route = route
+        self.ms = ms
+        self.cause = cause
+        self.done = done
+
+
+class _Calls:
+    def __init__(self) -> None:
+        self.results: list[Result] = []
+
+    def send(self, route: str, fn: Callable[[], Any], ok: Callable[[Any], bool] = lambda r: r.status_code < 400) -> Any:
+        t0 = time.perf_counter()
+        try:
+            r = fn()
+        except Exception as e:  # PROPAGATE_EXCEPTIONS で view の例外がここまで来る
+            raise RouteFailed(route, (time.perf_counter() - t0) * 1000, e, self.results) from e
+        self.results.append((route, (time.perf_counter() - t0) * 1000, ok(r), r.data))
+        return r
+
+
+def _browse(c: Any, rng: random.Random, fx: dict[str, Any]) -> list[Result]:
+    calls = _Calls()
+    r = calls.send("parts_list", lambda: c.get(f"/parts?layer={rng.choice(LAYERS)}"))
+    m = _NEXT_LINK.search(r.get_data(as_text=True))
+    if m and rng.random() < 0.5:
+        calls.send("parts_list_next", lambda: c.get(m.group(1).replace("&amp;", "&")))
+    return calls.results
+
+
+def _search(c: Any, rng: random.Random, fx: dict[str, Any]) -> list[Result]:
+    calls = _Calls()
+    calls.send("parts_search", lambda: c.get("/parts", query_string={"q": rng.choice(SEARCH_TERMS)}))
+    return calls.results
+
+
+def _assembly(c: Any, rng: random.Random, fx: dict[str, Any]) -> list[Result]:
+    calls = _Calls()
+    calls.send("assembly_detail", lambda: c.get(f"/assemblies/{rng.choice(fx['assemblies'])}"))
+    return calls.results
+
+
+def _edit(c: Any, rng: random.Random, fx: dict[str, Any]) -> list[Result]:
+    list_code = rng.choice(list(fx["lists"]))
+    items = [dict(it) for it in fx["lists"][list_code]]
+    used = {it["assembly_code"] for it in items}
+    swap = rng.choice(fx["assemblies"])
+    if items and swap not in used:
+        items[rng.randrange(len(items))]["assembly_code"] = swap
+    if items:
+        items[rng.randrange(len(items))]["qty"] = rng.choice([1, 2, 3])
+
+    form: dict[str, Any] = {
+        "title": f"load {list_code}",
+        "note": "",
+        "selected_assemblies": [it["assembly_code"] for it in items],
+    }
+    for it in items:
+        form[f"tool_no_{it['assembly_code']}"] = it["tool_no"]
+        form[f"qty_{it['assembly_code']}"] = str(it["qty"])
+    calls = _Calls()
+    # 成功は detail への redirect。200 はフォーム再表示（= エラーを flash している）
+    calls.send(
+        "tooling_list_edit",
+        lambda: c.post(f"/tooling_lists/{list_code}/edit", data=form),
+        ok=lambda r: r.status_code == 302,
+    )
+    return calls.results
+
+
+SCENARIOS: dict[str, Callable[..., list[Result]]] = {
+    "browse": _browse,
+    "search": _search,
+    "assembly": _assembly,
+    "edit": _edit,
+}
+
+
+def load_fixtures() -> dict[str, Any]:
+    with connect() as con:
+        assemblies = [r[0] for r in con.execute("SELECT assembly_code FROM assemblies")]
+        lists: dict[str, list[dict[str, Any]]] = {}
+        for r in con.execute(
+            """
+            SELECT t.list_code, a.assembly_code, tli.tool_no, tli.qty
+            FROM tooling_list_items tli
+            JOIN tooling_lists t ON t.id = tli.tooling_list_id
+            JOIN assemblies a ON a.id = tli.assembly_id
+            ORDER BY t.id, tli.id
+            """
+        ):
+            lists.setdefault(r[0], []).append({"assembly_code": r[1], "tool_no": r[2], "qty": r[3]})
+    return {"assemblies": assemblies, "lists": lists}
+
+
+# ============================================================
+# runner
+# ============================================================
+
+def _thread_worker(app: Any, fx: dict[str, Any], mix: dict[str, int], seed: int, deadline: float, out: list[Sample]) -> None:
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    c = app.test_client()
+    while time.perf_counter() < deadline:
+        scenario = SCENARIOS[rng.choices(names, weights)[0]]
+        try:
+            results = scenario(c, rng, fx)
+        except RouteFailed as e:
+            # 例外を出したリクエストもそのルートの失敗として数える
+            results = e.done
+            out.append(Sample(e.route, e.ms, False, _is_busy(e.cause)))
+        for route, ms, ok, body in results:
+            busy = b"database is locked" in body
+            out.append(Sample(route, ms, ok and not busy, busy))
+
+
+def _run_process(db_path: str, threads: int, mix: dict[str, int], seed: int, duration: float) -> tuple[list[dict[str, Any]], float]:
+    """1プロセス分：threads 本を duration 秒走らせて (samples, BUSY 再試行数) を返す"""
+    db_mod.configure_pool(db_path)
+    app = create_app()
+    app.config["PROPAGATE_EXCEPTIONS"] = True
+    fx = load_fixtures()
+    retries0 = metrics.DB_BUSY_RETRIES.value()
+
+    samples: list[Sample] = []
+    deadline = time.perf_counter() + duration
+    ts = [
+        threading.Thread(target=_thread_worker, args=(app, fx, mix, seed * 1000 + i, deadline, samples))
+        for i in range(threads)
+    ]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+    return [asdict(s) for s in samples], metrics.DB_BUSY_RETRIES.value() - retries0
+
+
+def _percentile(sorted_ms: list[float], p: float) -> float:
+    if not sorted_ms:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(sorted_ms) - 1, math.ceil(p / 100 * len(sorted_ms)) - 1))
+    return round(sorted_ms[k], 3)
+
+
+def summarize(samples: list[dict[str, Any]], wall: float) -> list[RouteStats]:
+    by_route: dict[str, list[dict[str, Any]]] = {}
+    for s in samples:
+        by_route.setdefault(s["route"], []).append(s)
+    by_route["ALL"] = samples
+
+    stats = []
+    for route, ss in by_route.items():
+        ms = sorted(s["ms"] for s in ss)
+        n = len(ss)
+        stats.append(
+            RouteStats(
+                route=route,
+                count=n,
+                rps=round(n / wall, 2) if wall else 0.0,
+                p50_ms=_percentile(ms, 50),
+                p95_ms=_percentile(ms, 95),
+                p99_ms=_percentile(ms, 99),
+                max_ms=round(ms[-1], 3) if ms else 0.0,
+                error_rate=round(sum(not s["ok"] for s in ss) / n, 4) if n else 0.0,
+                busy_rate=round(sum(s["busy"] for s in ss) / n, 4) if n else 0.0,
+            )
+        )
+    return stats
+
+
+def run(
+    db_path: Path,
+    *,
+    threads: int,
+    processes: int,
+    duration: float,
+    mix: dict[str, int],
+    seed: int,
+) -> dict[str, Any]:
+    t0 = time.perf_counter()
+    if processes <= 1:
+        samples, retries = _run_process(str(db_path), threads, mix, seed, duration)
+    else:
+        ctx = mp.get_context("spawn")
+        with ctx.Pool(processes) as pool:
+            parts = pool.starmap(
+                _run_process, [(str(db_path), threads, mix, seed + p, duration) for p in range(processes)]
+            )
+        samples = [s for ss, _ in parts for s in ss]
+        retries = sum(r for _, r in parts)
+    wall = time.perf_counter() - t0
+
+    return {
+        "wall_s": round(wall, 3),
+        "busy_retries": retries,
+        "routes": [asdict(s) for s in summarize(samples, wall)],
+    }
+
+
+def print_report(report: dict[str, Any]) -> None:
+    print(f"\nwall {report['wall_s']} s / BEGIN IMMEDIATE retries {report['busy_retries']:.0f}")
+    print(f"  {'route':<20}{'count':>8}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}{'err%':>7}{'busy%':>7}")
+    for r in report["routes"]:
+        print(
+            f"  {r['route']:<20}{r['count']:>8}{r['rps']:>9.1f}{r['p50_ms']:>9.2f}{r['p95_ms']:>9.2f}"
+            f"{r['p99_ms']:>9.2f}{r['max_ms']:>9.1f}{r['error_rate'] * 100:>7.2f}{r['busy_rate'] * 100:>7.2f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description="local HTTP load test against create_app()")
+    ap.add_argument("--size", choices=list(SIZES), default="10k")
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--processes", type=int, default=1)
+    ap.add_argument("--duration", type=float, default=10.0, help="秒")
+    ap.add_argument("--mix", default=DEFAULT_MIX, help=f"シナリオの重み（既定 {DEFAULT_MIX}）")
+    ap.add_argument("--out", help="結果 JSON（省略時 benchmarks/results/load_<日時>_<rev>.json）")
+    args = ap.parse_args(argv)
+
+    try:
+        mix = parse_mix(args.mix)
+    except ValueError as e:
+        ap.error(str(e))
+
+    src = ensure_dataset(args.size, seed=args.seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        work = Path(tmp) / src.name
+        s, d = sqlite3.connect(src), sqlite3.connect(work)
+        try:
+            s.backup(d)
+        finally:
+            s.close()
+            d.close()
+        report = run(work, threads=args.threads, processes=args.processes, duration=args.duration, mix=mix, seed=args.seed)
+        db_mod.get_pool().close()
+
+    print_report(report)
+    rev = _git_rev()
+    doc = {
+        "meta": {
+            "created_at": datetime.now().isoformat(timespec="seconds"),
+            "git_rev": rev,
+            "size": args.size,
+            "threads": args.threads,
+            "processes": args.processes,
+            "duration_s": args.duration,
+            "mix": mix,
+            "seed": args.seed,
+            "sqlite": sqlite3.sqlite_version,
+        },
+        **report,
+    }
+    out = Path(args.out) if args.out else RESULTS_DIR / f"load_{datetime.now():%Y%m%d_%H%M%S}_{rev or 'norev'}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(doc, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\nwrote {out}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
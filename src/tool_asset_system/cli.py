@@ -3,6 +3,11 @@ from __future__ import annotations
 
 import argparse
 import json
+import os
+import sys
+import urllib.error
+import urllib.parse
+import urllib.request
 
 from tool_asset_system.services.parts import (
     add_part,
@@ -11,6 +16,46 @@ from tool_asset_system.services.parts import (
     update_part,
     archive_part,
 )
+from tool_asset_system.services.part_import import DEFAULT_BATCH_SIZE, import_parts, iter_file_rows
+from tool_asset_system.services.where_used import where_used_bulk
+from tool_asset_system.services.log_archive import DEFAULT_CHUNK_SIZE, PERIODS, archive_logs, list_archives
+from tool_asset_system.services.as_of import assembly_as_of, part_as_of, tooling_list_as_of
+from tool_asset_system.services.rollup import iter_csv, iter_rollup, parse_list_codes
+from tool_asset_system.services.changes import (
+    DEFAULT_LIMIT as CHANGES_LIMIT,
+    CursorExpiredError,
+    changes_since,
+    head_cursor,
+    prune_changes,
+    wait_for_changes,
+)
+
+
+def _fetch_changes(url: str | None, since: int, limit: int, tables: list[str] | None, wait: float) -> dict:
+    """url があれば /api/changes を叩く。無ければこの DB を直接読む"""
+    if url is None:
+        if wait > 0:
+            wait_for_changes(since, wait)
+        return changes_since(since, limit=limit, tables=tables)
+
+    q = {"since": since, "limit": limit, "wait": wait}
+    if tables:
+        q["tables"] = ",".join(tables)
+    try:
+        with urllib.request.urlopen(f"{url.rstrip('/')}/api/changes?{urllib.parse.urlencode(q)}", timeout=wait + 30) as r:
+            return json.load(r)
+    except urllib.error.HTTPError as e:
+        if e.code == 410:
+            raise CursorExpiredError(json.load(e).get("error", "cursor expired")) from None
+        raise
+
+
+def _save_cursor(path: str, cursor: int) -> None:
+    # 書きかけのファイルを残さない（置き換えは原子的）
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(f"{cursor}\n")
+    os.replace(tmp, path)
 
 
 def main(argv=None):
@@ -59,6 +104,64 @@ def main(argv=None):
     p_arc.add_argument("asset_code")
     p_arc.add_argument("--reason", required=True)
 
+    # parts import
+    p_imp = sub_parts.add_parser("import")
+    p_imp.add_argument("file")
+    p_imp.add_argument("--format", choices=["csv", "xlsx"])  # 省略時は拡張子で判定
+    p_imp.add_argument("--encoding", default="utf-8-sig")   # Shift_JIS のCSVなら cp932
+    p_imp.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    p_imp.add_argument("--dry-run", action="store_true")
+    p_imp.add_argument("--reason")
+
+    # parts where-used（複数指定可 / --file で1行1コード）
+    p_wu = sub_parts.add_parser("where-used")
+    p_wu.add_argument("asset_codes", nargs="*")
+    p_wu.add_argument("--file")
+
+    # rollup（tooling_lists の所要量 vs 在庫を CSV で出す）
+    p_roll = sub.add_parser("rollup")
+    p_roll.add_argument("list_codes", nargs="+")
+    p_roll.add_argument("--shortage-only", action="store_true")
+    p_roll.add_argument("--out")  # 省略時は標準出力
+
+    # logs archive（created_at < --before の operation_logs を data/archive/oplog_<period>.db へ移す）
+    p_logs = sub.add_parser("logs")
+    sub_logs = p_logs.add_subparsers(dest="sub", required=True)
+    p_la = sub_logs.add_parser("archive")
+    p_la.add_argument("--before", required=True)  # YYYY-MM-DD（この日より前）
+    p_la.add_argument("--period", choices=list(PERIODS), default="month")
+    p_la.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    p_la.add_argument("--dry-run", action="store_true")
+
+    # logs archives（アーカイブファイルの一覧）
+    sub_logs.add_parser("archives")
+
+    # asof（operation_logs から、ある時点の part / assembly / tooling_list を復元して JSON で出す）
+    p_asof = sub.add_parser("asof")
+    p_asof.add_argument("kind", choices=["part", "assembly", "tooling_list"])
+    p_asof.add_argument("code")
+    p_asof.add_argument("--at", required=True)  # YYYY-MM-DD（その日の終わり）/ YYYY-MM-DD HH:MM[:SS]
+
+    # changes pull（変更フィードを JSON Lines で出す。--state にカーソルを残して次回はその続きから）
+    p_ch = sub.add_parser("changes")
+    sub_ch = p_ch.add_subparsers(dest="sub", required=True)
+    p_pull = sub_ch.add_parser("pull")
+    p_pull.add_argument("--url")  # 例 http://server:5000（省略時はこの DB を直接読む）
+    p_pull.add_argument("--since", type=int)
+    p_pull.add_argument("--state")  # カーソルを保存するファイル（--since が無ければここから読む）
+    p_pull.add_argument("--tables")  # parts,assemblies,...
+    p_pull.add_argument("--limit", type=int, default=CHANGES_LIMIT)
+    p_pull.add_argument("--follow", action="store_true")  # 末尾に着いても終わらず long-poll で待ち続ける
+    p_pull.add_argument("--wait", type=float, default=25.0)  # --follow 時の1回の待ち秒数
+    p_pull.add_argument("--out")  # 追記する .jsonl（省略時は標準出力）
+
+    # changes head（今の末尾カーソル。全件エクスポートの直前に控える）
+    sub_ch.add_parser("head")
+
+    # changes prune（changed_at < --before の変更を消す）
+    p_prune = sub_ch.add_parser("prune")
+    p_prune.add_argument("--before", required=True)  # YYYY-MM-DD
+
     args = p.parse_args(argv)
 
     if args.cmd == "parts" and args.sub == "add":
@@ -120,6 +223,123 @@ def main(argv=None):
         print(f"[parts] archived: {args.asset_code}")
         return
 
+    if args.cmd == "parts" and args.sub == "import":
+        result = import_parts(
+            iter_file_rows(args.file, fmt=args.format, encoding=args.encoding),
+            dry_run=args.dry_run,
+            batch_size=args.batch_size,
+            reason=args.reason or f"import:{args.file}",
+        )
+        for e in result.errors:
+            print(f"line {e.line}: {e.message}")
+        if result.dry_run:
+            print(f"[parts] dry run: {result.ok} ok / {len(result.errors)} errors (of {result.total})")
+        else:
+            print(f"[parts] imported: {result.inserted} / {len(result.errors)} errors (of {result.total})")
+        if result.errors:
+            raise SystemExit(1)
+        return
+
+    if args.cmd == "parts" and args.sub == "where-used":
+        codes = list(args.asset_codes)
+        if args.file:
+            with open(args.file, encoding="utf-8-sig") as f:
+                codes.extend(line.strip() for line in f if line.strip())
+        if not codes:
+            raise SystemExit("no asset_codes")
+
+        r = where_used_bulk(codes)
+        for c in r["missing"]:
+            print(f"[missing] {c}")
+        for a in r["assemblies"]:
+            print(f"ASM  {a['assembly_code']}  {a['display_name']}  <- {' '.join(a['parts'])}")
+        for t in r["tooling_lists"]:
+            print(f"TL   {t['list_code']}  {t['title']}  <- {' '.join(t['parts'])}")
+        print(f"[parts] where-used: {len(r['assemblies'])} assemblies / {len(r['tooling_lists'])} tooling lists")
+        return
+
+    if args.cmd == "logs" and args.sub == "archive":
+        r = archive_logs(args.before, period=args.period, chunk_size=args.chunk_size, dry_run=args.dry_run)
+        for x in r["periods"]:
+            print(f"{x['period']}  {x['rows']}")
+        if r["dry_run"]:
+            print(f"[logs] dry run: {sum(x['rows'] for x in r['periods'])} rows before {r['before']}")
+        else:
+            print(f"[logs] archived: {r['moved']} rows before {r['before']}")
+        return
+
+    if args.cmd == "logs" and args.sub == "archives":
+        for a in list_archives():
+            print(f"{a['period']}  {a['file_name']}  {a['row_count']}  {a['min_created_at']} .. {a['max_created_at']}")
+        return
+
+    if args.cmd == "asof":
+        fn = {"part": part_as_of, "assembly": assembly_as_of, "tooling_list": tooling_list_as_of}[args.kind]
+        r = fn(args.code, args.at)
+        if r is None:
+            raise SystemExit(f"[asof] no history: {args.kind} {args.code} at {args.at}")
+        print(json.dumps(r, ensure_ascii=False, indent=2))
+        return
+
+    if args.cmd == "changes" and args.sub == "pull":
+        since = args.since
+        if since is None and args.state and os.path.exists(args.state):
+            with open(args.state, encoding="utf-8") as f:
+                since = int(f.read().strip() or 0)
+        since = since or 0
+        tables = [t.strip() for t in (args.tables or "").split(",") if t.strip()] or None
+
+        out = open(args.out, "a", encoding="utf-8") if args.out else sys.stdout
+        total = 0
+        try:
+            wait = 0.0
+            while True:
+                try:
+                    page = _fetch_changes(args.url, since, args.limit, tables, wait)
+                except CursorExpiredError as e:
+                    raise SystemExit(f"[changes] {e}")
+                for c in page["changes"]:
+                    out.write(json.dumps(c, ensure_ascii=False) + "\n")
+                out.flush()
+                total += len(page["changes"])
+                since = page["next_cursor"]
+                # 書き出してからカーソルを進める（落ちても取りこぼさない。重複はありうる）
+                if args.state:
+                    _save_cursor(args.state, since)
+                if page["has_more"]:
+                    wait = 0.0
+                    continue
+                if not args.follow:
+                    break
+                wait = args.wait
+        except KeyboardInterrupt:
+            pass
+        finally:
+            if args.out:
+                out.close()
+        print(f"[changes] pulled: {total} changes, cursor={since}", file=sys.stderr)
+        return
+
+    if args.cmd == "changes" and args.sub == "head":
+        print(head_cursor())
+        return
+
+    if args.cmd == "changes" and args.sub == "prune":
+        print(f"[changes] pruned: {prune_changes(args.before)} rows before {args.before}")
+        return
+
+    if args.cmd == "rollup":
+        rows = iter_rollup(parse_list_codes(" ".join(args.list_codes)), shortage_only=args.shortage_only)
+        if args.out:
+            with open(args.out, "w", encoding="utf-8", newline="") as f:
+                for chunk in iter_csv(rows):
+                    f.write(chunk)
+            print(f"[rollup] written: {args.out}")
+        else:
+            for chunk in iter_csv(rows):
+                sys.stdout.write(chunk.lstrip("\ufeff"))
+        return
+
 
 if __name__ == "__main__":
     main()
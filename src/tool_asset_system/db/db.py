@@ -1,20 +1,203 @@
 #src/tool_asset_system/db/db.py
 from __future__ import annotations
 
+import os
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar, Token
 from pathlib import Path
+from typing import Any, Iterator
 
-# プロジェクトルートを基準に data/tool_asset.db を指す
+from tool_asset_system import metrics
+from tool_asset_system.db import slowlog
+from tool_asset_system.db.pool import ConnectionPool, PooledConnection, PoolConfig
+
+# プロジェクトルートを基準に data/tool_asset.db を指す（TOOL_ASSET_DB_PATH で上書き可）
 BASE_DIR = Path(__file__).resolve().parents[3]
-DB_PATH = BASE_DIR / "data" / "tool_asset.db"
+DB_PATH = Path(os.environ.get("TOOL_ASSET_DB_PATH") or (BASE_DIR / "data" / "tool_asset.db"))
+
+_pool: ConnectionPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> ConnectionPool:
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(DB_PATH, PoolConfig.from_env())
+                # TOOL_ASSET_SLOW_QUERY_MS が設定されていればスロークエリログを有効にする
+                slowlog.install_from_env()
+    return _pool
+
+
+def configure_pool(path: Path | str | None = None, **overrides: Any) -> ConnectionPool:
+    """
+    プールを作り直す（テスト / 別DBを指すツール用）。
+    overrides は PoolConfig のフィールド（size=..., journal_mode=... など）。
+    """
+    global _pool, DB_PATH
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        if path is not None:
+            DB_PATH = Path(path)
+        _pool = ConnectionPool(DB_PATH, PoolConfig.from_env().with_overrides(**overrides))
+        slowlog.install_from_env()
+        return _pool
+
+
+class UnitOfWork:
+    """
+    1リクエスト（またはCLIの1コマンド）で共有する読み取り用コンテキスト。
+
+    - 接続は最初に connect() されたときに1本だけ借りる（DBを触らないリクエストは借りない）
+    - BEGIN（deferred）で読み取りトランザクションを張るので、
+      そのリクエスト中の読み取りはすべて同じスナップショットを見る
+    - 書き込み（transaction()）の前にはスナップショットを手放す。
+      以降の読み取りは新しいスナップショット（自分の書き込みを含む）になる
+    """
+
+    def __init__(self) -> None:
+        self._con: PooledConnection | None = None
+        self._token: Token[UnitOfWork | None] | None = None
+
+    def connection(self) -> PooledConnection:
+        if self._con is None:
+            con = get_pool().acquire()
+            con.__enter__()  # depth=1 を UoW が持つ：利用側の with では返却されない
+            self._con = con
+        if not self._con.in_transaction:
+            self._con.execute("BEGIN")
+        return self._con
+
+    def release_snapshot(self) -> None:
+        if self._con is not None and self._con.in_transaction:
+            self._con.rollback()
+
+    def close(self) -> None:
+        if self._token is not None:
+            try:
+                _current_uow.reset(self._token)
+            except ValueError:
+                # 別コンテキストで close された場合（ストリーミング応答など）
+                _current_uow.set(None)
+            self._token = None
+        con, self._con = self._con, None
+        if con is not None:
+            con._depth = 0
+            pool = con._pool
+            if pool is not None:
+                pool.release(con)  # 読み取り専用なので release 側で rollback される
+            else:
+                con.close()
+
+
+_current_uow: ContextVar[UnitOfWork | None] = ContextVar("tool_asset_uow", default=None)
+
+
+def open_unit_of_work() -> UnitOfWork:
+    """現在のコンテキスト（Flaskならリクエスト）に UnitOfWork を張る。close() で外す。"""
+    uow = UnitOfWork()
+    uow._token = _current_uow.set(uow)
+    return uow
+
+
+def current_unit_of_work() -> UnitOfWork | None:
+    return _current_uow.get()
+
+
+@contextmanager
+def unit_of_work() -> Iterator[UnitOfWork]:
+    uow = open_unit_of_work()
+    try:
+        yield uow
+    finally:
+        uow.close()
 
 
 def connect() -> sqlite3.Connection:
     """
     SQLite connection factory.
-    foreign_keys ON を保証する。
+    プールから接続を借りる（PRAGMA設定済み・foreign_keys ON 保証）。
+    `with connect() as con:` を抜けると commit/rollback してプールに返る。
+    UnitOfWork が張られていれば、その共有接続（同一スナップショット）を返す。
     """
-    con = sqlite3.connect(DB_PATH)
-    con.row_factory = sqlite3.Row
-    con.execute("PRAGMA foreign_keys = ON;")
-    return con
+    uow = _current_uow.get()
+    if uow is not None:
+        return uow.connection()
+    return get_pool().acquire()
+
+
+_columns: dict[tuple[str, str], tuple[str, ...]] = {}
+_columns_lock = threading.Lock()
+
+
+def table_columns(table: str) -> tuple[str, ...]:
+    """
+    PRAGMA table_info の列名。DBファイル × テーブルごとにプロセス内で1回だけ引く
+    （migrations はプロセス起動前に当てる前提。当てた後は再起動する）
+    """
+    key = (str(get_pool().path), table)
+    cols = _columns.get(key)
+    if cols is None:
+        with connect() as con:
+            cols = tuple(r[1] for r in con.execute(f"PRAGMA table_info({table})").fetchall())
+        with _columns_lock:
+            _columns[key] = cols
+    return cols
+
+
+def _is_busy(e: sqlite3.OperationalError) -> bool:
+    code = getattr(e, "sqlite_errorcode", None)
+    if code is not None:
+        return code & 0xFF == sqlite3.SQLITE_BUSY
+    return "locked" in str(e) or "busy" in str(e)
+
+
+def begin_immediate(con: PooledConnection, retries: int) -> None:
+    """
+    busy_timeout を超えて SQLITE_BUSY になったら、少し待って retries 回まで BEGIN をやり直す。
+    transaction() を使えない書き込み（ATTACH したまま何度もコミットするアーカイブなど）も、これで BEGIN する
+    """
+    for attempt in range(retries + 1):
+        try:
+            con.execute("BEGIN IMMEDIATE")
+            return
+        except sqlite3.OperationalError as e:
+            if not _is_busy(e):
+                raise
+            if attempt == retries:
+                metrics.DB_BUSY_ERRORS.inc()
+                raise
+            metrics.DB_BUSY_RETRIES.inc()
+            time.sleep(min(0.05 * (2 ** attempt), 1.0))
+
+
+@contextmanager
+def transaction() -> Iterator[sqlite3.Connection]:
+    """
+    書き込み用。UnitOfWork とは別の接続で BEGIN IMMEDIATE し、
+    正常終了で commit / 例外で rollback してプールに返す。
+    ロック待ち（BEGIN IMMEDIATE まで）と保持時間（commit/rollback まで）は metrics に記録する。
+    """
+    uow = _current_uow.get()
+    if uow is not None:
+        # 読み取りスナップショットを握ったまま書くと、rollback journal では自分自身を待ってしまう
+        uow.release_snapshot()
+
+    pool = get_pool()
+    con = pool.acquire()
+    t0 = time.perf_counter()
+    locked_at: float | None = None
+    try:
+        with con:
+            begin_immediate(con, pool.config.busy_retries)
+            locked_at = time.perf_counter()
+            metrics.TX_WAIT.observe(locked_at - t0)
+            yield con
+    finally:
+        if locked_at is not None:
+            metrics.TX_HOLD.observe(time.perf_counter() - locked_at)
@@ -0,0 +1,68 @@
+-- 0011_add_change_counters.sql
+PRAGMA foreign_keys = ON;
+
+-- 変更カウンタ（アプリ内キャッシュの無効化用）
+-- 対象テーブルに書き込みがあるたびに version を +1 する（トリガーで担保：SQL直編集でも漏れない）
+CREATE TABLE IF NOT EXISTS change_counters (
+  name TEXT PRIMARY KEY,
+  version INTEGER NOT NULL DEFAULT 0
+);
+
+INSERT OR IGNORE INTO change_counters(name, version) VALUES
+('dict', 0);
+
+-- 辞書テーブル（layers / categories / statuses）→ 'dict'
+
+CREATE TRIGGER IF NOT EXISTS trg_layers_dict_version_ins
+AFTER INSERT ON layers
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_layers_dict_version_upd
+AFTER UPDATE ON layers
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_layers_dict_version_del
+AFTER DELETE ON layers
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_categories_dict_version_ins
+AFTER INSERT ON categories
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_categories_dict_version_upd
+AFTER UPDATE ON categories
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_categories_dict_version_del
+AFTER DELETE ON categories
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_statuses_dict_version_ins
+AFTER INSERT ON statuses
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_statuses_dict_version_upd
+AFTER UPDATE ON statuses
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_statuses_dict_version_del
+AFTER DELETE ON statuses
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'dict';
+END;
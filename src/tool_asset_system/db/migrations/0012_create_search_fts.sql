@@ -0,0 +1,106 @@
+-- 0012_create_search_fts.sql
+PRAGMA foreign_keys = ON;
+
+-- 全文検索インデックス（FTS5 / trigram）
+-- - trigram: 日本語ラベルも型番の部分一致（XOGT1605 → "1605"）も3文字以上ならインデックスで引ける
+-- - external content（content=...）なので本文は元テーブルにだけ持つ
+-- - 同期はトリガーで担保（検索対象の列が変わったときだけ更新）
+
+-- parts（asset_code / 表示名 / 型番 / メーカー / メーカー品名）
+CREATE VIRTUAL TABLE IF NOT EXISTS parts_fts USING fts5(
+  asset_code, display_name, part_no, maker, maker_part_name,
+  content='parts',
+  content_rowid='id',
+  tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_fts_ins
+AFTER INSERT ON parts
+BEGIN
+  INSERT INTO parts_fts(rowid, asset_code, display_name, part_no, maker, maker_part_name)
+  VALUES (new.id, new.asset_code, new.display_name, new.part_no, new.maker, new.maker_part_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_fts_del
+AFTER DELETE ON parts
+BEGIN
+  INSERT INTO parts_fts(parts_fts, rowid, asset_code, display_name, part_no, maker, maker_part_name)
+  VALUES ('delete', old.id, old.asset_code, old.display_name, old.part_no, old.maker, old.maker_part_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_fts_upd
+AFTER UPDATE OF asset_code, display_name, part_no, maker, maker_part_name ON parts
+BEGIN
+  INSERT INTO parts_fts(parts_fts, rowid, asset_code, display_name, part_no, maker, maker_part_name)
+  VALUES ('delete', old.id, old.asset_code, old.display_name, old.part_no, old.maker, old.maker_part_name);
+  INSERT INTO parts_fts(rowid, asset_code, display_name, part_no, maker, maker_part_name)
+  VALUES (new.id, new.asset_code, new.display_name, new.part_no, new.maker, new.maker_part_name);
+END;
+
+INSERT INTO parts_fts(parts_fts) VALUES ('rebuild');
+
+-- assemblies（assembly_code / 表示名 / note）
+CREATE VIRTUAL TABLE IF NOT EXISTS assemblies_fts USING fts5(
+  assembly_code, display_name, note,
+  content='assemblies',
+  content_rowid='id',
+  tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_fts_ins
+AFTER INSERT ON assemblies
+BEGIN
+  INSERT INTO assemblies_fts(rowid, assembly_code, display_name, note)
+  VALUES (new.id, new.assembly_code, new.display_name, new.note);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_fts_del
+AFTER DELETE ON assemblies
+BEGIN
+  INSERT INTO assemblies_fts(assemblies_fts, rowid, assembly_code, display_name, note)
+  VALUES ('delete', old.id, old.assembly_code, old.display_name, old.note);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_fts_upd
+AFTER UPDATE OF assembly_code, display_name, note ON assemblies
+BEGIN
+  INSERT INTO assemblies_fts(assemblies_fts, rowid, assembly_code, display_name, note)
+  VALUES ('delete', old.id, old.assembly_code, old.display_name, old.note);
+  INSERT INTO assemblies_fts(rowid, assembly_code, display_name, note)
+  VALUES (new.id, new.assembly_code, new.display_name, new.note);
+END;
+
+INSERT INTO assemblies_fts(assemblies_fts) VALUES ('rebuild');
+
+-- tooling_lists（list_code / title / note）
+CREATE VIRTUAL TABLE IF NOT EXISTS tooling_lists_fts USING fts5(
+  list_code, title, note,
+  content='tooling_lists',
+  content_rowid='id',
+  tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_fts_ins
+AFTER INSERT ON tooling_lists
+BEGIN
+  INSERT INTO tooling_lists_fts(rowid, list_code, title, note)
+  VALUES (new.id, new.list_code, new.title, new.note);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_fts_del
+AFTER DELETE ON tooling_lists
+BEGIN
+  INSERT INTO tooling_lists_fts(tooling_lists_fts, rowid, list_code, title, note)
+  VALUES ('delete', old.id, old.list_code, old.title, old.note);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_fts_upd
+AFTER UPDATE OF list_code, title, note ON tooling_lists
+BEGIN
+  INSERT INTO tooling_lists_fts(tooling_lists_fts, rowid, list_code, title, note)
+  VALUES ('delete', old.id, old.list_code, old.title, old.note);
+  INSERT INTO tooling_lists_fts(rowid, list_code, title, note)
+  VALUES (new.id, new.list_code, new.title, new.note);
+END;
+
+INSERT INTO tooling_lists_fts(tooling_lists_fts) VALUES ('rebuild');
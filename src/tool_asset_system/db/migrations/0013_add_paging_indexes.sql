@@ -0,0 +1,18 @@
+-- 0013_add_paging_indexes.sql
+PRAGMA foreign_keys = ON;
+
+-- キーセットページング用（ORDER BY キーと同じ並びの複合インデックス）
+-- parts 一覧: layer_code → COALESCE(category_code,'') → asset_code（status 絞り込みあり/なし）
+CREATE INDEX IF NOT EXISTS idx_parts_page
+  ON parts(layer_code, COALESCE(category_code, ''), asset_code);
+
+CREATE INDEX IF NOT EXISTS idx_parts_status_page
+  ON parts(status, layer_code, COALESCE(category_code, ''), asset_code);
+
+-- アーカイブ一覧: status='ARCHIVED' → updated_at DESC → asset_code
+CREATE INDEX IF NOT EXISTS idx_parts_status_updated
+  ON parts(status, updated_at DESC, asset_code);
+
+-- tooling_lists 一覧: updated_at DESC → list_code DESC
+CREATE INDEX IF NOT EXISTS idx_tooling_lists_updated
+  ON tooling_lists(updated_at, list_code);
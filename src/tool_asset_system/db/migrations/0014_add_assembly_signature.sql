@@ -0,0 +1,35 @@
+-- 0014_add_assembly_signature.sql
+PRAGMA foreign_keys = ON;
+
+-- assembly の構成（signature）を保存しておき、「同じ parts 構成の assembly があるか」をインデックスで引く
+-- 形式は make_signature_from_items と同じ：LAYER_ORDER → asset_code の順に asset_code を '_' で連結
+-- items が無い assembly は NULL
+-- ※ UNIQUE にはしない（items を1件ずつ組み立てる途中で一時的に他と同じ構成になりうる / qty・role は含まない）
+--    重複は作成画面で警告する
+ALTER TABLE assemblies ADD COLUMN signature TEXT;
+
+UPDATE assemblies
+SET signature = (
+  SELECT group_concat(asset_code, '_')
+  FROM (
+    SELECT p.asset_code
+    FROM assembly_items ai
+    JOIN parts p ON p.id = ai.part_id
+    WHERE ai.assembly_id = assemblies.id
+    ORDER BY
+      CASE p.layer_code
+        WHEN 'HOLDER' THEN 0
+        WHEN 'SUB_HOLDER' THEN 1
+        WHEN 'TOOL_BODY' THEN 2
+        WHEN 'INSERT' THEN 3
+        WHEN 'SOLID_TOOL' THEN 4
+        WHEN 'SCREW' THEN 5
+        WHEN 'ACCESSORY' THEN 6
+        ELSE 998
+      END,
+      p.asset_code
+  )
+);
+
+CREATE INDEX IF NOT EXISTS idx_assemblies_signature
+  ON assemblies(signature);
@@ -0,0 +1,125 @@
+-- 0015_create_part_where_used.sql
+PRAGMA foreign_keys = ON;
+
+-- where-used（逆引き）：part → tooling_list の閉包を保持する
+-- part → assembly は assembly_items(part_id) のインデックスで直接引けるので持たない
+-- ref_count = その part と tooling_list をつなぐ (assembly_item, tooling_list_item) の組の数
+--   0 になったら行を消す
+-- assembly_items / tooling_list_items への書き込みでトリガーが差分だけ更新する
+CREATE TABLE IF NOT EXISTS part_where_used (
+  part_id INTEGER NOT NULL,
+  tooling_list_id INTEGER NOT NULL,
+  ref_count INTEGER NOT NULL,
+
+  PRIMARY KEY(part_id, tooling_list_id),
+  FOREIGN KEY(part_id) REFERENCES parts(id) ON DELETE CASCADE,
+  FOREIGN KEY(tooling_list_id) REFERENCES tooling_lists(id) ON DELETE CASCADE
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_part_where_used_list
+  ON part_where_used(tooling_list_id);
+
+-- 既存データから作る
+INSERT OR REPLACE INTO part_where_used(part_id, tooling_list_id, ref_count)
+SELECT ai.part_id, tli.tooling_list_id, count(*)
+FROM assembly_items ai
+JOIN tooling_list_items tli ON tli.assembly_id = ai.assembly_id
+GROUP BY ai.part_id, tli.tooling_list_id;
+
+-- ------------------------------------------------------------
+-- assembly_items：その assembly を載せている tooling_list 分だけ増減
+-- ------------------------------------------------------------
+CREATE TRIGGER IF NOT EXISTS trg_part_where_used_ai_ins
+AFTER INSERT ON assembly_items
+BEGIN
+  INSERT INTO part_where_used(part_id, tooling_list_id, ref_count)
+  SELECT NEW.part_id, tli.tooling_list_id, 1
+  FROM tooling_list_items tli
+  WHERE tli.assembly_id = NEW.assembly_id
+  ON CONFLICT(part_id, tooling_list_id) DO UPDATE SET ref_count = ref_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_part_where_used_ai_del
+AFTER DELETE ON assembly_items
+BEGIN
+  UPDATE part_where_used
+  SET ref_count = ref_count - (
+    SELECT count(*) FROM tooling_list_items tli
+    WHERE tli.assembly_id = OLD.assembly_id
+      AND tli.tooling_list_id = part_where_used.tooling_list_id
+  )
+  WHERE part_id = OLD.part_id
+    AND tooling_list_id IN (SELECT tooling_list_id FROM tooling_list_items WHERE assembly_id = OLD.assembly_id);
+
+  DELETE FROM part_where_used WHERE part_id = OLD.part_id AND ref_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_part_where_used_ai_upd
+AFTER UPDATE OF part_id, assembly_id ON assembly_items
+BEGIN
+  UPDATE part_where_used
+  SET ref_count = ref_count - (
+    SELECT count(*) FROM tooling_list_items tli
+    WHERE tli.assembly_id = OLD.assembly_id
+      AND tli.tooling_list_id = part_where_used.tooling_list_id
+  )
+  WHERE part_id = OLD.part_id
+    AND tooling_list_id IN (SELECT tooling_list_id FROM tooling_list_items WHERE assembly_id = OLD.assembly_id);
+
+  DELETE FROM part_where_used WHERE part_id = OLD.part_id AND ref_count <= 0;
+
+  INSERT INTO part_where_used(part_id, tooling_list_id, ref_count)
+  SELECT NEW.part_id, tli.tooling_list_id, 1
+  FROM tooling_list_items tli
+  WHERE tli.assembly_id = NEW.assembly_id
+  ON CONFLICT(part_id, tooling_list_id) DO UPDATE SET ref_count = ref_count + 1;
+END;
+
+-- ------------------------------------------------------------
+-- tooling_list_items：その assembly の items 分だけ増減
+-- ------------------------------------------------------------
+CREATE TRIGGER IF NOT EXISTS trg_part_where_used_tli_ins
+AFTER INSERT ON tooling_list_items
+BEGIN
+  INSERT INTO part_where_used(part_id, tooling_list_id, ref_count)
+  SELECT ai.part_id, NEW.tooling_list_id, 1
+  FROM assembly_items ai
+  WHERE ai.assembly_id = NEW.assembly_id
+  ON CONFLICT(part_id, tooling_list_id) DO UPDATE SET ref_count = ref_count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_part_where_used_tli_del
+AFTER DELETE ON tooling_list_items
+BEGIN
+  UPDATE part_where_used
+  SET ref_count = ref_count - (
+    SELECT count(*) FROM assembly_items ai
+    WHERE ai.assembly_id = OLD.assembly_id
+      AND ai.part_id = part_where_used.part_id
+  )
+  WHERE tooling_list_id = OLD.tooling_list_id
+    AND part_id IN (SELECT part_id FROM assembly_items WHERE assembly_id = OLD.assembly_id);
+
+  DELETE FROM part_where_used WHERE tooling_list_id = OLD.tooling_list_id AND ref_count <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_part_where_used_tli_upd
+AFTER UPDATE OF assembly_id, tooling_list_id ON tooling_list_items
+BEGIN
+  UPDATE part_where_used
+  SET ref_count = ref_count - (
+    SELECT count(*) FROM assembly_items ai
+    WHERE ai.assembly_id = OLD.assembly_id
+      AND ai.part_id = part_where_used.part_id
+  )
+  WHERE tooling_list_id = OLD.tooling_list_id
+    AND part_id IN (SELECT part_id FROM assembly_items WHERE assembly_id = OLD.assembly_id);
+
+  DELETE FROM part_where_used WHERE tooling_list_id = OLD.tooling_list_id AND ref_count <= 0;
+
+  INSERT INTO part_where_used(part_id, tooling_list_id, ref_count)
+  SELECT ai.part_id, NEW.tooling_list_id, 1
+  FROM assembly_items ai
+  WHERE ai.assembly_id = NEW.assembly_id
+  ON CONFLICT(part_id, tooling_list_id) DO UPDATE SET ref_count = ref_count + 1;
+END;
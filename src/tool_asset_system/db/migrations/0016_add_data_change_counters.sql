@@ -0,0 +1,111 @@
+-- 0016_add_data_change_counters.sql
+PRAGMA foreign_keys = ON;
+
+-- 条件付きGET（ETag）用の変更カウンタ。0011 の 'dict' と同じ仕組みで、データ側にも持たせる
+--   'parts'         ← parts
+--   'assemblies'    ← assemblies / assembly_items
+--   'tooling_lists' ← tooling_lists / tooling_list_items
+INSERT OR IGNORE INTO change_counters(name, version) VALUES
+('parts', 0),
+('assemblies', 0),
+('tooling_lists', 0);
+
+-- parts → 'parts'
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_parts_version_ins
+AFTER INSERT ON parts
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'parts';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_parts_version_upd
+AFTER UPDATE ON parts
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'parts';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_parts_version_del
+AFTER DELETE ON parts
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'parts';
+END;
+
+-- assemblies → 'assemblies'
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_assemblies_version_ins
+AFTER INSERT ON assemblies
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'assemblies';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_assemblies_version_upd
+AFTER UPDATE ON assemblies
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'assemblies';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_assemblies_version_del
+AFTER DELETE ON assemblies
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'assemblies';
+END;
+
+-- assembly_items → 'assemblies'
+
+CREATE TRIGGER IF NOT EXISTS trg_assembly_items_assemblies_version_ins
+AFTER INSERT ON assembly_items
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'assemblies';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assembly_items_assemblies_version_upd
+AFTER UPDATE ON assembly_items
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'assemblies';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assembly_items_assemblies_version_del
+AFTER DELETE ON assembly_items
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'assemblies';
+END;
+
+-- tooling_lists → 'tooling_lists'
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_tooling_lists_version_ins
+AFTER INSERT ON tooling_lists
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'tooling_lists';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_tooling_lists_version_upd
+AFTER UPDATE ON tooling_lists
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'tooling_lists';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_tooling_lists_version_del
+AFTER DELETE ON tooling_lists
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'tooling_lists';
+END;
+
+-- tooling_list_items → 'tooling_lists'
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_list_items_tooling_lists_version_ins
+AFTER INSERT ON tooling_list_items
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'tooling_lists';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_list_items_tooling_lists_version_upd
+AFTER UPDATE ON tooling_list_items
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'tooling_lists';
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_list_items_tooling_lists_version_del
+AFTER DELETE ON tooling_list_items
+BEGIN
+  UPDATE change_counters SET version = version + 1 WHERE name = 'tooling_lists';
+END;
@@ -0,0 +1,16 @@
+-- 0017_create_log_archives.sql
+-- operation_logs の古い行を期間ごとのアーカイブDB（data/archive/oplog_<period>.db）へ移す。
+-- どのファイルに何が入っているかの索引（services/log_archive.py が更新する）
+
+PRAGMA foreign_keys = ON;
+
+CREATE TABLE IF NOT EXISTS log_archives (
+  period TEXT PRIMARY KEY,              -- '2025-01'（月単位）/ '2025'（年単位）
+  file_name TEXT NOT NULL,              -- アーカイブディレクトリからの相対パス
+  row_count INTEGER NOT NULL DEFAULT 0,
+  min_id INTEGER,
+  max_id INTEGER,
+  min_created_at TEXT,
+  max_created_at TEXT,
+  updated_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
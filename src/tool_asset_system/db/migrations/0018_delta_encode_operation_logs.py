@@ -0,0 +1,38 @@
+# src/tool_asset_system/db/migrations/0018_delta_encode_operation_logs.py
+"""
+operation_logs の before_json / after_json（平文の行まるごと）を payload（FULL / DELTA、圧縮）へ変換する。
+
+- payload_kind / payload 列を足す
+- 本体と、log_archives に載っているアーカイブファイルの両方を変換する
+- 変換は services/log_payload.convert_legacy（途中で止まっても再実行で続きから）
+- 空いたページは freelist に戻るだけなので、ファイルを縮めたいときは別途 VACUUM する
+"""
+from __future__ import annotations
+
+import sqlite3
+from pathlib import Path
+
+from tool_asset_system.services.log_archive import ensure_payload_columns
+from tool_asset_system.services.log_payload import convert_legacy
+
+
+def upgrade(con: sqlite3.Connection) -> None:
+    ensure_payload_columns(con, "main")
+    n = convert_legacy(con, "main")
+    con.commit()
+    print(f"[upgrade]   operation_logs: {n} rows delta-encoded")
+
+    main_file = next(r[2] for r in con.execute("PRAGMA database_list") if r[1] == "main")
+    archive_dir = Path(main_file).parent / "archive"
+    for r in con.execute("SELECT file_name FROM log_archives ORDER BY period").fetchall():
+        path = archive_dir / r[0]
+        if not path.exists():
+            continue
+        con.execute("ATTACH DATABASE ? AS arc", (str(path),))
+        try:
+            ensure_payload_columns(con, "arc")
+            n = convert_legacy(con, "arc")
+            con.commit()
+            print(f"[upgrade]   {r[0]}: {n} rows delta-encoded")
+        finally:
+            con.execute("DETACH DATABASE arc")
@@ -0,0 +1,18 @@
+-- 0019_add_operation_log_audit_indexes.sql
+-- 監査ログ検索（services/audit.py）用。並びは (created_at DESC, id DESC) のキーセット。
+-- 絞り込み列 → created_at → id の順にし（ORDER BY をそのまま満たす）、一覧に出す列（action / target / actor）も含めて
+-- 表を引かずにインデックスだけで1ページ返せるようにする（covering index）。
+-- idx_operation_logs_target(target_type, target_code) は id 順の履歴（log_history / rebuild）用に残す。
+
+DROP INDEX IF EXISTS idx_operation_logs_created_at;
+CREATE INDEX IF NOT EXISTS idx_operation_logs_created_at
+  ON operation_logs(created_at, id, action, target_type, target_code, actor);
+
+CREATE INDEX IF NOT EXISTS idx_operation_logs_actor_created
+  ON operation_logs(actor, created_at, id, action, target_type, target_code);
+
+CREATE INDEX IF NOT EXISTS idx_operation_logs_action_created
+  ON operation_logs(action, created_at, id, target_type, target_code, actor);
+
+CREATE INDEX IF NOT EXISTS idx_operation_logs_target_created
+  ON operation_logs(target_type, target_code, created_at, id, action, actor);
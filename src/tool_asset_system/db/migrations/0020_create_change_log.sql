@@ -0,0 +1,131 @@
+-- 0020_create_change_log.sql
+PRAGMA foreign_keys = ON;
+
+-- 変更フィード（CDC）：下流（CAM / VERICUT のライブラリ）の差分同期用
+-- parts / assemblies / assembly_items / tooling_lists / tooling_list_items への書き込みごとに1行
+-- （トリガーで担保：画面・API・一括投入・SQL直編集のどれでも漏れない）
+--   seq        : 単調増加のカーソル（AUTOINCREMENT なので削除後も再利用しない）
+--   table_name : 変更されたテーブル
+--   row_id     : その行の id
+--   op         : I / U / D
+--   code       : 業務キー（parts=asset_code / assemblies=assembly_code / tooling_lists=list_code、
+--                items は親の code。親ごと消えたときは NULL のことがある）
+-- 行の中身は持たない（読み出し時に今の行を引く）
+CREATE TABLE IF NOT EXISTS change_log (
+  seq INTEGER PRIMARY KEY AUTOINCREMENT,
+  table_name TEXT NOT NULL,
+  row_id INTEGER NOT NULL,
+  op TEXT NOT NULL CHECK (op IN ('I', 'U', 'D')),
+  code TEXT,
+  changed_at TEXT NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+-- 古い行の削除（changed_at < ?）用
+CREATE INDEX IF NOT EXISTS idx_change_log_changed
+  ON change_log(changed_at);
+
+-- parts
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_change_log_ins
+AFTER INSERT ON parts
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('parts', NEW.id, 'I', NEW.asset_code);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_change_log_upd
+AFTER UPDATE ON parts
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('parts', NEW.id, 'U', NEW.asset_code);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_parts_change_log_del
+AFTER DELETE ON parts
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('parts', OLD.id, 'D', OLD.asset_code);
+END;
+
+-- assemblies
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_change_log_ins
+AFTER INSERT ON assemblies
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('assemblies', NEW.id, 'I', NEW.assembly_code);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_change_log_upd
+AFTER UPDATE ON assemblies
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('assemblies', NEW.id, 'U', NEW.assembly_code);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assemblies_change_log_del
+AFTER DELETE ON assemblies
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('assemblies', OLD.id, 'D', OLD.assembly_code);
+END;
+
+-- assembly_items（code は親 assembly）
+
+CREATE TRIGGER IF NOT EXISTS trg_assembly_items_change_log_ins
+AFTER INSERT ON assembly_items
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code)
+  VALUES ('assembly_items', NEW.id, 'I', (SELECT assembly_code FROM assemblies WHERE id = NEW.assembly_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assembly_items_change_log_upd
+AFTER UPDATE ON assembly_items
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code)
+  VALUES ('assembly_items', NEW.id, 'U', (SELECT assembly_code FROM assemblies WHERE id = NEW.assembly_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_assembly_items_change_log_del
+AFTER DELETE ON assembly_items
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code)
+  VALUES ('assembly_items', OLD.id, 'D', (SELECT assembly_code FROM assemblies WHERE id = OLD.assembly_id));
+END;
+
+-- tooling_lists
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_change_log_ins
+AFTER INSERT ON tooling_lists
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('tooling_lists', NEW.id, 'I', NEW.list_code);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_change_log_upd
+AFTER UPDATE ON tooling_lists
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('tooling_lists', NEW.id, 'U', NEW.list_code);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_lists_change_log_del
+AFTER DELETE ON tooling_lists
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code) VALUES ('tooling_lists', OLD.id, 'D', OLD.list_code);
+END;
+
+-- tooling_list_items（code は親 tooling_list）
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_list_items_change_log_ins
+AFTER INSERT ON tooling_list_items
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code)
+  VALUES ('tooling_list_items', NEW.id, 'I', (SELECT list_code FROM tooling_lists WHERE id = NEW.tooling_list_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_list_items_change_log_upd
+AFTER UPDATE ON tooling_list_items
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code)
+  VALUES ('tooling_list_items', NEW.id, 'U', (SELECT list_code FROM tooling_lists WHERE id = NEW.tooling_list_id));
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tooling_list_items_change_log_del
+AFTER DELETE ON tooling_list_items
+BEGIN
+  INSERT INTO change_log(table_name, row_id, op, code)
+  VALUES ('tooling_list_items', OLD.id, 'D', (SELECT list_code FROM tooling_lists WHERE id = OLD.tooling_list_id));
+END;
@@ -0,0 +1,383 @@
+# src/tool_asset_system/db/pool.py
+"""
+SQLite connection pool.
+
+- 接続ごとのPRAGMA（journal_mode / synchronous / cache_size / mmap_size / busy_timeout）は
+  接続を開いたときに1回だけ流す
+- idle接続は LIFO で再利用する（直近に使った接続ほどページキャッシュが温かい）
+- size は「保持しておく idle 接続」の上限で、同時に開く接続数の上限ではない
+  （借りる側を待たせない。SQLite の書き込みは BEGIN IMMEDIATE + busy_timeout で直列化される）
+- 貸し出し中の接続は「借りたスレッド」のもの。別スレッドからの返却は拒否する
+  （その接続はもう信用できないので、プールに戻さず close してから RuntimeError）
+- fork 後は親プロセスの接続を使わない（pid が変わったら idle を捨てる）
+- 計測用フック：add_statement_listener / add_acquire_listener（登録が無ければ素通り）
+  文の時間は execute から結果を読み終わるまで（fetch の時間も含む）
+"""
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import Any, Callable
+
+
+def _env_int(name: str, default: int) -> int:
+    v = os.environ.get(name, "").strip()
+    return int(v) if v else default
+
+
+def _env_float(name: str, default: float) -> float:
+    v = os.environ.get(name, "").strip()
+    return float(v) if v else default
+
+
+def _env_str(name: str, default: str) -> str:
+    v = os.environ.get(name, "").strip()
+    return v if v else default
+
+
+@dataclass(frozen=True)
+class PoolConfig:
+    size: int = 8                     # 保持する idle 接続の上限（超えた分は返却時に close）。開く数は制限しない
+    journal_mode: str = "WAL"
+    synchronous: str = "NORMAL"
+    cache_size: int = -16000          # 負数は KiB 指定（約16MB）
+    mmap_size: int = 128 * 1024 * 1024
+    busy_timeout_ms: int = 5000
+    health_check_after: float = 30.0  # この秒数以上 idle だった接続は SELECT 1 で確認してから貸す
+    max_lifetime: float = 3600.0      # この秒数を超えた接続は貸さずに作り直す
+    busy_retries: int = 2             # transaction() の BEGIN IMMEDIATE が busy_timeout 超えで失敗したときの再試行回数
+
+    @classmethod
+    def from_env(cls) -> PoolConfig:
+        d = cls()
+        return cls(
+            size=_env_int("TOOL_ASSET_DB_POOL_SIZE", d.size),
+            journal_mode=_env_str("TOOL_ASSET_DB_JOURNAL_MODE", d.journal_mode).upper(),
+            synchronous=_env_str("TOOL_ASSET_DB_SYNCHRONOUS", d.synchronous).upper(),
+            cache_size=_env_int("TOOL_ASSET_DB_CACHE_SIZE", d.cache_size),
+            mmap_size=_env_int("TOOL_ASSET_DB_MMAP_SIZE", d.mmap_size),
+            busy_timeout_ms=_env_int("TOOL_ASSET_DB_BUSY_TIMEOUT_MS", d.busy_timeout_ms),
+            health_check_after=_env_float("TOOL_ASSET_DB_HEALTH_CHECK_AFTER", d.health_check_after),
+            max_lifetime=_env_float("TOOL_ASSET_DB_MAX_LIFETIME", d.max_lifetime),
+            busy_retries=_env_int("TOOL_ASSET_DB_BUSY_RETRIES", d.busy_retries),
+        )
+
+    def with_overrides(self, **overrides: Any) -> PoolConfig:
+        return replace(self, **overrides)
+
+
+# ============================================================
+# 計測用フック（プロファイラ / スロークエリログなど）
+# ============================================================
+
+@dataclass(frozen=True)
+class StatementEvent:
+    sql: str
+    params: Any              # executemany のときは None（イテレータを消費しないため）
+    elapsed: float           # 秒。execute から結果を読み終わるまで（fetch / 反復の時間も含む。利用側の処理は含まない）
+    many: bool = False
+    con: sqlite3.Connection | None = None  # 実行した接続（EXPLAIN QUERY PLAN を取りたいとき用）
+
+
+StatementListener = Callable[[StatementEvent], None]
+AcquireListener = Callable[[bool], None]  # 引数: 新しく開いた接続か
+
+_statement_listeners: list[StatementListener] = []
+_acquire_listeners: list[AcquireListener] = []
+
+
+def add_statement_listener(fn: StatementListener) -> None:
+    if fn not in _statement_listeners:
+        _statement_listeners.append(fn)
+
+
+def remove_statement_listener(fn: StatementListener) -> None:
+    if fn in _statement_listeners:
+        _statement_listeners.remove(fn)
+
+
+def add_acquire_listener(fn: AcquireListener) -> None:
+    if fn not in _acquire_listeners:
+        _acquire_listeners.append(fn)
+
+
+def remove_acquire_listener(fn: AcquireListener) -> None:
+    if fn in _acquire_listeners:
+        _acquire_listeners.remove(fn)
+
+
+def _notify_statement(event: StatementEvent) -> None:
+    for fn in list(_statement_listeners):
+        fn(event)
+
+
+class _TimedCursor(sqlite3.Cursor):
+    """
+    listener があるときの execute の戻り値。
+    SQLite は execute で1行目まで、残りは fetch / 反復のたびに進むので、その時間も同じ文に足し、
+    読み終わり（fetch が尽きたとき）・close・破棄のどれか最初の1回で通知する
+    """
+
+    _pending: tuple[str, Any, sqlite3.Connection] | None = None
+    _elapsed = 0.0
+
+    def _track(self, sql: str, params: Any, con: sqlite3.Connection, elapsed: float) -> None:
+        self._pending = (sql, params, con)
+        self._elapsed = elapsed
+        if self.description is None:
+            # 行を返さない文（INSERT / UPDATE / BEGIN など）は execute で終わっている
+            self._finish()
+
+    def _add(self, t0: float, done: bool) -> None:
+        self._elapsed += time.perf_counter() - t0
+        if done:
+            self._finish()
+
+    def _finish(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is not None:
+            sql, params, con = pending
+            _notify_statement(StatementEvent(sql, params, self._elapsed, con=con))
+
+    def fetchone(self) -> Any:
+        t0 = time.perf_counter()
+        row = super().fetchone()
+        self._add(t0, row is None)
+        return row
+
+    def fetchmany(self, size: int | None = None) -> list[Any]:
+        n = self.arraysize if size is None else size
+        t0 = time.perf_counter()
+        rows = super().fetchmany(n)
+        self._add(t0, len(rows) < n)
+        return rows
+
+    def fetchall(self) -> list[Any]:
+        t0 = time.perf_counter()
+        rows = super().fetchall()
+        self._add(t0, True)
+        return rows
+
+    def __next__(self) -> Any:
+        t0 = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._add(t0, True)
+            raise
+        self._add(t0, False)
+        return row
+
+    def close(self) -> None:
+        self._finish()
+        super().close()
+
+    def __del__(self) -> None:
+        # 最後まで読まずに捨てられた（execute(...).fetchone() など）
+        self._finish()
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3.Connection そのもの（isinstance が通る）。
+    `with connect() as con:` の一番外側を抜けたときに commit/rollback してプールへ返す。
+    入れ子の with では何もしない（外側のトランザクションを勝手に確定させない）。
+    """
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._pool: ConnectionPool | None = None
+        self._created_at = time.monotonic()
+        self._last_used = self._created_at
+        self._owner: int | None = None
+        self._depth = 0
+
+    def __enter__(self) -> PooledConnection:
+        self._depth += 1
+        return self
+
+    def execute(self, sql: str, parameters: Any = (), /) -> sqlite3.Cursor:  # type: ignore[override]
+        if not _statement_listeners:
+            return super().execute(sql, parameters)
+        cur = self.cursor(_TimedCursor)
+        t0 = time.perf_counter()
+        try:
+            sqlite3.Cursor.execute(cur, sql, parameters)
+        except BaseException:
+            _notify_statement(StatementEvent(sql, parameters, time.perf_counter() - t0, con=self))
+            raise
+        cur._track(sql, parameters, self, time.perf_counter() - t0)
+        return cur
+
+    def executemany(self, sql: str, parameters: Any, /) -> sqlite3.Cursor:  # type: ignore[override]
+        if not _statement_listeners:
+            return super().executemany(sql, parameters)
+        t0 = time.perf_counter()
+        try:
+            return super().executemany(sql, parameters)
+        finally:
+            _notify_statement(StatementEvent(sql, None, time.perf_counter() - t0, many=True, con=self))
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self._depth -= 1
+        if self._depth > 0:
+            return False
+        try:
+            super().__exit__(exc_type, exc, tb)
+        finally:
+            if self._pool is not None:
+                self._pool.release(self)
+            else:
+                self.close()
+        return False
+
+
+class ConnectionPool:
+    def __init__(self, path: Path | str, config: PoolConfig | None = None) -> None:
+        self.path = Path(path)
+        self.config = config or PoolConfig.from_env()
+        self._idle: deque[PooledConnection] = deque()
+        self._lock = threading.Lock()
+        self._pid = os.getpid()
+        self._closed = False
+        self.stats = {"opened": 0, "reused": 0, "discarded": 0, "checked_out": 0}
+
+    # ----------------------------
+    # open / configure
+    # ----------------------------
+    def _open(self) -> PooledConnection:
+        cfg = self.config
+        con = sqlite3.connect(
+            self.path,
+            factory=PooledConnection,
+            timeout=cfg.busy_timeout_ms / 1000.0,
+            check_same_thread=False,  # スレッド所有はプール側で管理する
+        )
+        assert isinstance(con, PooledConnection)
+        con.row_factory = sqlite3.Row
+        con.execute(f"PRAGMA busy_timeout = {int(cfg.busy_timeout_ms)};")
+        con.execute(f"PRAGMA journal_mode = {cfg.journal_mode};")
+        con.execute(f"PRAGMA synchronous = {cfg.synchronous};")
+        con.execute(f"PRAGMA cache_size = {int(cfg.cache_size)};")
+        con.execute(f"PRAGMA mmap_size = {int(cfg.mmap_size)};")
+        con.execute("PRAGMA foreign_keys = ON;")
+        con._pool = self
+        with self._lock:
+            self.stats["opened"] += 1
+        return con
+
+    @staticmethod
+    def _healthy(con: PooledConnection) -> bool:
+        try:
+            con.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, con: PooledConnection) -> None:
+        con._pool = None
+        try:
+            con.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self.stats["discarded"] += 1
+
+    def _check_fork(self) -> None:
+        # fork 後の子プロセスでは親の接続を一切使わない（close もしない：親側のファイルロックを壊さないため）
+        pid = os.getpid()
+        if pid != self._pid:
+            with self._lock:
+                self._idle.clear()
+                self._pid = pid
+
+    # ----------------------------
+    # acquire / release
+    # ----------------------------
+    def acquire(self) -> PooledConnection:
+        if self._closed:
+            raise RuntimeError("connection pool is closed")
+        self._check_fork()
+
+        now = time.monotonic()
+        con: PooledConnection | None = None
+        while True:
+            with self._lock:
+                cand = self._idle.pop() if self._idle else None
+            if cand is None:
+                break
+            if now - cand._created_at > self.config.max_lifetime:
+                self._discard(cand)
+                continue
+            if now - cand._last_used > self.config.health_check_after and not self._healthy(cand):
+                self._discard(cand)
+                continue
+            con = cand
+            with self._lock:
+                self.stats["reused"] += 1
+            break
+
+        opened = con is None
+        if con is None:
+            con = self._open()
+
+        con._owner = threading.get_ident()
+        con._depth = 0
+        with self._lock:
+            self.stats["checked_out"] += 1
+        for fn in list(_acquire_listeners):
+            fn(opened)
+        return con
+
+    def release(self, con: PooledConnection) -> None:
+        if con._owner is None:
+            # 返却済み（別スレッドからの返却で捨てたものなど）。数え直さない
+            return
+        if con._owner != threading.get_ident():
+            # with を抜けた後（commit 済み）でもここに来る。貸し出し数を戻して接続は捨ててから知らせる
+            con._owner = None
+            with self._lock:
+                self.stats["checked_out"] -= 1
+            self._discard(con)
+            raise RuntimeError("connection released from a thread that did not acquire it")
+        con._owner = None
+        con._depth = 0
+        con._last_used = time.monotonic()
+        with self._lock:
+            self.stats["checked_out"] -= 1
+
+        try:
+            if con.in_transaction:
+                # 中途半端なトランザクションを次の利用者に持ち越さない
+                con.rollback()
+        except sqlite3.Error:
+            # 呼び出し側で close() 済み / 壊れた接続はプールに戻さない
+            self._discard(con)
+            return
+
+        if self._closed or os.getpid() != self._pid:
+            self._discard(con)
+            return
+
+        with self._lock:
+            if len(self._idle) < self.config.size:
+                self._idle.append(con)
+                return
+        self._discard(con)
+
+    def close(self) -> None:
+        self._closed = True
+        with self._lock:
+            idle = list(self._idle)
+            self._idle.clear()
+        for con in idle:
+            self._discard(con)
+
+    def idle_count(self) -> int:
+        with self._lock:
+            return len(self._idle)
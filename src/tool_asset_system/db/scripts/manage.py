@@ -1,17 +1,20 @@
 # src/tool_asset_system/db/scripts/manage.py
 from __future__ import annotations
 
+import importlib.util
+import os
 import sqlite3
 from pathlib import Path
 
 ROOT = Path(__file__).resolve().parents[4]  # tool-asset-system/
 MIG_DIR = ROOT / "src" / "tool_asset_system" / "db" / "migrations"
-DB_PATH = ROOT / "data" / "tool_asset.db"
+DB_PATH = Path(os.environ.get("TOOL_ASSET_DB_PATH") or (ROOT / "data" / "tool_asset.db"))
 
 
-def connect() -> sqlite3.Connection:
-    DB_PATH.parent.mkdir(parents=True, exist_ok=True)
-    con = sqlite3.connect(DB_PATH)
+def connect(db_path: Path | None = None) -> sqlite3.Connection:
+    path = Path(db_path) if db_path is not None else DB_PATH
+    path.parent.mkdir(parents=True, exist_ok=True)
+    con = sqlite3.connect(path)
     con.row_factory = sqlite3.Row
     con.execute("PRAGMA foreign_keys = ON;")
     return con
@@ -34,27 +37,38 @@ def applied_versions(con: sqlite3.Connection) -> set[str]:
     return {r["version"] for r in rows}
 
 
-def upgrade() -> None:
-    with connect() as con:
+def _run_python_migration(con: sqlite3.Connection, path: Path) -> None:
+    """SQL だけでは書けない変換（圧縮など）は .py にして upgrade(con) を呼ぶ"""
+    spec = importlib.util.spec_from_file_location(f"tool_asset_migration_{path.stem}", path)
+    assert spec is not None and spec.loader is not None
+    mod = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(mod)
+    mod.upgrade(con)
+
+
+def upgrade(db_path: Path | None = None) -> None:
+    with connect(db_path) as con:
         done = applied_versions(con)
 
-        for p in sorted(MIG_DIR.glob("*.sql")):
+        migrations = [p for p in MIG_DIR.iterdir() if p.suffix in (".sql", ".py")]
+        for p in sorted(migrations, key=lambda p: p.name):
             ver = p.stem
             if ver in done:
                 continue
 
-            sql = p.read_text(encoding="utf-8")
-
-            # NOTE:
-            # executescript() は暗黙COMMITすることがあるので、
-            # 適用記録は「実行後に必ず」INSERTして同一コネクションで確定させる
-            con.executescript(sql)
+            if p.suffix == ".py":
+                _run_python_migration(con, p)
+            else:
+                # NOTE:
+                # executescript() は暗黙COMMITすることがあるので、
+                # 適用記録は「実行後に必ず」INSERTして同一コネクションで確定させる
+                con.executescript(p.read_text(encoding="utf-8"))
             con.execute("INSERT INTO schema_migrations(version) VALUES (?)", (ver,))
             con.commit()
 
             print(f"[upgrade] applied {p.name}")
 
-        print(f"[upgrade] DB: {DB_PATH}")
+        print(f"[upgrade] DB: {db_path or DB_PATH}")
 
 
 if __name__ == "__main__":
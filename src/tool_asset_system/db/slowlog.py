@@ -0,0 +1,204 @@
+# src/tool_asset_system/db/slowlog.py
+"""
+スロークエリログ。
+
+- しきい値（TOOL_ASSET_SLOW_QUERY_MS）以上かかった文を記録する。未設定 / 0 以下なら無効
+- 記録するもの：SQL / パラメータ / 時間 / EXPLAIN QUERY PLAN / 注意フラグ
+  （テーブル全走査 "SCAN x"、インデックス全走査、ORDER BY 等の一時B-tree）
+- 出力：data/logs/slow_query.log（JSON 1行、ローテーション）＋ 直近分をメモリに保持（管理画面用）
+- pool の statement listener で拾うので、connect() / transaction() 経由の全接続が対象
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from tool_asset_system.db.pool import StatementEvent, add_statement_listener, remove_statement_listener
+
+BASE_DIR = Path(__file__).resolve().parents[3]
+DEFAULT_LOG_PATH = BASE_DIR / "data" / "logs" / "slow_query.log"
+MAX_BYTES = 1024 * 1024
+BACKUP_COUNT = 5
+RECENT_SIZE = 200
+
+# EXPLAIN QUERY PLAN を取る文（BEGIN / PRAGMA などは時間だけ記録）
+_PLANNABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+logger = logging.getLogger("tool_asset_system.slow_query")
+logger.propagate = False
+# 設定ミスなどの通知用（スロークエリ本体のログとは別）
+_log = logging.getLogger(__name__)
+
+
+@dataclass
+class SlowQuery:
+    at: str
+    ms: float
+    sql: str
+    params: Any
+    plan: list[str] = field(default_factory=list)
+    flags: list[str] = field(default_factory=list)
+
+    @property
+    def full_scan(self) -> bool:
+        return any(f.startswith("full scan") for f in self.flags)
+
+
+@dataclass
+class _State:
+    threshold: float = 0.0  # 秒
+    path: Path | None = None
+    handler: logging.Handler | None = None
+    recent: deque[SlowQuery] = field(default_factory=lambda: deque(maxlen=RECENT_SIZE))
+
+
+_state: _State | None = None
+_lock = threading.Lock()
+
+
+def _jsonable(params: Any) -> Any:
+    if params is None:
+        return None
+    if isinstance(params, dict):
+        return {k: _jsonable_value(v) for k, v in params.items()}
+    return [_jsonable_value(v) for v in params]
+
+
+def _jsonable_value(v: Any) -> Any:
+    if isinstance(v, (bytes, bytearray, memoryview)):
+        return f"<blob {len(v)} bytes>"
+    if isinstance(v, str) and len(v) > 200:
+        return v[:200] + "…"
+    return v
+
+
+def explain(con: sqlite3.Connection, sql: str, params: Any) -> list[str]:
+    """EXPLAIN QUERY PLAN の detail を木の深さ付きで返す（listener を通さずに実行）"""
+    rows = sqlite3.Connection.execute(con, f"EXPLAIN QUERY PLAN {sql}", params or ()).fetchall()
+    depth: dict[int, int] = {0: -1}
+    out: list[str] = []
+    for r in rows:
+        node_id, parent, detail = r[0], r[1], r[3]
+        depth[node_id] = depth.get(parent, -1) + 1
+        out.append("  " * depth[node_id] + detail)
+    return out
+
+
+def plan_flags(plan: list[str]) -> list[str]:
+    flags: list[str] = []
+    for line in plan:
+        d = line.strip()
+        if d.startswith("SCAN ") and "VIRTUAL TABLE" not in d:
+            name = d.split()[1]
+            if " USING " in d:
+                flags.append(f"index scan: {name}")
+            else:
+                flags.append(f"full scan: {name}")
+        elif "TEMP B-TREE" in d:
+            flags.append(d.lower())
+    return flags
+
+
+def _on_statement(ev: StatementEvent) -> None:
+    st = _state
+    if st is None or ev.elapsed < st.threshold:
+        return
+
+    plan: list[str] = []
+    if not ev.many and ev.con is not None and _PLANNABLE.match(ev.sql):
+        try:
+            plan = explain(ev.con, ev.sql, ev.params)
+        except sqlite3.Error as e:
+            plan = [f"(explain failed: {e})"]
+
+    q = SlowQuery(
+        at=datetime.now().isoformat(timespec="seconds"),
+        ms=round(ev.elapsed * 1000, 3),
+        sql=re.sub(r"\s+", " ", ev.sql).strip(),
+        params=_jsonable(ev.params) if not ev.many else "(executemany)",
+        plan=plan,
+        flags=plan_flags(plan),
+    )
+    with _lock:
+        st.recent.append(q)
+    logger.warning(json.dumps(asdict(q), ensure_ascii=False, default=str))
+
+
+def install_slow_query_log(threshold_ms: float, path: Path | str | None = None) -> None:
+    """しきい値（ミリ秒）以上の文を記録し始める。もう一度呼ぶと設定を差し替える"""
+    global _state
+    uninstall_slow_query_log()
+
+    log_path = Path(path) if path else DEFAULT_LOG_PATH
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    handler = RotatingFileHandler(log_path, maxBytes=MAX_BYTES, backupCount=BACKUP_COUNT, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(logging.WARNING)
+
+    _state = _State(threshold=max(0.0, threshold_ms) / 1000.0, path=log_path, handler=handler)
+    add_statement_listener(_on_statement)
+
+
+def uninstall_slow_query_log() -> None:
+    global _state
+    st, _state = _state, None
+    remove_statement_listener(_on_statement)
+    if st is not None and st.handler is not None:
+        logger.removeHandler(st.handler)
+        st.handler.close()
+
+
+def install_from_env() -> None:
+    """TOOL_ASSET_SLOW_QUERY_MS / TOOL_ASSET_SLOW_QUERY_LOG を見て有効化（設定済みなら何もしない）"""
+    if _state is not None:
+        return
+    raw = os.environ.get("TOOL_ASSET_SLOW_QUERY_MS", "").strip()
+    if not raw:
+        return
+    try:
+        threshold_ms = float(raw)
+    except ValueError:
+        # 設定ミスでリクエストごと落とさない（スロークエリログが無効になるだけ）
+        _log.warning("TOOL_ASSET_SLOW_QUERY_MS is not a number: %r (slow query log disabled)", raw)
+        return
+    if not threshold_ms > 0:  # 0 以下 / nan
+        return
+    install_slow_query_log(threshold_ms, os.environ.get("TOOL_ASSET_SLOW_QUERY_LOG", "").strip() or None)
+
+
+def settings() -> dict[str, Any]:
+    st = _state
+    if st is None:
+        return {"enabled": False, "threshold_ms": None, "path": None}
+    return {"enabled": True, "threshold_ms": st.threshold * 1000, "path": str(st.path)}
+
+
+def recent_slow_queries() -> list[SlowQuery]:
+    """新しい順"""
+    st = _state
+    if st is None:
+        return []
+    with _lock:
+        return list(reversed(st.recent))
+
+
+def summarize(queries: list[SlowQuery]) -> list[dict[str, Any]]:
+    """同じ SQL ごとに 回数 / 最大 / 合計 ms（合計の大きい順）"""
+    by_sql: dict[str, dict[str, Any]] = {}
+    for q in queries:
+        s = by_sql.setdefault(q.sql, {"sql": q.sql, "count": 0, "max_ms": 0.0, "total_ms": 0.0, "flags": q.flags})
+        s["count"] += 1
+        s["max_ms"] = max(s["max_ms"], q.ms)
+        s["total_ms"] = round(s["total_ms"] + q.ms, 3)
+    return sorted(by_sql.values(), key=lambda s: -s["total_ms"])
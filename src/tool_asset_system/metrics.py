@@ -0,0 +1,160 @@
+# src/tool_asset_system/metrics.py
+"""
+運用監視用のメトリクス（Prometheus テキスト形式で出す）。
+
+- 外部ライブラリなし。Counter / Histogram はロック1つで加算するだけなので常時有効にしておける
+- ラベルは endpoint / blueprint / status など種類が限られるものだけに使う（URL そのものは使わない）
+- 値の収集：Web は web/routes_metrics.py、書き込みトランザクションは db.transaction()
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from typing import Iterable
+
+# 秒
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+LabelValues = tuple[str, ...]
+
+
+def _escape(v: str) -> str:
+    return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: LabelValues, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _num(v: float) -> str:
+    return str(int(v)) if float(v).is_integer() else repr(float(v))
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()) -> None:
+        self.name, self.help, self.label_names = name, help, labels
+        self._values: dict[LabelValues, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labels: str, amount: float = 1.0) -> None:
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0.0) + amount
+
+    def value(self, *labels: str) -> float:
+        with self._lock:
+            return self._values.get(labels, 0.0)
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            items = sorted(self._values.items())
+        if not items and not self.label_names:
+            items = [((), 0.0)]
+        for lv, v in items:
+            yield f"{self.name}{_labels(self.label_names, lv)} {_num(v)}"
+
+
+class Histogram:
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: tuple[str, ...] = (),
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+    ) -> None:
+        self.name, self.help, self.label_names, self.buckets = name, help, labels, buckets
+        # labels -> [bucket ごとの件数..., 合計, 件数]
+        self._values: dict[LabelValues, list[float]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *labels: str) -> None:
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            v = self._values.get(labels)
+            if v is None:
+                v = self._values[labels] = [0.0] * (len(self.buckets) + 2)
+            if i < len(self.buckets):
+                v[i] += 1
+            v[-2] += value
+            v[-1] += 1
+
+    def count(self, *labels: str) -> int:
+        with self._lock:
+            v = self._values.get(labels)
+            return int(v[-1]) if v else 0
+
+    def render(self) -> Iterable[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        if not items and not self.label_names:
+            items = [((), [0.0] * (len(self.buckets) + 2))]
+        for lv, v in items:
+            cum = 0.0
+            for b, n in zip(self.buckets, v):
+                cum += n
+                le = 'le="' + _num(b) + '"'
+                yield f"{self.name}_bucket{_labels(self.label_names, lv, le)} {_num(cum)}"
+            inf = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.label_names, lv, inf)} {_num(v[-1])}"
+            yield f"{self.name}_sum{_labels(self.label_names, lv)} {_num(v[-2])}"
+            yield f"{self.name}_count{_labels(self.label_names, lv)} {_num(v[-1])}"
+
+
+def render_gauge(name: str, help: str, label: str, values: dict[str, float]) -> Iterable[str]:
+    """収集時に計算する gauge（DBサイズ・行数など）"""
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} gauge"
+    for k, v in values.items():
+        yield f'{name}{{{label}="{_escape(k)}"}} {_num(v)}'
+
+
+# ============================================================
+# メトリクス定義
+# ============================================================
+
+HTTP_REQUESTS = Counter(
+    "tool_asset_http_requests_total",
+    "HTTP requests by blueprint and status.",
+    ("blueprint", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "tool_asset_http_request_duration_seconds",
+    "Request latency by endpoint.",
+    ("endpoint",),
+)
+TX_WAIT = Histogram(
+    "tool_asset_db_tx_wait_seconds",
+    "Time waiting for BEGIN IMMEDIATE (write lock) in transaction().",
+)
+TX_HOLD = Histogram(
+    "tool_asset_db_tx_hold_seconds",
+    "Time the write lock was held (BEGIN IMMEDIATE to commit/rollback).",
+)
+DB_BUSY_RETRIES = Counter(
+    "tool_asset_db_busy_retries_total",
+    "BEGIN IMMEDIATE retried after SQLITE_BUSY (busy_timeout exceeded).",
+)
+DB_BUSY_ERRORS = Counter(
+    "tool_asset_db_busy_errors_total",
+    "Write transactions that gave up after SQLITE_BUSY retries.",
+)
+
+REGISTRY: tuple[Counter | Histogram, ...] = (
+    HTTP_REQUESTS,
+    HTTP_LATENCY,
+    TX_WAIT,
+    TX_HOLD,
+    DB_BUSY_RETRIES,
+    DB_BUSY_ERRORS,
+)
+
+
+def render_registry() -> Iterable[str]:
+    for m in REGISTRY:
+        yield from m.render()
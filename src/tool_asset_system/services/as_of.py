@@ -0,0 +1,135 @@
+# src/tool_asset_system/services/as_of.py
+"""
+ある時点（as of）の parts / assemblies / tooling_lists を operation_logs から復元する。
+
+- 「その時点までの最後のログ」を (target_type, target_code, created_at, id) のインデックスで1件引き、
+  log_payload.rebuild で最寄りの FULL（チェックポイント）＋その後の差分だけを当てる
+  （全履歴を頭から再生しない。読むのは最大 CHECKPOINT_EVERY 版ぶん）
+- 本体に無いほど古い時点は、アーカイブ（log_history）から探す
+- assembly の items の part、tooling_list の items の assembly も同じ時点で復元して付ける
+- ログに状態が残っていない対象（ログ導入前に作ったもの / 一括投入したもの）は None
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, datetime, timedelta
+from typing import Any
+
+from tool_asset_system.db.db import connect
+from tool_asset_system.services.assemblies import layer_rank
+from tool_asset_system.services.log_archive import log_history
+from tool_asset_system.services.log_payload import rebuild
+
+TARGET_TYPES = ("PART", "ASSEMBLY", "TOOLING_LIST")
+
+
+def _bound(at: str | date | datetime) -> str:
+    """
+    created_at と文字列比較する「この値より前」の境界。
+    日付だけなら、その日の終わりまでを含む（2025-03-31 -> '2025-04-01'）
+    """
+    if isinstance(at, datetime):
+        return (at.replace(microsecond=0) + timedelta(seconds=1)).strftime("%Y-%m-%d %H:%M:%S")
+    if isinstance(at, date):
+        return (at + timedelta(days=1)).isoformat()
+    s = at.strip().replace("T", " ")
+    try:
+        if len(s) == 10:
+            return _bound(date.fromisoformat(s))
+        return _bound(datetime.fromisoformat(s))
+    except ValueError:
+        raise ValueError(f"as_of must be YYYY-MM-DD or YYYY-MM-DD HH:MM[:SS]: {at}") from None
+
+
+def _log_id_as_of(target_type: str, target_code: str, bound: str) -> int | None:
+    with connect() as con:
+        row = con.execute(
+            """
+            SELECT id
+            FROM operation_logs
+            WHERE target_type = ? AND target_code = ? AND created_at < ?
+            ORDER BY created_at DESC, id DESC
+            LIMIT 1
+            """,
+            (target_type, target_code, bound),
+        ).fetchone()
+    if row is not None:
+        return int(row["id"])
+    # 本体に無い：アーカイブ側にあるかもしれない
+    older = [
+        r for r in log_history(target_type, target_code, limit=None, columns=("id", "created_at"))
+        if r["created_at"] < bound
+    ]
+    if not older:
+        return None
+    return max(older, key=lambda r: (r["created_at"], r["id"]))["id"]
+
+
+def state_as_of(target_type: str, target_code: str, at: str | date | datetime) -> dict[str, Any] | None:
+    """対象の、at 時点の状態（ログ1件ぶんの state そのまま）。無ければ None"""
+    if target_type not in TARGET_TYPES:
+        raise ValueError(f"target_type must be one of {', '.join(TARGET_TYPES)}: {target_type}")
+    log_id = _log_id_as_of(target_type, target_code, _bound(at))
+    if log_id is None:
+        return None
+    return rebuild(target_type, target_code, log_id)
+
+
+def part_as_of(asset_code: str, at: str | date | datetime) -> dict[str, Any] | None:
+    return state_as_of("PART", asset_code, at)
+
+
+def _tool_no_key(tool_no: str) -> tuple[int, str]:
+    # list_tooling_list_items の ORDER BY CAST(tool_no AS INTEGER), tool_no と同じ並び
+    m = re.match(r"\s*[+-]?\d+", tool_no or "")
+    return (int(m.group()) if m else 0, tool_no or "")
+
+
+def assembly_as_of(
+    assembly_code: str, at: str | date | datetime, *, with_parts: bool = True
+) -> dict[str, Any] | None:
+    """
+    返り値：{"as_of", "assembly": {...}, "items": [{"item_id", "part_asset_code", "qty", "role", "note", "part"}...]}
+    part は同じ時点の parts の状態（with_parts=False なら付けない）
+    """
+    state = state_as_of("ASSEMBLY", assembly_code, at)
+    if state is None:
+        return None
+    items_state = state.pop("items", None) or {}
+    items = []
+    for item_id, it in items_state.items():
+        item = {"item_id": int(item_id), **it}
+        if with_parts:
+            item["part"] = part_as_of(it["part_asset_code"], at)
+        items.append(item)
+
+    def order(it: dict[str, Any]) -> tuple[int, str, int]:
+        layer = (it.get("part") or {}).get("layer_code")
+        return (layer_rank(layer), it["part_asset_code"], it["item_id"])
+
+    items.sort(key=order)
+    return {"as_of": str(at), "assembly": state, "items": items}
+
+
+def tooling_list_as_of(
+    list_code: str, at: str | date | datetime, *, with_assemblies: bool = True
+) -> dict[str, Any] | None:
+    """
+    返り値：{"as_of", "tooling_list": {...}, "items": [{"item_id", "assembly_code", "tool_no", "qty", "note", "assembly"}...]}
+    assembly は同じ時点の assemblies の行（items は含めない。要るなら assembly_as_of で引く）
+    """
+    state = state_as_of("TOOLING_LIST", list_code, at)
+    if state is None:
+        return None
+    items_state = state.pop("items", None) or {}
+    items = []
+    for item_id, it in items_state.items():
+        item = {"item_id": int(item_id), **it}
+        if with_assemblies:
+            asm = state_as_of("ASSEMBLY", it["assembly_code"], at)
+            if asm is not None:
+                asm.pop("items", None)
+            item["assembly"] = asm
+        items.append(item)
+    items.sort(key=lambda it: (*_tool_no_key(it["tool_no"]), it["assembly_code"], it["item_id"]))
+    return {"as_of": str(at), "tooling_list": state, "items": items}
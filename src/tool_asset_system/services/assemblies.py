@@ -1,12 +1,16 @@
 # src/tool_asset_system/services/assemblies.py
 from __future__ import annotations
 
+import json
 import os
 import sqlite3
 from typing import Any
 
-from tool_asset_system.db.db import connect
+from tool_asset_system.db.db import connect, transaction
 from tool_asset_system.services.idgen import issue_asset_code
+from tool_asset_system.services.log_payload import append_log
+from tool_asset_system.services.paging import SortKey, fetch_page, select_columns
+from tool_asset_system.services.search import search_clause
 
 
 def _actor() -> str:
@@ -31,7 +35,8 @@ LAYER_ORDER = [
 ]
 
 
-def _layer_rank(layer_code: str | None) -> int:
+def layer_rank(layer_code: str | None) -> int:
+    """LAYER_ORDER での位置（Python 側で並べるとき用。as of の items など）"""
     if not layer_code:
         return 999
     try:
@@ -40,19 +45,119 @@ def _layer_rank(layer_code: str | None) -> int:
         return 998
 
 
+def layer_case_sql(col: str = "p.layer_code") -> str:
+    """layer_rank と同じ並びの SQL 式（ORDER BY 用。rollup などほかの一覧もこれを使う）"""
+    case_parts = " ".join([f"WHEN '{lc}' THEN {i}" for i, lc in enumerate(LAYER_ORDER)])
+    return f"(CASE {col} {case_parts} ELSE 998 END)"
+
+
 def make_signature_from_items(items: list[dict[str, Any]]) -> str:
-    def layer_rank(it: dict[str, Any]) -> int:
+    def item_rank(it: dict[str, Any]) -> int:
         lc = (it.get("layer_code") or "").strip()
-        return _layer_rank(lc)
+        return layer_rank(lc)
 
     ordered = sorted(
         items,
-        key=lambda it: (layer_rank(it), str(it.get("asset_code", "")))
+        key=lambda it: (item_rank(it), str(it.get("asset_code", "")))
     )
     codes = [str(it.get("asset_code")) for it in ordered if it.get("asset_code")]
     return "_".join(codes)
 
 
+def refresh_assembly_signatures(con: sqlite3.Connection, assembly_ids: list[int]) -> None:
+    """
+    assemblies.signature を items から作り直す（items を変えた同じトランザクション内で呼ぶ）。
+    items が無ければ NULL。
+    """
+    if not assembly_ids:
+        return
+
+    rows = con.execute(
+        """
+        SELECT ai.assembly_id, p.asset_code, p.layer_code
+        FROM assembly_items ai
+        JOIN parts p ON p.id = ai.part_id
+        WHERE ai.assembly_id IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(assembly_ids),),
+    ).fetchall()
+
+    items_by_asm: dict[int, list[dict[str, Any]]] = {int(i): [] for i in assembly_ids}
+    for r in rows:
+        items_by_asm[int(r["assembly_id"])].append({"asset_code": r["asset_code"], "layer_code": r["layer_code"]})
+
+    con.executemany(
+        "UPDATE assemblies SET signature = ? WHERE id = ?",
+        [(make_signature_from_items(items) or None, asm_id) for asm_id, items in items_by_asm.items()],
+    )
+
+
+def find_assembly_by_parts(asset_codes: list[str]) -> list[dict[str, Any]]:
+    """
+    指定の parts（asset_code の並び順は問わない）とちょうど同じ構成の assembly を返す。
+    signature のインデックスで引くので assembly の数に依存しない。該当なしは []。
+    """
+    codes = [c.strip() for c in asset_codes if c and c.strip()]
+    if not codes:
+        return []
+
+    with connect() as con:
+        rows = con.execute(
+            """
+            SELECT asset_code, layer_code
+            FROM parts
+            WHERE asset_code IN (SELECT value FROM json_each(?))
+            """,
+            (json.dumps(codes),),
+        ).fetchall()
+        layer_by_code = {r["asset_code"]: r["layer_code"] for r in rows}
+        if any(c not in layer_by_code for c in codes):
+            return []  # 存在しない part を含む構成の assembly は無い
+
+        sig = make_signature_from_items([{"asset_code": c, "layer_code": layer_by_code[c]} for c in codes])
+        found = con.execute(
+            "SELECT * FROM assemblies WHERE signature = ? ORDER BY assembly_code",
+            (sig,),
+        ).fetchall()
+        return [{k: r[k] for k in r.keys()} for r in found]
+
+
+# ============================================================
+# operation_logs（版として残す状態）
+# ============================================================
+
+def assembly_state(con: sqlite3.Connection, assembly_code: str) -> dict[str, Any]:
+    """assemblies の行 + items（item id -> 中身）。as-of で復元する形"""
+    row = con.execute("SELECT * FROM assemblies WHERE assembly_code = ?", (assembly_code,)).fetchone()
+    if row is None:
+        raise ValueError(f"assembly not found: {assembly_code}")
+    state: dict[str, Any] = _row_to_dict(row)  # type: ignore[assignment]
+    state["items"] = {
+        str(r["id"]): {"part_asset_code": r["asset_code"], "qty": r["qty"], "role": r["role"], "note": r["note"]}
+        for r in con.execute(
+            """
+            SELECT ai.id, p.asset_code, ai.qty, ai.role, ai.note
+            FROM assembly_items ai
+            JOIN parts p ON p.id = ai.part_id
+            WHERE ai.assembly_id = ?
+            ORDER BY ai.id
+            """,
+            (row["id"],),
+        )
+    }
+    return state
+
+
+def _log(con: sqlite3.Connection, action: str, assembly_code: str, actor: str, patch: dict[str, Any]) -> None:
+    append_log(
+        con,
+        action=action, target_type="ASSEMBLY", target_code=assembly_code,
+        actor=actor,
+        patch=patch,
+        state=assembly_state(con, assembly_code),
+    )
+
+
 # ============================================================
 # Assemblies: basic CRUD
 # ============================================================
@@ -71,9 +176,7 @@ def add_assembly(
     if dn == "":
         dn = "NEW_ASSEMBLY"
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
-
+    with transaction() as con:
         assembly_code = issue_asset_code(con, layer_code="ASM")
 
         con.execute(
@@ -88,11 +191,19 @@ def add_assembly(
             """,
             (assembly_code, dn, tool_overall_length, tool_diameter, note),
         )
-
-        con.commit()
+        _log(con, "ASM_ADD", assembly_code, actor, {
+            "display_name": dn, "tool_overall_length": tool_overall_length, "tool_diameter": tool_diameter,
+        })
         return assembly_code
 
 
+# API の fields= で指定できる列
+ASSEMBLY_FIELDS = (
+    "assembly_code", "display_name", "tool_overall_length", "tool_diameter",
+    "signature", "note", "created_at", "updated_at",
+)
+
+
 def get_assembly(assembly_code: str) -> dict[str, Any]:
     with connect() as con:
         row = con.execute(
@@ -104,25 +215,115 @@ def get_assembly(assembly_code: str) -> dict[str, Any]:
         return _row_to_dict(row)  # type: ignore[return-value]
 
 
-def list_assemblies(
+def list_assemblies_page(
     *,
     q: str | None = None,
-    limit: int = 200,
-) -> list[dict[str, Any]]:
-    sql = "SELECT * FROM assemblies WHERE 1=1"
+    limit: int | None = None,
+    after: str | None = None,
+    before: str | None = None,
+    fields: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    キーセットページング版の一覧。fields を渡すとその列だけ SELECT する（ASSEMBLY_FIELDS 内）。
+    返り値: {"rows": [...], "next_cursor": ..., "prev_cursor": ...}
+    """
+    select = select_columns("a", fields, ASSEMBLY_FIELDS)
+    search = search_clause(
+        q,
+        fts_table="assemblies_fts",
+        row_id="a.id",
+        like_columns=["a.assembly_code", "a.display_name", "a.note"],
+    )
+
+    from_where = "FROM assemblies a"
     params: list[Any] = []
 
-    if q and q.strip():
-        kw = f"%{q.strip()}%"
-        sql += " AND (assembly_code LIKE ? OR display_name LIKE ? OR note LIKE ?)"
-        params.extend([kw, kw, kw])
+    if search:
+        from_where += search.join
+    from_where += " WHERE 1=1"
+    if search:
+        from_where += search.where
+        params.extend(search.params)
+
+    keys = [SortKey("a.assembly_code")]
+    if search and search.rank:
+        keys.insert(0, SortKey(search.rank))
 
-    sql += " ORDER BY assembly_code LIMIT ?"
-    params.append(int(limit))
+    with connect() as con:
+        return fetch_page(
+            con,
+            select=select,
+            from_where=from_where,
+            params=params,
+            keys=keys,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+
+
+def get_assemblies_bulk(
+    assembly_codes: list[str],
+    *,
+    fields: list[str] | None = None,
+    with_items: bool = False,
+) -> dict[str, Any]:
+    """
+    assembly_code をまとめて引く。assemblies 1クエリ + （with_items なら）構成部品 1クエリ。
+    返り値: {"rows": [...（指定順）], "missing": [...]}
+    """
+    codes = list(dict.fromkeys(c.strip() for c in assembly_codes if c and c.strip()))
+    if fields:
+        fields = ["assembly_code"] + [f for f in fields if f != "assembly_code"]
+    select = select_columns("a", fields, ASSEMBLY_FIELDS)
+    if not codes:
+        return {"rows": [], "missing": []}
 
     with connect() as con:
-        rows = con.execute(sql, params).fetchall()
-        return [_row_to_dict(r) for r in rows]  # type: ignore[misc]
+        rows = con.execute(
+            f"""
+            SELECT a.id AS _id, {select}
+            FROM json_each(?) j
+            JOIN assemblies a ON a.assembly_code = j.value
+            ORDER BY j.key
+            """,
+            (json.dumps(codes),),
+        ).fetchall()
+
+        items_by_id: dict[int, list[dict[str, Any]]] = {}
+        if with_items and rows:
+            item_rows = con.execute(
+                f"""
+                SELECT ai.assembly_id, ai.qty, ai.role, ai.note AS item_note,
+                       p.asset_code, p.layer_code, p.display_name
+                FROM assembly_items ai
+                JOIN parts p ON p.id = ai.part_id
+                WHERE ai.assembly_id IN (SELECT value FROM json_each(?))
+                ORDER BY ai.assembly_id, {layer_case_sql()}, p.asset_code, ai.id
+                """,
+                (json.dumps([r["_id"] for r in rows]),),
+            ).fetchall()
+            for r in item_rows:
+                d = {k: r[k] for k in r.keys() if k != "assembly_id"}
+                items_by_id.setdefault(r["assembly_id"], []).append(d)
+
+    found: list[dict[str, Any]] = []
+    for r in rows:
+        d = {k: r[k] for k in r.keys() if k != "_id"}
+        if with_items:
+            d["items"] = items_by_id.get(r["_id"], [])
+        found.append(d)
+
+    hit = {d["assembly_code"] for d in found}
+    return {"rows": found, "missing": [c for c in codes if c not in hit]}
+
+
+def list_assemblies(
+    *,
+    q: str | None = None,
+    limit: int = 200,
+) -> list[dict[str, Any]]:
+    return list_assemblies_page(q=q, limit=limit)["rows"]
 
 
 def update_assembly(
@@ -152,9 +353,7 @@ def update_assembly(
     if not fields:
         return
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
-
+    with transaction() as con:
         cur = con.execute(
             "SELECT 1 FROM assemblies WHERE assembly_code=?",
             (assembly_code,),
@@ -171,8 +370,7 @@ def update_assembly(
         )
         if cur2.rowcount != 1:
             raise ValueError(f"assembly not found: {assembly_code}")
-
-        con.commit()
+        _log(con, "ASM_UPDATE", assembly_code, actor, dict(fields))
 
 
 # ============================================================
@@ -212,9 +410,7 @@ def add_assembly_item(
     if qty <= 0:
         raise ValueError("qty must be > 0")
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
-
+    with transaction() as con:
         assembly_id = _get_assembly_id(con, assembly_code)
         part_id = _get_part_id_by_asset_code(con, part_asset_code)
 
@@ -232,7 +428,10 @@ def add_assembly_item(
         )
 
         item_id = int(con.execute("SELECT last_insert_rowid() AS id").fetchone()["id"])
-        con.commit()
+        refresh_assembly_signatures(con, [assembly_id])
+        _log(con, "ASM_ITEM_ADD", assembly_code, actor, {
+            "item_id": item_id, "part_asset_code": part_asset_code, "qty": float(qty), "role": role, "note": note,
+        })
         return item_id
 
 
@@ -266,8 +465,7 @@ def update_assembly_item(
     if not fields:
         return
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
+    with transaction() as con:
         assembly_id = _get_assembly_id(con, assembly_code)
 
         # 対象行がこのassemblyに属していることを保証
@@ -285,8 +483,7 @@ def update_assembly_item(
             f"UPDATE assembly_items SET {set_sql} WHERE id=? AND assembly_id=?",
             params,
         )
-
-        con.commit()
+        _log(con, "ASM_ITEM_UPDATE", assembly_code, actor, {"item_id": int(item_id), **dict(fields)})
 
 
 def remove_assembly_item(
@@ -297,8 +494,7 @@ def remove_assembly_item(
 ) -> None:
     actor = actor or _actor()
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
+    with transaction() as con:
         assembly_id = _get_assembly_id(con, assembly_code)
 
         cur = con.execute(
@@ -308,7 +504,8 @@ def remove_assembly_item(
         if cur.rowcount != 1:
             raise ValueError(f"assembly item not found: id={item_id} in {assembly_code}")
 
-        con.commit()
+        refresh_assembly_signatures(con, [assembly_id])
+        _log(con, "ASM_ITEM_REMOVE", assembly_code, actor, {"item_id": int(item_id)})
 
 
 def list_assembly_items(
@@ -317,8 +514,7 @@ def list_assembly_items(
     limit: int = 500,
 ) -> list[dict[str, Any]]:
     # ORDER BY を “固定順（分岐A）” に揃える：layer_code → asset_code → ai.id
-    case_parts = " ".join([f"WHEN '{lc}' THEN {i}" for i, lc in enumerate(LAYER_ORDER)])
-    layer_case_sql = f"(CASE p.layer_code {case_parts} ELSE 998 END)"
+    layer_order_sql = layer_case_sql()
 
     with connect() as con:
         assembly_id = _get_assembly_id(con, assembly_code)
@@ -346,7 +542,7 @@ def list_assembly_items(
             JOIN parts p ON p.id = ai.part_id
             WHERE ai.assembly_id = ?
             ORDER BY
-              {layer_case_sql} ASC,
+              {layer_order_sql} ASC,
               p.asset_code ASC,
               ai.id ASC
             LIMIT ?
@@ -355,3 +551,100 @@ def list_assembly_items(
         ).fetchall()
 
         return [{k: r[k] for k in r.keys()} for r in rows]
+
+
+# ============================================================
+# Assemblies: create with items (atomic)
+# ============================================================
+
+def _resolve_parts(con: sqlite3.Connection, asset_codes: list[str]) -> dict[str, sqlite3.Row]:
+    """asset_code -> parts 行（id, asset_code, layer_code）を1クエリで引く。無いものがあれば ValueError"""
+    rows = con.execute(
+        """
+        SELECT id, asset_code, layer_code
+        FROM parts
+        WHERE asset_code IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(asset_codes),),
+    ).fetchall()
+    found = {r["asset_code"]: r for r in rows}
+
+    missing = [ac for ac in asset_codes if ac not in found]
+    if missing:
+        raise ValueError(f"part not found: {', '.join(dict.fromkeys(missing))}")
+    return found
+
+
+def create_assembly_with_items(
+    *,
+    items: list[dict[str, Any]],
+    display_name: str | None = None,
+    tool_overall_length: float | None = None,
+    tool_diameter: float | None = None,
+    note: str | None = None,
+    actor: str | None = None,
+) -> str:
+    """
+    assembly と items を1トランザクションで作る（途中で失敗したら何も残らない）。
+
+    items: [{"part_asset_code": ..., "qty": 1.0, "role": None, "note": None}, ...]
+    display_name 未指定なら signature（make_signature_from_items）を名前にする。
+    """
+    actor = actor or _actor()
+
+    if not items:
+        raise ValueError("items is empty")
+
+    normalized: list[tuple[str, float, str | None, str | None]] = []
+    for it in items:
+        ac = (it.get("part_asset_code") or "").strip()
+        if ac == "":
+            raise ValueError("part_asset_code is required")
+        qty = float(it.get("qty") if it.get("qty") is not None else 1.0)
+        if qty <= 0:
+            raise ValueError(f"qty must be > 0: {ac}")
+        normalized.append((ac, qty, it.get("role"), it.get("note")))
+
+    with transaction() as con:
+        parts = _resolve_parts(con, [ac for ac, _, _, _ in normalized])
+
+        signature = make_signature_from_items(
+            [{"asset_code": ac, "layer_code": parts[ac]["layer_code"]} for ac, _, _, _ in normalized]
+        )
+        dn = (display_name or "").strip()
+        if dn == "":
+            dn = signature or "NEW_ASSEMBLY"
+
+        assembly_code = issue_asset_code(con, layer_code="ASM")
+        assembly_id = con.execute(
+            """
+            INSERT INTO assemblies(
+              assembly_code,
+              display_name,
+              tool_overall_length,
+              tool_diameter,
+              note,
+              signature
+            ) VALUES(?,?,?,?,?,?)
+            RETURNING id
+            """,
+            (assembly_code, dn, tool_overall_length, tool_diameter, note, signature or None),
+        ).fetchone()["id"]
+
+        con.executemany(
+            """
+            INSERT INTO assembly_items(
+              assembly_id,
+              part_id,
+              qty,
+              role,
+              note
+            ) VALUES(?,?,?,?,?)
+            """,
+            [(assembly_id, parts[ac]["id"], qty, role, n) for ac, qty, role, n in normalized],
+        )
+        _log(con, "ASM_ADD", assembly_code, actor, {
+            "display_name": dn, "tool_overall_length": tool_overall_length, "tool_diameter": tool_diameter,
+            "items": len(normalized),
+        })
+        return assembly_code
@@ -0,0 +1,136 @@
+# src/tool_asset_system/services/audit.py
+"""
+監査ログ（operation_logs）の検索。
+
+- 絞り込み：対象（target_type / target_code）・actor・action・日付範囲（created_at）
+- 並びは新しい順 (created_at DESC, id DESC) のキーセットページング
+- 0019 のインデックスは「絞り込み列 → created_at → 一覧の列」なので、
+  一覧は表を引かずにインデックスだけで返る（payload などの大きい列は詳細でだけ読む）
+- 対象はこの DB の operation_logs だけ（アーカイブ済みの分は log_history / versions で見る）
+"""
+from __future__ import annotations
+
+from datetime import date, timedelta
+from typing import Any
+
+from tool_asset_system.db.db import connect
+from tool_asset_system.services.log_payload import rebuild
+from tool_asset_system.services.paging import SortKey, fetch_page
+
+# 一覧に出す列（0019 のインデックスに全部入っている）
+AUDIT_COLUMNS = ("id", "created_at", "action", "target_type", "target_code", "actor")
+
+_KEYS = [SortKey("l.created_at", desc=True), SortKey("l.id", desc=True)]
+
+
+def _parse_date(value: str | date | None, name: str) -> date | None:
+    if value is None or isinstance(value, date):
+        return value
+    value = value.strip()
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be YYYY-MM-DD: {value}") from None
+
+
+def _distinct(con, column: str) -> list[str]:
+    """インデックス先頭列の値一覧（MIN を飛び石で引く。行数ではなく値の種類数に比例）"""
+    rows = con.execute(
+        f"""
+        WITH RECURSIVE v(x) AS (
+          SELECT MIN({column}) FROM operation_logs
+          UNION ALL
+          SELECT (SELECT MIN({column}) FROM operation_logs WHERE {column} > v.x) FROM v WHERE v.x IS NOT NULL
+        )
+        SELECT x FROM v WHERE x IS NOT NULL
+        """
+    ).fetchall()
+    return [r[0] for r in rows]
+
+
+def audit_filter_options() -> dict[str, list[str]]:
+    """画面の選択肢（action / target_type）"""
+    with connect() as con:
+        return {"actions": _distinct(con, "action"), "target_types": _distinct(con, "target_type")}
+
+
+def list_audit_logs_page(
+    *,
+    target_type: str | None = None,
+    target_code: str | None = None,
+    actor: str | None = None,
+    action: str | None = None,
+    date_from: str | date | None = None,
+    date_to: str | date | None = None,
+    limit: int | None = None,
+    after: str | None = None,
+    before: str | None = None,
+) -> dict[str, Any]:
+    """
+    date_from / date_to は両端を含む日付（YYYY-MM-DD）。
+    返り値は fetch_page と同じ {"rows", "next_cursor", "prev_cursor"}
+    """
+    d_from = _parse_date(date_from, "date_from")
+    d_to = _parse_date(date_to, "date_to")
+
+    where = ["1=1"]
+    params: list[Any] = []
+    with connect() as con:
+        if target_type:
+            where.append("l.target_type = ?")
+            params.append(target_type)
+        elif target_code:
+            # target_code だけのときも (target_type, target_code) のインデックスを使えるよう、種類を列挙する
+            types = _distinct(con, "target_type")
+            where.append(f"l.target_type IN ({', '.join('?' for _ in types) or 'NULL'})")
+            params.extend(types)
+        if target_code:
+            where.append("l.target_code = ?")
+            params.append(target_code)
+        if actor:
+            where.append("l.actor = ?")
+            params.append(actor)
+        if action:
+            where.append("l.action = ?")
+            params.append(action)
+        if d_from is not None:
+            where.append("l.created_at >= ?")
+            params.append(d_from.isoformat())
+        if d_to is not None:
+            where.append("l.created_at < ?")
+            params.append((d_to + timedelta(days=1)).isoformat())
+
+        return fetch_page(
+            con,
+            select=", ".join(f"l.{c}" for c in AUDIT_COLUMNS),
+            from_where=f"FROM operation_logs l WHERE {' AND '.join(where)}",
+            params=params,
+            keys=_KEYS,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+
+
+def get_audit_log(log_id: int) -> dict[str, Any] | None:
+    """1件の詳細。before / after は payload から復元した、その時点の対象の状態"""
+    with connect() as con:
+        row = con.execute(
+            """
+            SELECT id, created_at, action, target_type, target_code, actor, reason, patch_json, payload_kind
+            FROM operation_logs
+            WHERE id = ?
+            """,
+            (log_id,),
+        ).fetchone()
+    if row is None:
+        return None
+    out = dict(row)
+    if row["payload_kind"] is not None:
+        out["after"] = rebuild(row["target_type"], row["target_code"], log_id)
+        out["before"] = rebuild(row["target_type"], row["target_code"], log_id - 1)
+    else:
+        out["after"] = out["before"] = None
+    return out
@@ -0,0 +1,187 @@
+# src/tool_asset_system/services/changes.py
+"""
+変更フィード（change_log / 0020）の読み出し。下流の差分同期用。
+
+- カーソルは change_log.seq（整数・単調増加）。since より後の変更を seq 順に limit 件ずつ返す
+- 1回分の中で同じ行が何度も変わっていたら最後の1件にまとめ、今の行を付けて返す
+  （op は "upsert" / "delete"。下流は id（items は id、親は code でも可）で上書き / 削除すればよい）
+- next_cursor を次の since に渡す。has_more=False なら今の末尾まで読み切っている
+- 古い行は prune_changes で消す。消した範囲より前の since は CursorExpiredError（全件取り直し）
+- wait_for_changes は long-poll 用：since より新しい変更が来るまで短い間隔で seq の末尾を見る
+  （待っている間は接続を持たない）
+"""
+from __future__ import annotations
+
+import json
+import time
+from datetime import date
+from typing import Any
+
+from tool_asset_system.db.db import connect, get_pool, transaction
+
+TABLES = ("parts", "assemblies", "assembly_items", "tooling_lists", "tooling_list_items")
+
+DEFAULT_LIMIT = 500
+MAX_LIMIT = 5000
+MAX_WAIT = 30.0
+POLL_INTERVAL = 0.2
+
+# 付ける「今の行」。items は親 / 相手の code も付ける（下流は内部 id を知らなくてよい）
+_ROW_SQL = {
+    "parts": "SELECT x.* FROM parts x",
+    "assemblies": "SELECT x.* FROM assemblies x",
+    "assembly_items": """
+        SELECT x.*, a.assembly_code, p.asset_code AS part_asset_code
+        FROM assembly_items x
+        JOIN assemblies a ON a.id = x.assembly_id
+        JOIN parts p ON p.id = x.part_id
+    """,
+    "tooling_lists": "SELECT x.* FROM tooling_lists x",
+    "tooling_list_items": """
+        SELECT x.*, tl.list_code, a.assembly_code
+        FROM tooling_list_items x
+        JOIN tooling_lists tl ON tl.id = x.tooling_list_id
+        JOIN assemblies a ON a.id = x.assembly_id
+    """,
+}
+
+
+class CursorExpiredError(ValueError):
+    """since が prune 済みの範囲にある（差分では追いつけない）"""
+
+
+def _int_arg(value: int | str | None, name: str, default: int) -> int:
+    if value is None or value == "":
+        return default
+    try:
+        n = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} must be an integer: {value}") from None
+    if n < 0:
+        raise ValueError(f"{name} must be >= 0: {value}")
+    return n
+
+
+def _head(con) -> int:
+    """今までに振った seq の最大（行を消していても戻らない）"""
+    row = con.execute("SELECT seq FROM sqlite_sequence WHERE name = 'change_log'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def head_cursor() -> int:
+    """今の末尾。全件エクスポートの直前にこれを控えておけば、以降は差分だけで追える"""
+    with connect() as con:
+        return _head(con)
+
+
+def _rows(con, table: str, ids: list[int]) -> dict[int, dict[str, Any]]:
+    rows = con.execute(
+        f"{_ROW_SQL[table]} WHERE x.id IN (SELECT value FROM json_each(?))",
+        (json.dumps(ids),),
+    ).fetchall()
+    return {int(r["id"]): dict(r) for r in rows}
+
+
+def changes_since(
+    since: int | str | None = 0,
+    *,
+    limit: int | str | None = None,
+    tables: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    返り値：{"changes": [{"seq", "table", "op", "id", "code", "changed_at", "row"}...],
+             "next_cursor", "head", "has_more"}
+    tables を指定するとそのテーブルの変更だけ返す（カーソルは全体で共通）
+    """
+    since_n = _int_arg(since, "since", 0)
+    limit_n = min(_int_arg(limit, "limit", DEFAULT_LIMIT) or DEFAULT_LIMIT, MAX_LIMIT)
+    if tables:
+        unknown = [t for t in tables if t not in TABLES]
+        if unknown:
+            raise ValueError(f"unknown table: {', '.join(unknown)}")
+
+    where = ["seq > ?"]
+    params: list[Any] = [since_n]
+    if tables:
+        where.append("table_name IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(list(tables)))
+
+    # change_log と各テーブルは同じスナップショットで読む
+    with connect() as con:
+        head = _head(con)
+        if since_n > head:
+            raise ValueError(f"since is ahead of this database: {since_n} > {head}")
+        oldest = con.execute("SELECT MIN(seq) FROM change_log").fetchone()[0]
+        if since_n < (oldest if oldest is not None else head + 1) - 1:
+            raise CursorExpiredError(f"since={since_n} is older than the retained change log; resync from a full export")
+
+        log = con.execute(
+            f"""
+            SELECT seq, table_name, row_id, op, code, changed_at
+            FROM change_log
+            WHERE {' AND '.join(where)}
+            ORDER BY seq
+            LIMIT ?
+            """,
+            (*params, limit_n),
+        ).fetchall()
+
+        # 同じ行は最後の変更だけ残す（並びはその最後の seq 順）
+        last: dict[tuple[str, int], Any] = {}
+        for r in log:
+            key = (r["table_name"], int(r["row_id"]))
+            last.pop(key, None)
+            last[key] = r
+
+        ids: dict[str, list[int]] = {}
+        for table, row_id in last:
+            ids.setdefault(table, []).append(row_id)
+        current = {table: _rows(con, table, row_ids) for table, row_ids in ids.items()}
+
+    changes = []
+    for (table, row_id), r in last.items():
+        row = current[table].get(row_id)
+        changes.append({
+            "seq": int(r["seq"]),
+            "table": table,
+            # 読んだ時点で行が無ければ、後で消えている（その D はこの後のバッチでも来る）
+            "op": "upsert" if row is not None else "delete",
+            "id": row_id,
+            "code": r["code"],
+            "changed_at": r["changed_at"],
+            "row": row,
+        })
+
+    has_more = len(log) == limit_n
+    # 読み切ったときは末尾まで進める（tables で絞っていて該当が無い範囲も飛ばす）
+    next_cursor = int(log[-1]["seq"]) if has_more else head
+    return {"changes": changes, "next_cursor": next_cursor, "head": head, "has_more": has_more}
+
+
+def wait_for_changes(since: int | str | None, timeout: float) -> bool:
+    """
+    since より新しい変更があるか、timeout 秒たつまで待つ。変更があれば True。
+    UnitOfWork を通さず、見るたびにプールから借りて返す（待っている間スナップショットも接続も持たない）
+    """
+    since_n = _int_arg(since, "since", 0)
+    deadline = time.monotonic() + max(0.0, min(float(timeout), MAX_WAIT))
+    while True:
+        with get_pool().acquire() as con:
+            if _head(con) > since_n:
+                return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        time.sleep(min(POLL_INTERVAL, remaining))
+
+
+def prune_changes(before: str | date) -> int:
+    """changed_at < before（YYYY-MM-DD）の行を消す。消した件数"""
+    if isinstance(before, date):
+        before = before.isoformat()
+    try:
+        date.fromisoformat(before)
+    except ValueError:
+        raise ValueError(f"before must be YYYY-MM-DD: {before}") from None
+    with transaction() as con:
+        return con.execute("DELETE FROM change_log WHERE changed_at < ?", (before,)).rowcount
@@ -0,0 +1,129 @@
+# src/tool_asset_system/services/dictionaries.py
+"""
+辞書テーブル（layers / categories / statuses）のプロセス内キャッシュ。
+
+- 辞書はほぼ変わらないが、全リクエストで読まれる
+- 無効化は change_counters('dict') で判定する（辞書テーブルへの書き込みでトリガーが +1）
+  → 確認は PK 1行の SELECT だけ。SQLで直接辞書をいじっても次のアクセスで反映される
+- キャッシュは DBファイル × version で持つ（configure_pool で別DBへ切り替えたとき、
+  同じ version でも前のDBの辞書を使わない。マイグレーション直後のDBはどれも version が同じ）
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+from types import MappingProxyType
+from typing import Any, Mapping
+
+from tool_asset_system.db.db import connect, get_pool
+
+
+class DictSnapshot:
+    """ある version 時点の辞書一式（読み取り専用として扱う）"""
+
+    def __init__(
+        self,
+        version: int,
+        layers: list[dict[str, Any]],
+        categories: list[dict[str, Any]],
+        statuses: list[dict[str, Any]],
+        db: str = "",
+    ):
+        self.db = db
+        self.version = version
+        self.layers = layers  # sort_order 順
+        self.layers_by_code = {r["code"]: r for r in layers}
+
+        self.categories_by_layer: dict[str, list[dict[str, Any]]] = {}
+        for r in categories:  # sort_order, code 順
+            self.categories_by_layer.setdefault(r["layer_code"], []).append(r)
+        self.category_keys = {(r["layer_code"], r["code"]) for r in categories}
+
+        self.statuses = statuses
+        self.status_codes = {r["code"] for r in statuses}
+
+        self.layer_labels: Mapping[str, str] = MappingProxyType({r["code"]: r["label"] for r in layers})
+        self.category_labels: Mapping[str, str] = MappingProxyType({r["code"]: r["label"] for r in categories})
+        self.status_labels: Mapping[str, str] = MappingProxyType({r["code"]: r["label"] for r in statuses})
+
+
+_cache: DictSnapshot | None = None
+_lock = threading.Lock()
+
+
+def _current_version(con: sqlite3.Connection) -> int:
+    row = con.execute("SELECT version FROM change_counters WHERE name = 'dict'").fetchone()
+    return int(row["version"]) if row is not None else 0
+
+
+def _load(con: sqlite3.Connection, db: str, version: int) -> DictSnapshot:
+    layers = [
+        dict(r)
+        for r in con.execute(
+            "SELECT code,label,sort_order,allow_free_category FROM layers ORDER BY sort_order"
+        ).fetchall()
+    ]
+    categories = [
+        dict(r)
+        for r in con.execute(
+            "SELECT code,layer_code,label,sort_order,is_active FROM categories ORDER BY sort_order, code"
+        ).fetchall()
+    ]
+    statuses = [
+        dict(r)
+        for r in con.execute(
+            "SELECT code,label,sort_order,is_active FROM statuses ORDER BY sort_order, code"
+        ).fetchall()
+    ]
+    return DictSnapshot(version, layers, categories, statuses, db=db)
+
+
+def snapshot(con: sqlite3.Connection | None = None) -> DictSnapshot:
+    """
+    現在の辞書を返す。con を渡すとその接続（＝そのトランザクション）で version を確認する。
+    """
+    global _cache
+
+    if con is None:
+        with connect() as c:
+            return snapshot(c)
+
+    db = str(get_pool().path)
+    version = _current_version(con)
+    cached = _cache
+    if cached is not None and cached.db == db and cached.version == version:
+        return cached
+
+    snap = _load(con, db, version)
+    with _lock:
+        # 古いスナップショットを読んでいるリクエストが、新しいキャッシュを巻き戻さないように
+        if _cache is None or _cache.db != db or _cache.version < version:
+            _cache = snap
+    return snap
+
+
+def invalidate() -> None:
+    global _cache
+    with _lock:
+        _cache = None
+
+
+# ============================================================
+# View helpers（routes から使う）
+# ============================================================
+
+def get_layers() -> list[dict[str, Any]]:
+    return list(snapshot().layers)
+
+
+def get_categories_for_layer(layer_code: str) -> list[dict[str, Any]]:
+    return list(snapshot().categories_by_layer.get(layer_code, []))
+
+
+def get_label_maps() -> tuple[Mapping[str, str], Mapping[str, str], Mapping[str, str]]:
+    """
+    表示用：code -> label の辞書をまとめて返す。
+    DB上のSSOT（辞書テーブル）をそのままUIへ渡す。
+    """
+    snap = snapshot()
+    return snap.layer_labels, snap.category_labels, snap.status_labels
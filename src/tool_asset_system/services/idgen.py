@@ -2,25 +2,46 @@
 from __future__ import annotations
 import sqlite3
 
-def issue_asset_code(con: sqlite3.Connection, layer_code: str, width: int = 8, sep: str = "_") -> str:
+
+def format_asset_code(layer_code: str, no: int, width: int = 8, sep: str = "_") -> str:
+    return f"{layer_code}{sep}{no:0{width}d}"
+
+
+def reserve_asset_numbers(con: sqlite3.Connection, layer_code: str, n: int) -> range:
     """
-    Issue unique asset_code like INSERT_00000001.
-    Assumes id_sequences(layer_code, next_no) exists.
-    Must be called inside a transaction.
+    Reserve a contiguous block of n sequence numbers for layer_code with a single UPDATE.
+    Returns range(first, first + n).
+    Must be called inside a transaction (the block is lost if the transaction rolls back).
     """
+    if n < 1:
+        raise ValueError("n must be >= 1")
+
     row = con.execute(
-        "SELECT next_no FROM id_sequences WHERE layer_code = ?",
-        (layer_code,),
+        "UPDATE id_sequences SET next_no = next_no + ? WHERE layer_code = ? RETURNING next_no",
+        (n, layer_code),
     ).fetchone()
 
     if row is None:
         raise ValueError(f"id_sequences has no row for layer_code={layer_code!r}")
 
-    next_no = int(row[0])
-    asset_code = f"{layer_code}{sep}{next_no:0{width}d}"
+    end = int(row[0])
+    return range(end - n, end)
+
+
+def reserve_asset_codes(
+    con: sqlite3.Connection, layer_code: str, n: int, width: int = 8, sep: str = "_"
+) -> list[str]:
+    """
+    Reserve n consecutive asset_codes like INSERT_00000001 .. INSERT_0000000n.
+    Must be called inside a transaction.
+    """
+    return [format_asset_code(layer_code, no, width, sep) for no in reserve_asset_numbers(con, layer_code, n)]
 
-    con.execute(
-        "UPDATE id_sequences SET next_no = next_no + 1 WHERE layer_code = ?",
-        (layer_code,),
-    )
-    return asset_code
+
+def issue_asset_code(con: sqlite3.Connection, layer_code: str, width: int = 8, sep: str = "_") -> str:
+    """
+    Issue unique asset_code like INSERT_00000001.
+    Assumes id_sequences(layer_code, next_no) exists.
+    Must be called inside a transaction.
+    """
+    return reserve_asset_codes(con, layer_code, 1, width, sep)[0]
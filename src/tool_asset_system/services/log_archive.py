@@ -0,0 +1,321 @@
+# src/tool_asset_system/services/log_archive.py
+"""
+operation_logs のアーカイブ（古いログを期間ごとの別DBファイルへ移す）。
+
+- 置き場所：<DBと同じディレクトリ>/archive/oplog_<period>.db（period は '2025-01' / '2025'）
+- どのファイルに何が入っているかは本体DBの log_archives（0017）に持つ
+- 移動はチャンク単位。本体が WAL だと ATTACH 先とまたがる commit は原子的にならないので
+  1) アーカイブへ INSERT OR IGNORE → commit
+  2) アーカイブに入ったことを確かめた id だけ本体から DELETE（＋ log_archives 更新）→ commit
+  の2段にする（途中で落ちても、やり直せば重複なく続きから移る）
+- 履歴の参照（log_history）は本体を先に引き、足りなければアーカイブを ATTACH して新しい順に UNION ALL で引く
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import date
+from pathlib import Path
+from typing import Any, Iterator
+
+from tool_asset_system.db.db import begin_immediate, connect, get_pool
+
+# 移動する列（アーカイブ側も同じ列・同じ id で持つ）
+LOG_COLUMNS = (
+    "id", "action", "target_type", "target_code", "actor", "reason",
+    "patch_json", "before_json", "after_json", "created_at", "payload_kind", "payload",
+)
+HISTORY_COLUMNS = ("id", "action", "target_code", "actor", "created_at")
+PERIODS = ("month", "year")
+DEFAULT_CHUNK_SIZE = 5000
+# SQLite の ATTACH 上限（既定 10）から1つ余裕を残す
+MAX_ATTACH = 9
+_MAX_ID = (1 << 63) - 1
+
+_ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS {s}.operation_logs (
+  id INTEGER PRIMARY KEY,
+  action TEXT NOT NULL,
+  target_type TEXT NOT NULL,
+  target_code TEXT NOT NULL,
+  actor TEXT NOT NULL DEFAULT 'unknown',
+  reason TEXT,
+  patch_json TEXT,
+  before_json TEXT,
+  after_json TEXT,
+  created_at TEXT NOT NULL,
+  payload_kind TEXT,
+  payload BLOB
+);
+CREATE INDEX IF NOT EXISTS {s}.idx_operation_logs_target ON operation_logs(target_type, target_code);
+CREATE INDEX IF NOT EXISTS {s}.idx_operation_logs_created_at ON operation_logs(created_at);
+"""
+
+
+def ensure_payload_columns(con: sqlite3.Connection, schema: str) -> None:
+    """0018 より前に作ったアーカイブファイルに payload 列を足す"""
+    have = {r[1] for r in con.execute(f"PRAGMA {schema}.table_info(operation_logs)")}
+    for name, decl in (("payload_kind", "TEXT"), ("payload", "BLOB")):
+        if name not in have:
+            con.execute(f"ALTER TABLE {schema}.operation_logs ADD COLUMN {name} {decl}")
+
+
+def archive_dir() -> Path:
+    return get_pool().path.parent / "archive"
+
+
+def _period_range(period: str) -> tuple[str, str]:
+    """period キー -> created_at の [開始, 終了)（文字列比較で使う）"""
+    if len(period) == 4:
+        return period, f"{int(period) + 1:04d}"
+    y, m = int(period[:4]), int(period[5:7])
+    y2, m2 = (y + 1, 1) if m == 12 else (y, m + 1)
+    return period, f"{y2:04d}-{m2:02d}"
+
+
+def _normalize_before(before: str | date) -> str:
+    if isinstance(before, date):
+        return before.isoformat()
+    try:
+        return date.fromisoformat(before.strip()).isoformat()
+    except ValueError:
+        raise ValueError(f"before must be YYYY-MM-DD: {before}") from None
+
+
+def _plan(con: sqlite3.Connection, before: str, period: str) -> list[dict[str, Any]]:
+    width = 7 if period == "month" else 4
+    rows = con.execute(
+        f"""
+        SELECT substr(created_at, 1, {width}) AS period, COUNT(*) AS n
+        FROM operation_logs
+        WHERE created_at < ?
+        GROUP BY 1
+        ORDER BY 1
+        """,
+        (before,),
+    ).fetchall()
+    return [{"period": r["period"], "rows": r["n"]} for r in rows]
+
+
+def _move_period(con: sqlite3.Connection, period: str, before: str, chunk_size: int) -> int:
+    lo, hi = _period_range(period)
+    hi = min(hi, before)
+    cols = ", ".join(LOG_COLUMNS)
+    retries = get_pool().config.busy_retries
+    moved = 0
+    while True:
+        ids = [
+            r[0]
+            for r in con.execute(
+                """
+                SELECT id FROM main.operation_logs
+                WHERE created_at >= ? AND created_at < ?
+                ORDER BY created_at, id
+                LIMIT ?
+                """,
+                (lo, hi, chunk_size),
+            )
+        ]
+        if not ids:
+            return moved
+        ids_json = json.dumps(ids)
+
+        # 1) アーカイブへコピー
+        begin_immediate(con, retries)
+        try:
+            con.execute(
+                f"""
+                INSERT OR IGNORE INTO arc.operation_logs({cols})
+                SELECT {cols} FROM main.operation_logs
+                WHERE id IN (SELECT value FROM json_each(?))
+                """,
+                (ids_json,),
+            )
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+
+        # 2) アーカイブに入っている id だけ本体から消す
+        begin_immediate(con, retries)
+        try:
+            st = con.execute(
+                """
+                SELECT COUNT(*), MIN(id), MAX(id), MIN(created_at), MAX(created_at)
+                FROM arc.operation_logs
+                WHERE id IN (SELECT value FROM json_each(?))
+                """,
+                (ids_json,),
+            ).fetchone()
+            n = con.execute(
+                """
+                DELETE FROM main.operation_logs
+                WHERE id IN (SELECT value FROM json_each(?))
+                  AND id IN (SELECT id FROM arc.operation_logs)
+                """,
+                (ids_json,),
+            ).rowcount
+            con.execute(
+                """
+                INSERT INTO main.log_archives(
+                  period, file_name, row_count, min_id, max_id, min_created_at, max_created_at
+                ) VALUES(?,?,?,?,?,?,?)
+                ON CONFLICT(period) DO UPDATE SET
+                  row_count = row_count + excluded.row_count,
+                  min_id = MIN(COALESCE(min_id, excluded.min_id), excluded.min_id),
+                  max_id = MAX(COALESCE(max_id, excluded.max_id), excluded.max_id),
+                  min_created_at = MIN(COALESCE(min_created_at, excluded.min_created_at), excluded.min_created_at),
+                  max_created_at = MAX(COALESCE(max_created_at, excluded.max_created_at), excluded.max_created_at),
+                  updated_at = datetime('now')
+                """,
+                (period, f"oplog_{period}.db", n, st[1], st[2], st[3], st[4]),
+            )
+            con.commit()
+        except BaseException:
+            con.rollback()
+            raise
+        moved += n
+        if n == 0:
+            # アーカイブ側に入らなかった（想定外）。無限ループしない
+            raise RuntimeError(f"log archive: rows not copied to oplog_{period}.db")
+
+
+def archive_logs(
+    before: str | date,
+    *,
+    period: str = "month",
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    dry_run: bool = False,
+) -> dict[str, Any]:
+    """
+    created_at < before の operation_logs を期間ごとのアーカイブDBへ移す。
+    戻り値：{"before", "period", "periods": [{"period", "rows"}...], "moved", "dry_run"}
+    """
+    if period not in PERIODS:
+        raise ValueError(f"period must be one of {', '.join(PERIODS)}: {period}")
+    if chunk_size <= 0:
+        raise ValueError("chunk_size must be positive")
+    before = _normalize_before(before)
+
+    pool = get_pool()
+    # ATTACH はトランザクション外でしかできないので、UnitOfWork とは別の接続を使う
+    con = pool.acquire()
+    try:
+        plan = _plan(con, before, period)
+        result: dict[str, Any] = {"before": before, "period": period, "periods": plan, "moved": 0, "dry_run": dry_run}
+        if dry_run or not plan:
+            return result
+
+        directory = archive_dir()
+        directory.mkdir(parents=True, exist_ok=True)
+        for p in plan:
+            con.execute("ATTACH DATABASE ? AS arc", (str(directory / f"oplog_{p['period']}.db"),))
+            try:
+                con.executescript(_ARCHIVE_SCHEMA.format(s="arc"))
+                ensure_payload_columns(con, "arc")
+                p["rows"] = _move_period(con, p["period"], before, chunk_size)
+                result["moved"] += p["rows"]
+            finally:
+                if con.in_transaction:
+                    con.rollback()
+                con.execute("DETACH DATABASE arc")
+        return result
+    finally:
+        pool.release(con)
+
+
+def list_archives() -> list[dict[str, Any]]:
+    with connect() as con:
+        rows = con.execute(
+            """
+            SELECT period, file_name, row_count, min_id, max_id, min_created_at, max_created_at, updated_at
+            FROM log_archives
+            ORDER BY period
+            """
+        ).fetchall()
+    return [dict(r) for r in rows]
+
+
+def _chunks(items: list[Any], n: int) -> Iterator[list[Any]]:
+    for i in range(0, len(items), n):
+        yield items[i : i + n]
+
+
+def log_history(
+    target_type: str,
+    target_code: str,
+    *,
+    limit: int | None = 50,
+    columns: tuple[str, ...] | list[str] = HISTORY_COLUMNS,
+    before_id: int | None = None,
+) -> list[dict[str, Any]]:
+    """
+    1対象の操作ログ（新しい順に最大 limit 件、None なら全件）。本体で足りなければアーカイブも見る。
+    columns は LOG_COLUMNS のうち必要なもの（id は重複除去に使うので必ず含める）。
+    before_id を渡すと id <= before_id のものだけ
+    """
+    unknown = [c for c in columns if c not in LOG_COLUMNS]
+    if unknown:
+        raise ValueError(f"unknown column: {unknown[0]}")
+    cols = list(dict.fromkeys(["id", *columns]))
+    select = ", ".join(cols)
+    where = "target_type = ? AND target_code = ? AND id <= ?"
+    args = (target_type, target_code, before_id if before_id is not None else _MAX_ID)
+
+    def enough() -> bool:
+        return limit is not None and len(rows) >= limit
+
+    with connect() as con:
+        rows = [
+            dict(r)
+            for r in con.execute(
+                f"SELECT {select} FROM operation_logs WHERE {where} ORDER BY id DESC LIMIT ?",
+                (*args, -1 if limit is None else limit),
+            )
+        ]
+        if enough():
+            return rows
+        archives = [
+            r["file_name"]
+            for r in con.execute("SELECT file_name FROM log_archives WHERE row_count > 0 ORDER BY max_id DESC")
+        ]
+
+    directory = archive_dir()
+    files = [directory / f for f in archives if (directory / f).exists()]
+    if not files:
+        return rows
+
+    seen = {r["id"] for r in rows}
+    pool = get_pool()
+    con = pool.acquire()
+    try:
+        for batch in _chunks(files, MAX_ATTACH):
+            names = [f"arc{i}" for i in range(len(batch))]
+            attached: list[str] = []
+            try:
+                for name, path in zip(names, batch):
+                    con.execute(f"ATTACH DATABASE ? AS {name}", (str(path),))
+                    attached.append(name)
+                sql = " UNION ALL ".join(f"SELECT {select} FROM {name}.operation_logs WHERE {where}" for name in attached)
+                # 本体と重複している行（移動の途中で落ちた分）があり得るので、その分も多めに取る
+                params = [*args] * len(attached)
+                want = -1 if limit is None else limit - len(rows) + len(seen)
+                found = con.execute(f"{sql} ORDER BY id DESC LIMIT ?", (*params, want)).fetchall()
+                for r in found:
+                    if r["id"] in seen:
+                        continue
+                    seen.add(r["id"])
+                    rows.append(dict(r))
+                    if enough():
+                        break
+            finally:
+                if con.in_transaction:
+                    con.rollback()
+                for name in attached:
+                    con.execute(f"DETACH DATABASE {name}")
+            if enough():
+                break
+    finally:
+        pool.release(con)
+    rows.sort(key=lambda r: r["id"], reverse=True)
+    return rows if limit is None else rows[:limit]
@@ -0,0 +1,324 @@
+# src/tool_asset_system/services/log_payload.py
+"""
+operation_logs の状態ペイロード（差分＋定期チェックポイント、圧縮）。
+
+- 対象（target_type, target_code）ごとに、ログ1件 = 状態1版
+  - payload_kind='FULL'  : その時点の行まるごと（チェックポイント）
+  - payload_kind='DELTA' : 直前の版からの JSON Patch（RFC 6902 の add / remove / replace。入れ子の dict はキー単位）
+  - FULL から CHECKPOINT_EVERY 版ごとに FULL を入れ直す（復元で読む行数の上限になる）
+- payload は 1バイトの形式番号 + raw deflate（共通の列名を preset dictionary にして、小さい JSON でも縮むようにする）
+- 旧形式（before_json / after_json に平文の JSON）は 0018 で変換する。変換前の行も読めるようにしてある
+- 版の復元（rebuild）は最後の FULL から差分を順に当てるだけ。before は「1つ前の版」
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+import zlib
+from typing import Any, Iterable, Iterator
+
+from tool_asset_system.db.db import connect
+from tool_asset_system.services.log_archive import log_history
+
+KIND_FULL = "FULL"
+KIND_DELTA = "DELTA"
+CHECKPOINT_EVERY = 16
+
+FORMAT_V1 = b"\x01"
+
+# 形式 v1 の preset dictionary。既存の payload が読めなくなるので変更しない（変えるなら FORMAT を上げる）
+_ZDICT_V1 = (
+    '"id":,"asset_code":"","layer_code":"INSERT","SCREW","SOLID_TOOL","HOLDER","TOOL_BODY","SUB_HOLDER",'
+    '"ACCESSORY","category_code":null,"category_free_text":null,"part_no":"","maker":"","maker_part_name":null,'
+    '"stock_qty":0.0,"stock_unit":"EA","pack_qty":null,"unit_price":null,"supplier":null,"lead_time_days":null,'
+    '"min_stock_qty":null,"note":null,"assembly_code":"ASM_","list_code":"TL_","title":"","items":[{"tool_no":"",'
+    '"qty":1.0,"role":"","part_asset_code":"","display_name":"","status":"ARCHIVED","status":"ACTIVE",'
+    '"created_at":"20","updated_at":"20"},'
+    '[{"op":"add","path":"/"},{"op":"remove","path":"/"},{"op":"replace","path":"/status","value":"'
+    ',{"op":"replace","path":"/updated_at","value":"20'
+).encode("utf-8")
+
+_COMPRESS = zlib.compressobj(9, zlib.DEFLATED, -15, 9, zlib.Z_DEFAULT_STRATEGY, _ZDICT_V1)
+_DECOMPRESS = zlib.decompressobj(-15, _ZDICT_V1)
+
+
+# ============================================================
+# codec
+# ============================================================
+
+def encode(obj: Any) -> bytes:
+    raw = json.dumps(obj, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    # preset dictionary を毎回設定し直さないよう、初期化済みのオブジェクトを複製して使う
+    c = _COMPRESS.copy()
+    return FORMAT_V1 + c.compress(raw) + c.flush()
+
+
+def decode(blob: bytes) -> Any:
+    if blob[:1] != FORMAT_V1:
+        raise ValueError(f"unknown log payload format: {blob[:1]!r}")
+    d = _DECOMPRESS.copy()
+    return json.loads(d.decompress(blob[1:]) + d.flush())
+
+
+def _escape(key: str) -> str:
+    return key.replace("~", "~0").replace("/", "~1")
+
+
+def _unescape(token: str) -> str:
+    return token.replace("~1", "/").replace("~0", "~")
+
+
+def _diff(before: dict[str, Any], after: dict[str, Any], prefix: str, ops: list[dict[str, Any]]) -> None:
+    for k in before:
+        if k not in after:
+            ops.append({"op": "remove", "path": prefix + "/" + _escape(k)})
+    for k, v in after.items():
+        path = prefix + "/" + _escape(k)
+        if k not in before:
+            ops.append({"op": "add", "path": path, "value": v})
+        elif isinstance(before[k], dict) and isinstance(v, dict):
+            # 入れ子の dict（assembly の items など）はキー単位で差分を取る
+            _diff(before[k], v, path, ops)
+        elif before[k] != v or type(before[k]) is not type(v):
+            ops.append({"op": "replace", "path": path, "value": v})
+
+
+def diff(before: dict[str, Any], after: dict[str, Any]) -> list[dict[str, Any]]:
+    """before -> after の JSON Patch（dict は入れ子でもキー単位、list は丸ごと置き換え）"""
+    ops: list[dict[str, Any]] = []
+    _diff(before, after, "", ops)
+    return ops
+
+
+def apply(state: dict[str, Any], ops: Iterable[dict[str, Any]]) -> dict[str, Any]:
+    """ops を当てた新しい dict を返す（state と、その中の dict は書き換えない）"""
+    out = dict(state)
+    for op in ops:
+        *parents, key = [_unescape(t) for t in op["path"].split("/")[1:]]
+        cur = out
+        for t in parents:
+            cur[t] = dict(cur[t])
+            cur = cur[t]
+        if op["op"] == "remove":
+            cur.pop(key, None)
+        elif op["op"] in ("add", "replace"):
+            cur[key] = op["value"]
+        else:
+            raise ValueError(f"unsupported patch op: {op['op']}")
+    return out
+
+
+# ============================================================
+# 書き込み
+# ============================================================
+
+def _row_state(r: sqlite3.Row | dict[str, Any], state: dict[str, Any] | None) -> dict[str, Any] | None:
+    """1行ぶんを当てた後の状態（状態を持たない行なら state のまま）"""
+    kind, payload = r["payload_kind"], r["payload"]
+    if payload is not None:
+        obj = decode(payload)
+        if kind == KIND_FULL:
+            return obj
+        return apply(state, obj) if state is not None else None
+    # 旧形式（未変換）
+    if r["after_json"] is not None:
+        return json.loads(r["after_json"])
+    return state
+
+
+def _chain(con: sqlite3.Connection, target_type: str, target_code: str) -> tuple[dict[str, Any] | None, int]:
+    """本体に残っている最後の FULL から辿った最新状態と、FULL 以降の差分の数"""
+    rows: list[sqlite3.Row] = []
+    for r in con.execute(
+        """
+        SELECT id, payload_kind, payload, after_json
+        FROM operation_logs
+        WHERE target_type = ? AND target_code = ?
+        ORDER BY id DESC
+        """,
+        (target_type, target_code),
+    ):
+        if r["payload"] is None and r["after_json"] is None:
+            continue
+        rows.append(r)
+        if r["payload_kind"] == KIND_FULL or r["payload"] is None:
+            break
+    else:
+        # 起点（FULL）が本体に無い（初回 / アーカイブ済み）
+        return None, 0
+    state: dict[str, Any] | None = None
+    for r in reversed(rows):
+        state = _row_state(r, state)
+    return state, len(rows) - 1
+
+
+def payload_for(
+    con: sqlite3.Connection, target_type: str, target_code: str, state: dict[str, Any]
+) -> tuple[str, bytes]:
+    """次の版として state を記録するときの (payload_kind, payload)"""
+    base, deltas = _chain(con, target_type, target_code)
+    if base is None or deltas + 1 >= CHECKPOINT_EVERY:
+        return KIND_FULL, encode(state)
+    return KIND_DELTA, encode(diff(base, state))
+
+
+def append_log(
+    con: sqlite3.Connection,
+    *,
+    action: str,
+    target_type: str,
+    target_code: str,
+    actor: str,
+    reason: str | None = None,
+    patch: dict[str, Any] | None = None,
+    state: dict[str, Any] | None = None,
+) -> int:
+    """operation_logs に1件追加する（state を渡せば変更後の状態を版として残す）"""
+    kind, payload = payload_for(con, target_type, target_code, state) if state is not None else (None, None)
+    cur = con.execute(
+        """
+        INSERT INTO operation_logs(
+          action, target_type, target_code,
+          actor, reason,
+          patch_json, payload_kind, payload
+        ) VALUES(?,?,?,?,?,?,?,?)
+        """,
+        (
+            action, target_type, target_code,
+            actor, reason,
+            json.dumps(patch, ensure_ascii=False) if patch is not None else None,
+            kind, payload,
+        ),
+    )
+    return int(cur.lastrowid)
+
+
+# ============================================================
+# 復元
+# ============================================================
+
+def _iter_versions(rows: Iterable[sqlite3.Row | dict[str, Any]]) -> Iterator[dict[str, Any]]:
+    state: dict[str, Any] | None = None
+    for r in rows:
+        before = state
+        state = _row_state(r, state)
+        yield {
+            "id": r["id"],
+            "action": r["action"],
+            "actor": r["actor"],
+            "created_at": r["created_at"],
+            "before": before,
+            "after": state,
+        }
+
+
+_VERSION_COLUMNS = ("id", "action", "actor", "created_at", "payload_kind", "payload", "after_json")
+_MAX_ID = (1 << 63) - 1
+
+
+def versions(target_type: str, target_code: str) -> list[dict[str, Any]]:
+    """対象の全ログを古い順に、各時点の before / after を復元して返す（アーカイブ分も含む）"""
+    rows = log_history(target_type, target_code, limit=None, columns=_VERSION_COLUMNS)
+    return list(_iter_versions(reversed(rows)))
+
+
+def rebuild(target_type: str, target_code: str, log_id: int | None = None) -> dict[str, Any] | None:
+    """log_id の時点（省略時は最新）の状態。起点の FULL まで新しい順に読んで、差分を当て直す"""
+    picked: list[sqlite3.Row | dict[str, Any]] = []
+    anchored = False
+    with connect() as con:
+        for r in con.execute(
+            f"""
+            SELECT {", ".join(_VERSION_COLUMNS)}
+            FROM operation_logs
+            WHERE target_type = ? AND target_code = ? AND id <= ?
+            ORDER BY id DESC
+            """,
+            (target_type, target_code, log_id if log_id is not None else _MAX_ID),
+        ):
+            picked.append(r)
+            if r["payload_kind"] == KIND_FULL or (r["payload"] is None and r["after_json"] is not None):
+                anchored = True
+                break
+
+    if not anchored:
+        # 起点がアーカイブ側にある
+        below = picked[-1]["id"] - 1 if picked else log_id
+        for r in log_history(target_type, target_code, limit=None, columns=_VERSION_COLUMNS, before_id=below):
+            if r["id"] in {p["id"] for p in picked}:
+                continue
+            picked.append(r)
+            if r["payload_kind"] == KIND_FULL or (r["payload"] is None and r["after_json"] is not None):
+                break
+
+    state: dict[str, Any] | None = None
+    for r in reversed(picked):
+        state = _row_state(r, state)
+    return state
+
+
+# ============================================================
+# 旧形式の変換（0018 / アーカイブファイル）
+# ============================================================
+
+def convert_legacy(con: sqlite3.Connection, schema: str = "main", *, batch_size: int = 1000) -> int:
+    """
+    before_json / after_json に平文で持っている行を payload（FULL / DELTA）に置き換える。
+    対象ごとに id 順で1回なめるだけ。変換済みの行は版の計算にだけ使う（途中から再実行できる）
+    """
+    converted = 0
+    pending: list[tuple[Any, ...]] = []
+    key: tuple[str, str] | None = None
+    state: dict[str, Any] | None = None
+    deltas = 0
+
+    def flush() -> None:
+        if pending:
+            con.executemany(
+                f"""
+                UPDATE {schema}.operation_logs
+                SET payload_kind = ?, payload = ?, before_json = NULL, after_json = NULL
+                WHERE id = ?
+                """,
+                pending,
+            )
+            pending.clear()
+
+    # 対象・id 順にページ単位で読む（after_json を全件メモリに載せない）
+    last: tuple[str, str, int] = ("", "", 0)
+    while True:
+        rows = con.execute(
+            f"""
+            SELECT id, target_type, target_code, payload_kind, payload, after_json
+            FROM {schema}.operation_logs
+            WHERE (target_type, target_code, id) > (?, ?, ?)
+            ORDER BY target_type, target_code, id
+            LIMIT ?
+            """,
+            (*last, batch_size),
+        ).fetchall()
+        if not rows:
+            break
+        last = (rows[-1]["target_type"], rows[-1]["target_code"], rows[-1]["id"])
+        for r in rows:
+            k = (r["target_type"], r["target_code"])
+            if k != key:
+                key, state, deltas = k, None, 0
+            if r["payload"] is not None:
+                state = _row_state(r, state)
+                deltas = 0 if r["payload_kind"] == KIND_FULL else deltas + 1
+                continue
+            if r["after_json"] is None:
+                continue
+            after = json.loads(r["after_json"])
+            if state is None or deltas + 1 >= CHECKPOINT_EVERY:
+                pending.append((KIND_FULL, encode(after), r["id"]))
+                deltas = 0
+            else:
+                pending.append((KIND_DELTA, encode(diff(state, after)), r["id"]))
+                deltas += 1
+            state = after
+            converted += 1
+        flush()
+    flush()
+    return converted
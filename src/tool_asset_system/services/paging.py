@@ -0,0 +1,154 @@
+# src/tool_asset_system/services/paging.py
+"""
+キーセット（カーソル）ページング。
+
+- OFFSET を使わず「前ページ最後の行の ORDER BY キー」より後ろを読む
+  → 何ページ目でも、テーブルがどれだけ大きくても1ページのコストは一定
+- カーソルは ORDER BY キーの値を JSON → base64url にしただけの不透明な文字列
+- after=次ページ用 / before=前ページ用
+- キー列は NULL を含まないこと（NULL 可の列は COALESCE してから渡す）
+"""
+from __future__ import annotations
+
+import base64
+import json
+import sqlite3
+from dataclasses import dataclass
+from typing import Any, Sequence
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 500
+
+
+@dataclass(frozen=True)
+class SortKey:
+    expr: str           # SQL式（例: "p.asset_code", "COALESCE(p.category_code, '')"）
+    desc: bool = False
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, n_keys: int | None = None) -> list[Any]:
+    try:
+        pad = "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(cursor + pad).decode("utf-8"))
+    except Exception:
+        raise ValueError("invalid cursor") from None
+    if not isinstance(values, list) or (n_keys is not None and len(values) != n_keys):
+        raise ValueError("invalid cursor")
+    return values
+
+
+def clamp_limit(limit: int | None) -> int:
+    """画面/APIからの指定を 1..MAX_PAGE_SIZE に丸める"""
+    if not limit:
+        return DEFAULT_PAGE_SIZE
+    return max(1, min(int(limit), MAX_PAGE_SIZE))
+
+
+def select_columns(alias: str, fields: Sequence[str] | None, allowed: Sequence[str]) -> str:
+    """
+    fields=（API の列指定）から SELECT 句を作る。None なら全列。
+    列名は allowed にあるものだけ（SQL に埋め込むのでホワイトリスト必須）。
+    """
+    if not fields:
+        return f"{alias}.*"
+    unknown = [f for f in fields if f not in allowed]
+    if unknown:
+        raise ValueError(f"unknown field: {', '.join(unknown)}")
+    return ", ".join(f"{alias}.{f}" for f in dict.fromkeys(fields))
+
+
+def _keyset_condition(keys: Sequence[SortKey], values: Sequence[Any], backward: bool) -> tuple[str, list[Any]]:
+    def op(k: SortKey) -> str:
+        # 前進: ASCなら '>'、DESCなら '<'。後退（before）はその逆
+        return "<" if (k.desc != backward) else ">"
+
+    if len({k.desc for k in keys}) == 1:
+        # 向きが揃っていれば row value 比較（インデックスを使える）
+        cols = ", ".join(k.expr for k in keys)
+        marks = ", ".join("?" for _ in keys)
+        return f"({cols}) {op(keys[0])} ({marks})", list(values)
+
+    # 向きが混在する場合は展開形： k0 op ? OR (k0 = ? AND k1 op ?) OR ...
+    ors: list[str] = []
+    params: list[Any] = []
+    for i, k in enumerate(keys):
+        parts = [f"{keys[j].expr} = ?" for j in range(i)] + [f"{k.expr} {op(k)} ?"]
+        ors.append("(" + " AND ".join(parts) + ")")
+        params.extend(values[: i + 1])
+    return "(" + " OR ".join(ors) + ")", params
+
+
+def _order_by(keys: Sequence[SortKey], backward: bool) -> str:
+    return ", ".join(f"{k.expr} {'DESC' if (k.desc != backward) else 'ASC'}" for k in keys)
+
+
+def fetch_page(
+    con: sqlite3.Connection,
+    *,
+    select: str,
+    from_where: str,
+    params: Sequence[Any],
+    keys: Sequence[SortKey],
+    limit: int | None = None,
+    after: str | None = None,
+    before: str | None = None,
+) -> dict[str, Any]:
+    """
+    select:     SELECT句の列（"p.*" など）
+    from_where: "FROM ... WHERE ..."（WHERE は必須。条件が無ければ WHERE 1=1）
+    keys:       ORDER BY キー（最後のキーで一意になること）
+
+    返り値: {"rows": [...], "next_cursor": str|None, "prev_cursor": str|None}
+    """
+    if after and before:
+        raise ValueError("after and before cannot be used together")
+
+    n = max(1, int(limit)) if limit else DEFAULT_PAGE_SIZE
+    backward = bool(before)
+    cursor = before or after
+
+    key_cols = ", ".join(f"{k.expr} AS _k{i}" for i, k in enumerate(keys))
+    sql = f"SELECT {select}, {key_cols} {from_where}"
+    all_params = list(params)
+
+    if cursor:
+        cond, cond_params = _keyset_condition(keys, decode_cursor(cursor, len(keys)), backward)
+        sql += f" AND {cond}"
+        all_params.extend(cond_params)
+
+    sql += f" ORDER BY {_order_by(keys, backward)} LIMIT ?"
+    all_params.append(n + 1)
+
+    fetched = con.execute(sql, all_params).fetchall()
+    has_more = len(fetched) > n
+    fetched = fetched[:n]
+    if backward:
+        fetched.reverse()
+
+    def key_of(r: sqlite3.Row) -> str:
+        return encode_cursor([r[f"_k{i}"] for i in range(len(keys))])
+
+    rows = [{k: r[k] for k in r.keys() if not k.startswith("_k")} for r in fetched]
+
+    next_cursor: str | None = None
+    prev_cursor: str | None = None
+    if fetched:
+        if backward:
+            next_cursor = key_of(fetched[-1])
+            prev_cursor = key_of(fetched[0]) if has_more else None
+        else:
+            next_cursor = key_of(fetched[-1]) if has_more else None
+            prev_cursor = key_of(fetched[0]) if after else None
+    elif cursor:
+        # 範囲外まで来た：反対方向へは同じカーソルで戻れる
+        if backward:
+            next_cursor = cursor
+        else:
+            prev_cursor = cursor
+
+    return {"rows": rows, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
@@ -0,0 +1,416 @@
+# src/tool_asset_system/services/part_import.py
+"""
+parts の一括取り込み（メーカーカタログの CSV / Excel）。
+
+- 行はストリームで読む（ファイル全体をメモリに載せない）
+- batch_size 行ずつ：辞書キャッシュで検証 → 既存 (maker, part_no) を1クエリで確認 →
+  1トランザクションで executemany INSERT + operation_logs（版は FULL）をまとめて INSERT
+- エラーは行番号付きで返す（エラー行は飛ばして残りは取り込む）
+  INSERT 時の制約違反（トリガー / 同時に入った重複など）も、そのバッチを1行ずつやり直して行のエラーにする
+- dry_run=True なら検証だけして書き込まない
+
+.xlsx の読み込みには openpyxl が必要（任意依存）。
+"""
+from __future__ import annotations
+
+import codecs
+import csv
+import io
+import json
+import math
+import os
+import sqlite3
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Any, Iterable, Iterator
+
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.services import dictionaries
+from tool_asset_system.services.idgen import reserve_asset_codes
+from tool_asset_system.services.log_payload import KIND_FULL, encode
+
+DEFAULT_BATCH_SIZE = 1000
+
+# ヘッダ名のゆらぎ吸収（CLI の引数名 / 画面の項目名でも書けるように）
+HEADER_ALIASES = {
+    "layer": "layer_code",
+    "category": "category_code",
+    "category_free": "category_free_text",
+    "name": "display_name",
+    "unit": "stock_unit",
+    "qty": "stock_qty",
+    "stock": "stock_qty",
+    "price": "unit_price",
+    "lead_time": "lead_time_days",
+    "min_stock": "min_stock_qty",
+}
+
+TEXT_FIELDS = [
+    "layer_code", "category_code", "category_free_text",
+    "part_no", "maker", "maker_part_name", "display_name",
+    "stock_unit", "supplier", "status", "note",
+]
+FLOAT_FIELDS = ["stock_qty", "pack_qty", "unit_price", "min_stock_qty"]
+INT_FIELDS = ["lead_time_days"]
+
+# parts への INSERT 列（順序固定）
+INSERT_COLUMNS = [
+    "asset_code",
+    "layer_code", "category_code", "category_free_text",
+    "part_no",
+    "maker", "maker_part_name",
+    "display_name",
+    "stock_qty", "stock_unit",
+    "pack_qty", "unit_price", "supplier", "lead_time_days", "min_stock_qty",
+    "status", "note",
+]
+
+
+@dataclass
+class RowError:
+    line: int
+    message: str
+
+
+@dataclass
+class ImportResult:
+    total: int = 0
+    inserted: int = 0
+    asset_codes: list[str] = field(default_factory=list)
+    errors: list[RowError] = field(default_factory=list)
+    dry_run: bool = False
+
+    @property
+    def ok(self) -> int:
+        return self.total - len(self.errors)
+
+
+# ============================================================
+# Readers
+# ============================================================
+
+def _norm_header(h: Any) -> str:
+    k = str(h or "").strip().lower().replace("-", "_").replace(" ", "_")
+    return HEADER_ALIASES.get(k, k)
+
+
+def iter_csv_rows(stream: IO[str]) -> Iterator[tuple[int, dict[str, Any]]]:
+    """(行番号, {列名: 値}) を返す。行番号はヘッダを1行目とした物理行。"""
+    reader = csv.reader(stream)
+    header = next(reader, None)
+    if header is None:
+        return
+    keys = [_norm_header(h) for h in header]
+    for row in reader:
+        if not any((c or "").strip() for c in row):
+            continue
+        yield reader.line_num, dict(zip(keys, row))
+
+
+def iter_xlsx_rows(stream: IO[bytes] | str | Path) -> Iterator[tuple[int, dict[str, Any]]]:
+    try:
+        from openpyxl import load_workbook
+    except ImportError as e:  # pragma: no cover - 任意依存
+        raise RuntimeError("reading .xlsx requires openpyxl (pip install openpyxl)") from e
+
+    wb = load_workbook(stream, read_only=True, data_only=True)
+    try:
+        ws = wb.active
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        keys = [_norm_header(h) for h in header]
+        for i, row in enumerate(rows, start=2):
+            if not any(c not in (None, "") for c in row):
+                continue
+            yield i, dict(zip(keys, row))
+    finally:
+        wb.close()
+
+
+def _check_encoding(encoding: str) -> None:
+    """知らない encoding は LookupError ではなく ValueError（入力エラーとして画面/CLIに出す）"""
+    try:
+        codecs.lookup(encoding)
+    except LookupError:
+        raise ValueError(f"unknown encoding: {encoding!r}") from None
+
+
+def iter_file_rows(
+    path: str | Path,
+    *,
+    fmt: str | None = None,
+    encoding: str = "utf-8-sig",
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    p = Path(path)
+    fmt = (fmt or p.suffix.lstrip(".")).lower()
+    if fmt in ("xlsx", "xlsm"):
+        yield from iter_xlsx_rows(p)
+        return
+    if fmt not in ("csv", "txt"):
+        raise ValueError(f"unsupported import format: {fmt!r}")
+    _check_encoding(encoding)
+    with p.open("r", encoding=encoding, newline="") as f:
+        yield from iter_csv_rows(f)
+
+
+def iter_upload_rows(
+    stream: IO[bytes],
+    filename: str,
+    *,
+    encoding: str = "utf-8-sig",
+) -> Iterator[tuple[int, dict[str, Any]]]:
+    """Web アップロード（バイナリストリーム）用"""
+    suffix = Path(filename or "").suffix.lstrip(".").lower()
+    if suffix in ("xlsx", "xlsm"):
+        yield from iter_xlsx_rows(stream)
+        return
+    _check_encoding(encoding)
+    text = io.TextIOWrapper(stream, encoding=encoding, newline="")
+    try:
+        yield from iter_csv_rows(text)
+    finally:
+        text.detach()
+
+
+# ============================================================
+# Validation
+# ============================================================
+
+def _text(v: Any) -> str | None:
+    if v is None:
+        return None
+    s = str(v).strip()
+    return s if s != "" else None
+
+
+def _finite(v: str, name: str, what: str) -> float:
+    """数値セル。inf / nan / 1e400 なども1行のエラーにする（取り込み全体を止めない）"""
+    try:
+        f = float(v)
+    except (ValueError, OverflowError):
+        f = math.nan
+    if not math.isfinite(f):
+        raise ValueError(f"{name} must be {what}: {v!r}")
+    return f
+
+
+def _integer(v: str, name: str) -> int:
+    """整数セル。1.5 のような端数は切り捨てずに1行のエラーにする（Excel の 3.0 は 3）"""
+    f = _finite(v, name, "an integer")
+    if f != int(f):
+        raise ValueError(f"{name} must be an integer: {v!r}")
+    return int(f)
+
+
+def _normalize(raw: dict[str, Any], snap: dictionaries.DictSnapshot) -> dict[str, Any]:
+    """1行を parts の列に揃える。問題があれば ValueError（メッセージは画面/CLIにそのまま出す）"""
+    r: dict[str, Any] = {k: _text(raw.get(k)) for k in TEXT_FIELDS}
+
+    for k in FLOAT_FIELDS:
+        v = _text(raw.get(k))
+        r[k] = _finite(v, k, "a number") if v is not None else None
+    for k in INT_FIELDS:
+        v = _text(raw.get(k))
+        r[k] = _integer(v, k) if v is not None else None
+
+    if not r["part_no"]:
+        raise ValueError("part_no is required")
+    if not r["maker"]:
+        raise ValueError("maker is required")
+
+    layer_code = (r["layer_code"] or "").upper()
+    layer = snap.layers_by_code.get(layer_code)
+    if layer is None:
+        raise ValueError(f"unknown layer_code={r['layer_code']!r}")
+    r["layer_code"] = layer_code
+
+    if r["category_code"] is None:
+        if int(layer["allow_free_category"]) != 1:
+            raise ValueError("category_code is required for this layer")
+    elif (layer_code, r["category_code"]) not in snap.category_keys:
+        raise ValueError("category_code not found in categories for the given layer")
+
+    r["status"] = (r["status"] or "ACTIVE").upper()
+    if r["status"] not in snap.status_codes:
+        raise ValueError(f"invalid status: {r['status']!r}")
+
+    if r["stock_qty"] is None:
+        r["stock_qty"] = 0.0
+    r["stock_unit"] = r["stock_unit"] or "EA"
+    r["display_name"] = r["display_name"] or r["part_no"]
+    return r
+
+
+def _existing_keys(con: sqlite3.Connection, keys: list[tuple[str, str]]) -> set[tuple[str, str]]:
+    """(maker, part_no) のうち既に parts にあるもの（UNIQUE(maker, part_no) のインデックスで引く）"""
+    if not keys:
+        return set()
+    rows = con.execute(
+        """
+        SELECT p.maker, p.part_no
+        FROM json_each(?) j
+        JOIN parts p
+          ON p.maker = json_extract(j.value, '$[0]')
+         AND p.part_no = json_extract(j.value, '$[1]')
+        """,
+        (json.dumps(keys, ensure_ascii=False),),
+    ).fetchall()
+    return {(r["maker"], r["part_no"]) for r in rows}
+
+
+# ============================================================
+# Insert
+# ============================================================
+
+_INSERT_SQL = f"""
+INSERT INTO parts({", ".join(INSERT_COLUMNS)})
+VALUES({", ".join("?" for _ in INSERT_COLUMNS)})
+"""
+
+# add_part と同じ形の PART_ADD ログ（新規なので版は FULL。payload の圧縮は Python 側で行う）
+_LOG_SQL = """
+INSERT INTO operation_logs(
+  action, target_type, target_code,
+  actor, reason,
+  patch_json, payload_kind, payload
+) VALUES('PART_ADD', 'PART', ?, ?, ?, ?, ?, ?)
+"""
+
+
+def _log_rows(con: sqlite3.Connection, codes: list[str], *, actor: str, reason: str) -> Iterator[tuple[Any, ...]]:
+    rows = con.execute(
+        """
+        SELECT p.*
+        FROM json_each(?) j
+        JOIN parts p ON p.asset_code = j.value
+        ORDER BY j.key
+        """,
+        (json.dumps(codes),),
+    )
+    for r in rows:
+        state = {k: r[k] for k in r.keys()}
+        patch = json.dumps({"layer_code": r["layer_code"], "category_code": r["category_code"]}, ensure_ascii=False)
+        yield (r["asset_code"], actor, reason, patch, KIND_FULL, encode(state))
+
+
+def _insert_chunk(con: sqlite3.Connection, rows: list[dict[str, Any]], *, actor: str, reason: str) -> list[str]:
+    # 採番は layer ごとに1回の UPDATE でまとめて確保（行の順に連番を割り当てる）
+    counts: dict[str, int] = {}
+    for r in rows:
+        counts[r["layer_code"]] = counts.get(r["layer_code"], 0) + 1
+    reserved = {layer: iter(reserve_asset_codes(con, layer, n)) for layer, n in counts.items()}
+
+    codes: list[str] = []
+    params: list[tuple[Any, ...]] = []
+    for r in rows:
+        code = next(reserved[r["layer_code"]])
+        codes.append(code)
+        params.append(tuple(code if c == "asset_code" else r[c] for c in INSERT_COLUMNS))
+
+    con.executemany(_INSERT_SQL, params)
+    con.executemany(_LOG_SQL, list(_log_rows(con, codes, actor=actor, reason=reason)))
+    return codes
+
+
+@contextmanager
+def _savepoint(con: sqlite3.Connection) -> Iterator[None]:
+    """失敗したらこの中の書き込み（採番も含む）だけを巻き戻す。外側のトランザクションはそのまま"""
+    con.execute("SAVEPOINT part_import")
+    try:
+        yield
+    except BaseException:
+        con.execute("ROLLBACK TO part_import")
+        con.execute("RELEASE part_import")
+        raise
+    con.execute("RELEASE part_import")
+
+
+def _actor() -> str:
+    return os.environ.get("USERNAME") or os.environ.get("USER") or "unknown"
+
+
+def import_parts(
+    rows: Iterable[tuple[int, dict[str, Any]]],
+    *,
+    dry_run: bool = False,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    actor: str | None = None,
+    reason: str = "import",
+) -> ImportResult:
+    """
+    rows: (行番号, {列名: 値}) のイテラブル（iter_file_rows / iter_upload_rows）
+    """
+    actor = actor or _actor()
+    batch_size = max(1, int(batch_size))
+    result = ImportResult(dry_run=dry_run)
+    seen: set[tuple[str, str]] = set()  # ファイル内の重複検出用
+
+    batch: list[tuple[int, dict[str, Any]]] = []
+
+    def flush() -> None:
+        if not batch:
+            return
+        # 辞書・既存キーの確認は「その時点のDB」で行う（書き込みと同じ接続・同じトランザクション）
+        if dry_run:
+            with connect() as con:
+                _process(con, batch)
+        else:
+            with transaction() as con:
+                _process(con, batch)
+        batch.clear()
+
+    def _process(con: sqlite3.Connection, chunk: list[tuple[int, dict[str, Any]]]) -> None:
+        snap = dictionaries.snapshot(con)
+
+        valid: list[tuple[int, dict[str, Any]]] = []
+        for line, raw in chunk:
+            try:
+                r = _normalize(raw, snap)
+            except ValueError as e:
+                result.errors.append(RowError(line, str(e)))
+                continue
+            key = (r["maker"], r["part_no"])
+            if key in seen:
+                result.errors.append(RowError(line, f"duplicate maker/part_no in file: {key[0]} / {key[1]}"))
+                continue
+            seen.add(key)
+            valid.append((line, r))
+
+        existing = _existing_keys(con, [(r["maker"], r["part_no"]) for _, r in valid])
+        to_insert: list[tuple[int, dict[str, Any]]] = []
+        for line, r in valid:
+            if (r["maker"], r["part_no"]) in existing:
+                result.errors.append(RowError(line, f"part already exists: {r['maker']} / {r['part_no']}"))
+            else:
+                to_insert.append((line, r))
+
+        if dry_run or not to_insert:
+            return
+
+        try:
+            with _savepoint(con):
+                codes = _insert_chunk(con, [r for _, r in to_insert], actor=actor, reason=reason)
+        except sqlite3.IntegrityError:
+            # どの行か分からないので1行ずつやり直す（通った行は入れる）
+            codes = []
+            for line, r in to_insert:
+                try:
+                    with _savepoint(con):
+                        codes += _insert_chunk(con, [r], actor=actor, reason=reason)
+                except sqlite3.IntegrityError as e:
+                    result.errors.append(RowError(line, str(e)))
+        result.inserted += len(codes)
+        result.asset_codes.extend(codes)
+
+    for line, raw in rows:
+        result.total += 1
+        batch.append((line, raw))
+        if len(batch) >= batch_size:
+            flush()
+    flush()
+
+    result.errors.sort(key=lambda e: e.line)
+    return result
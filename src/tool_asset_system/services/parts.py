@@ -6,8 +6,12 @@ import os
 import sqlite3
 from typing import Any
 
-from tool_asset_system.db.db import connect
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.services import dictionaries
 from tool_asset_system.services.idgen import issue_asset_code
+from tool_asset_system.services.log_payload import append_log
+from tool_asset_system.services.paging import SortKey, fetch_page, select_columns
+from tool_asset_system.services.search import search_clause
 
 
 def _actor() -> str:
@@ -26,10 +30,10 @@ def _row_to_dict(row: sqlite3.Row | None) -> dict[str, Any] | None:
 
 
 def _validate_category(con: sqlite3.Connection, layer_code: str, category_code: str | None) -> None:
-    layer = con.execute(
-        "SELECT allow_free_category FROM layers WHERE code = ?",
-        (layer_code,),
-    ).fetchone()
+    # 辞書はキャッシュから引く（version 確認はこのトランザクション内で行う）
+    snap = dictionaries.snapshot(con)
+
+    layer = snap.layers_by_code.get(layer_code)
     if layer is None:
         raise ValueError(f"unknown layer_code={layer_code!r}")
 
@@ -40,11 +44,7 @@ def _validate_category(con: sqlite3.Connection, layer_code: str, category_code:
             raise ValueError("category_code is required for this layer")
         return
 
-    cat = con.execute(
-        "SELECT 1 FROM categories WHERE code = ? AND layer_code = ?",
-        (category_code, layer_code),
-    ).fetchone()
-    if cat is None:
+    if (layer_code, category_code) not in snap.category_keys:
         raise ValueError("category_code not found in categories for the given layer")
 
 
@@ -65,9 +65,7 @@ def add_part(
     if display_name is None or display_name.strip() == "":
         display_name = part_no
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
-
+    with transaction() as con:
         # policy: category_code can be NULL only if allow_free_category=1 for the layer
         _validate_category(con, layer_code=layer_code, category_code=category_code)
 
@@ -97,29 +95,27 @@ def add_part(
             ),
         )
 
-        # operation log (ADD)
+        # operation log (ADD)：最初の版なので FULL で残る
         after = con.execute("SELECT * FROM parts WHERE asset_code = ?", (asset_code,)).fetchone()
-        con.execute(
-            """
-            INSERT INTO operation_logs(
-              action, target_type, target_code,
-              actor, reason,
-              patch_json, before_json, after_json
-            ) VALUES(?,?,?,?,?,?,?,?)
-            """,
-            (
-                "PART_ADD", "PART", asset_code,
-                _actor(), None,
-                json.dumps({"layer_code": layer_code, "category_code": category_code}, ensure_ascii=False),
-                None,
-                json.dumps(_row_to_dict(after), ensure_ascii=False),
-            ),
+        append_log(
+            con,
+            action="PART_ADD", target_type="PART", target_code=asset_code,
+            actor=_actor(),
+            patch={"layer_code": layer_code, "category_code": category_code},
+            state=_row_to_dict(after),
         )
-
-        con.commit()
         return asset_code
 
 
+# API の fields= で指定できる列（id は内部用なので出さない）
+PART_FIELDS = (
+    "asset_code", "layer_code", "category_code", "category_free_text",
+    "part_no", "maker", "maker_part_name", "display_name",
+    "stock_qty", "stock_unit", "pack_qty", "unit_price", "supplier", "lead_time_days", "min_stock_qty",
+    "status", "note", "created_at", "updated_at",
+)
+
+
 def get_part(asset_code: str) -> dict[str, Any]:
     with connect() as con:
         row = con.execute("SELECT * FROM parts WHERE asset_code = ?", (asset_code,)).fetchone()
@@ -128,39 +124,171 @@ def get_part(asset_code: str) -> dict[str, Any]:
         return _row_to_dict(row)  # type: ignore[return-value]
 
 
-def list_parts(
-    layer_code: str | None = None,
-    category_code: str | None = None,
-    status: str | None = None,
-    q: str | None = None,
-    limit: int = 200,
-) -> list[dict[str, Any]]:
-    sql = "SELECT * FROM parts WHERE 1=1"
+def _parts_filters(
+    *,
+    layer_code: str | None,
+    category_code: str | None,
+    status: str | None,
+    q: str | None,
+    like_columns: list[str],
+) -> tuple[str, list[Any], str | None]:
+    """FROM/WHERE（一覧・アーカイブ共通）と、検索時のランク式を返す。"""
+    search = search_clause(q, fts_table="parts_fts", row_id="p.id", like_columns=like_columns)
+
+    sql = "FROM parts p"
     params: list[Any] = []
 
+    if search:
+        sql += search.join
+    sql += " WHERE 1=1"
+
     if layer_code:
-        sql += " AND layer_code = ?"
+        sql += " AND p.layer_code = ?"
         params.append(layer_code)
 
     if category_code:
-        sql += " AND category_code = ?"
+        sql += " AND p.category_code = ?"
         params.append(category_code)
 
     if status:
-        sql += " AND status = ?"
+        sql += " AND p.status = ?"
         params.append(status.upper())
 
-    if q and q.strip():
-        kw = f"%{q.strip()}%"
-        sql += " AND (asset_code LIKE ? OR display_name LIKE ? OR part_no LIKE ? OR maker LIKE ?)"
-        params.extend([kw, kw, kw, kw])
+    if search:
+        sql += search.where
+        params.extend(search.params)
+
+    return sql, params, (search.rank if search else None)
+
+
+# 並び：layer_code → category_code → asset_code（category_code は NULL 可なのでキーでは COALESCE）
+_PARTS_KEYS = [
+    SortKey("p.layer_code"),
+    SortKey("COALESCE(p.category_code, '')"),
+    SortKey("p.asset_code"),
+]
+
+
+def list_parts_page(
+    layer_code: str | None = None,
+    category_code: str | None = None,
+    status: str | None = None,
+    q: str | None = None,
+    limit: int | None = None,
+    after: str | None = None,
+    before: str | None = None,
+    fields: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    キーセットページング版の一覧。fields を渡すとその列だけ SELECT する（PART_FIELDS 内）。
+    返り値: {"rows": [...], "next_cursor": ..., "prev_cursor": ...}
+    """
+    select = select_columns("p", fields, PART_FIELDS)
+    from_where, params, rank = _parts_filters(
+        layer_code=layer_code,
+        category_code=category_code,
+        status=status,
+        q=q,
+        like_columns=["p.asset_code", "p.display_name", "p.part_no", "p.maker", "p.maker_part_name"],
+    )
 
-    sql += " ORDER BY layer_code, category_code, asset_code LIMIT ?"
-    params.append(int(limit))
+    # 検索時は関連度順（bm25）→ 従来の並び
+    keys = ([SortKey(rank)] if rank else []) + _PARTS_KEYS
 
     with connect() as con:
-        rows = con.execute(sql, params).fetchall()
-        return [_row_to_dict(r) for r in rows]  # type: ignore[misc]
+        return fetch_page(
+            con,
+            select=select,
+            from_where=from_where,
+            params=params,
+            keys=keys,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+
+
+def list_parts(
+    layer_code: str | None = None,
+    category_code: str | None = None,
+    status: str | None = None,
+    q: str | None = None,
+    limit: int = 200,
+) -> list[dict[str, Any]]:
+    return list_parts_page(
+        layer_code=layer_code,
+        category_code=category_code,
+        status=status,
+        q=q,
+        limit=limit,
+    )["rows"]
+
+
+def get_parts_bulk(asset_codes: list[str], *, fields: list[str] | None = None) -> dict[str, Any]:
+    """
+    asset_code をまとめて1クエリで引く（json_each と JOIN）。
+    返り値: {"rows": [...（指定順）], "missing": [...]}
+    fields を渡しても asset_code は常に返す（どの行か突き合わせられるように）。
+    """
+    codes = list(dict.fromkeys(c.strip() for c in asset_codes if c and c.strip()))
+    if fields:
+        fields = ["asset_code"] + [f for f in fields if f != "asset_code"]
+    select = select_columns("p", fields, PART_FIELDS)
+    if not codes:
+        return {"rows": [], "missing": []}
+
+    with connect() as con:
+        rows = con.execute(
+            f"""
+            SELECT {select}
+            FROM json_each(?) j
+            JOIN parts p ON p.asset_code = j.value
+            ORDER BY j.key
+            """,
+            (json.dumps(codes),),
+        ).fetchall()
+
+    found = [_row_to_dict(r) for r in rows]
+    hit = {r["asset_code"] for r in found}  # type: ignore[index]
+    return {"rows": found, "missing": [c for c in codes if c not in hit]}
+
+
+def list_archived_parts_page(
+    layer_code: str | None = None,
+    category_code: str | None = None,
+    q: str | None = None,
+    limit: int | None = None,
+    after: str | None = None,
+    before: str | None = None,
+) -> dict[str, Any]:
+    """アーカイブ一覧（最近アーカイブしたもの順）"""
+    from_where, params, rank = _parts_filters(
+        layer_code=layer_code,
+        category_code=category_code,
+        status="ARCHIVED",
+        q=q,
+        like_columns=["p.asset_code", "p.maker", "p.part_no", "p.display_name"],
+    )
+
+    keys = ([SortKey(rank)] if rank else []) + [
+        SortKey("p.updated_at", desc=True),
+        SortKey("p.asset_code"),
+    ]
+
+    with connect() as con:
+        return fetch_page(
+            con,
+            select="""
+            p.asset_code, p.layer_code, p.category_code, p.category_free_text,
+            p.status, p.maker, p.part_no, p.display_name
+            """,
+            from_where=from_where,
+            params=params,
+            keys=keys,
+            limit=limit,
+            after=after,
+            before=before,
+        )
 
 def update_part(
     asset_code: str,
@@ -195,24 +323,25 @@ def update_part(
     set_sql = ", ".join([f"{k} = ?" for k, _ in fields] + ["updated_at = CURRENT_TIMESTAMP"])
     params = [v for _, v in fields] + [asset_code]
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
+    with transaction() as con:
         cur = con.execute(f"UPDATE parts SET {set_sql} WHERE asset_code = ?", params)
         if cur.rowcount != 1:
             raise ValueError(f"part not found: {asset_code}")
 
-        # ここで必ずログを残す（トリガーで既に残してる場合は二重になるので後で整理OK）
-        con.execute(
-            "INSERT INTO operation_logs(action,target_type,target_code,actor) VALUES(?,?,?,?)",
-            ("PART_UPDATE", "PART", asset_code, actor),
+        # ここで必ずログを残す（変更後の行は直前の版との差分で持つ）
+        after = con.execute("SELECT * FROM parts WHERE asset_code = ?", (asset_code,)).fetchone()
+        append_log(
+            con,
+            action="PART_UPDATE", target_type="PART", target_code=asset_code,
+            actor=actor,
+            patch=dict(fields),
+            state=_row_to_dict(after),
         )
-        con.commit()
 
 
 def archive_part(asset_code: str, *, actor: str | None = None) -> None:
     actor = actor or os.environ.get("USERNAME") or "unknown"
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
+    with transaction() as con:
         cur = con.execute(
             "UPDATE parts SET status='ARCHIVED', updated_at=CURRENT_TIMESTAMP WHERE asset_code=?",
             (asset_code,),
@@ -220,28 +349,17 @@ def archive_part(asset_code: str, *, actor: str | None = None) -> None:
         if cur.rowcount != 1:
             raise ValueError(f"part not found: {asset_code}")
 
-        con.execute(
-            "INSERT INTO operation_logs(action,target_type,target_code,actor) VALUES(?,?,?,?)",
-            ("PART_ARCHIVE", "PART", asset_code, actor),
+        after = con.execute("SELECT * FROM parts WHERE asset_code = ?", (asset_code,)).fetchone()
+        append_log(
+            con,
+            action="PART_ARCHIVE", target_type="PART", target_code=asset_code,
+            actor=actor,
+            state=_row_to_dict(after),
         )
-        con.commit()
-
-def _insert_log(con, *, action: str, target_code: str, actor: str, target_type: str = "PART"):
-    cols = [r[1] for r in con.execute("PRAGMA table_info(operation_logs)").fetchall()]  # nameは index=1
-    data = {
-        "action": action,
-        "target_code": target_code,
-        "actor": actor,
-        "target_type": target_type,
-    }
-    use = [k for k in ["action", "target_type", "target_code", "actor"] if k in cols]
-    sql = f"INSERT INTO operation_logs({', '.join(use)}) VALUES({', '.join(['?']*len(use))})"
-    con.execute(sql, [data[k] for k in use])
 
 def restore_part(asset_code: str, *, actor: str | None = None) -> None:
     actor = actor or os.environ.get("USERNAME") or "unknown"
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
+    with transaction() as con:
         cur = con.execute(
             "UPDATE parts SET status='ACTIVE', updated_at=CURRENT_TIMESTAMP WHERE asset_code=?",
             (asset_code,),
@@ -249,8 +367,10 @@ def restore_part(asset_code: str, *, actor: str | None = None) -> None:
         if cur.rowcount != 1:
             raise ValueError(f"part not found: {asset_code}")
 
-        con.execute(
-            "INSERT INTO operation_logs(action,target_type,target_code,actor) VALUES(?,?,?,?)",
-            ("PART_RESTORE", "PART", asset_code, actor),
+        after = con.execute("SELECT * FROM parts WHERE asset_code = ?", (asset_code,)).fetchone()
+        append_log(
+            con,
+            action="PART_RESTORE", target_type="PART", target_code=asset_code,
+            actor=actor,
+            state=_row_to_dict(after),
         )
-        con.commit()
@@ -0,0 +1,128 @@
+# src/tool_asset_system/services/rollup.py
+"""
+所要量展開（BOM rollup）：tooling_lists → assemblies → parts。
+
+- 必要数 = Σ tooling_list_items.qty × assembly_items.qty（part ごと、選んだ全リスト分）
+- 1本の集約SQL（GROUP BY part）で出す：リスト数が増えても Python 側のループは増えない
+- 在庫（stock_qty）と min_stock_qty と比べて不足を出す
+- 行はカーソルから順に返す（CSV はそのままストリームで書き出せる）
+"""
+from __future__ import annotations
+
+import csv
+import io
+import json
+import re
+from typing import Any, Iterable, Iterator
+
+from tool_asset_system.db.db import connect
+from tool_asset_system.services.assemblies import layer_case_sql
+
+COLUMNS = [
+    "asset_code", "layer_code", "category_code",
+    "maker", "part_no", "display_name", "status",
+    "required_qty", "stock_qty", "stock_unit", "min_stock_qty",
+    "remaining_qty", "shortage_qty", "below_min",
+    "list_count", "assembly_count",
+]
+
+
+def parse_list_codes(text: str | None) -> list[str]:
+    """空白 / カンマ / 改行区切りの list_code を重複なしで返す"""
+    return list(dict.fromkeys(c for c in re.split(r"[\s,]+", text or "") if c))
+
+
+def _rollup_sql(shortage_only: bool) -> str:
+    where = (
+        "WHERE req.required_qty > p.stock_qty"
+        " OR (p.min_stock_qty IS NOT NULL AND p.stock_qty - req.required_qty < p.min_stock_qty)"
+        if shortage_only
+        else ""
+    )
+    return f"""
+    WITH sel AS (
+      SELECT t.id
+      FROM tooling_lists t
+      WHERE t.list_code IN (SELECT value FROM json_each(?))
+    ),
+    req AS (
+      SELECT
+        ai.part_id,
+        SUM(tli.qty * ai.qty) AS required_qty,
+        COUNT(DISTINCT tli.tooling_list_id) AS list_count,
+        COUNT(DISTINCT ai.assembly_id) AS assembly_count
+      FROM sel
+      JOIN tooling_list_items tli ON tli.tooling_list_id = sel.id
+      JOIN assembly_items ai ON ai.assembly_id = tli.assembly_id
+      GROUP BY ai.part_id
+    )
+    SELECT
+      p.asset_code, p.layer_code, p.category_code,
+      p.maker, p.part_no, p.display_name, p.status,
+      req.required_qty,
+      p.stock_qty, p.stock_unit, p.min_stock_qty,
+      p.stock_qty - req.required_qty AS remaining_qty,
+      MAX(req.required_qty - p.stock_qty, 0) AS shortage_qty,
+      (p.min_stock_qty IS NOT NULL AND p.stock_qty - req.required_qty < p.min_stock_qty) AS below_min,
+      req.list_count,
+      req.assembly_count
+    FROM req
+    JOIN parts p ON p.id = req.part_id
+    {where}
+    ORDER BY {layer_case_sql("p.layer_code")}, p.asset_code
+    """
+
+
+def iter_rollup(list_codes: Iterable[str], *, shortage_only: bool = False) -> Iterator[dict[str, Any]]:
+    """
+    list_codes の所要量を part ごとに返す（COLUMNS の順のキーを持つ dict）。
+    存在しない list_code があればこの呼び出しの時点で ValueError（ストリームを始める前に分かる）。
+    """
+    codes = list(dict.fromkeys(list_codes))
+    if not codes:
+        raise ValueError("list_codes is empty")
+    codes_json = json.dumps(codes)
+
+    with connect() as con:
+        found = {
+            r["list_code"]
+            for r in con.execute(
+                "SELECT list_code FROM tooling_lists WHERE list_code IN (SELECT value FROM json_each(?))",
+                (codes_json,),
+            ).fetchall()
+        }
+    missing = [c for c in codes if c not in found]
+    if missing:
+        raise ValueError(f"tooling_list not found: {', '.join(missing)}")
+
+    return _iter_rows(codes_json, shortage_only)
+
+
+def _iter_rows(codes_json: str, shortage_only: bool) -> Iterator[dict[str, Any]]:
+    with connect() as con:
+        for r in con.execute(_rollup_sql(shortage_only), (codes_json,)):
+            d = {k: r[k] for k in COLUMNS}
+            d["below_min"] = bool(d["below_min"])
+            yield d
+
+
+def rollup(list_codes: Iterable[str], *, shortage_only: bool = False) -> list[dict[str, Any]]:
+    return list(iter_rollup(list_codes, shortage_only=shortage_only))
+
+
+def iter_csv(rows: Iterable[dict[str, Any]], *, chunk_rows: int = 500) -> Iterator[str]:
+    """rows を CSV 文字列のかたまりで返す（ヘッダ付き / Excel で開けるよう BOM 付き）"""
+    buf = io.StringIO()
+    w = csv.writer(buf)
+    buf.write("\ufeff")
+    w.writerow(COLUMNS)
+
+    n = 0
+    for r in rows:
+        w.writerow([("1" if r[k] else "0") if k == "below_min" else r[k] for k in COLUMNS])
+        n += 1
+        if n % chunk_rows == 0:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+    yield buf.getvalue()
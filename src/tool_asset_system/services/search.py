@@ -0,0 +1,76 @@
+# src/tool_asset_system/services/search.py
+"""
+一覧検索（q=...）の共通部品。FTS5（trigram）インデックスを使う。
+
+- q は空白区切りで AND 検索（各語はどの列に含まれていてもよい）
+- 3文字以上の語 → FTS5 の MATCH（インデックスで引ける。bm25 でランク付け）
+- 2文字以下の語 → trigram では引けないので LIKE（その語だけ従来どおりの部分一致）
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+# trigram tokenizer は3文字未満の語をインデックスから引けない
+MIN_FTS_TERM = 3
+
+
+@dataclass
+class SearchClause:
+    join: str = ""                      # FROM句に足す JOIN（FTSを使わない場合は空）
+    where: str = ""                     # " AND ..." 形式
+    params: list[Any] = field(default_factory=list)
+    rank: str | None = None             # ORDER BY に使うランク式（FTSを使わない場合は None）
+
+
+def split_terms(q: str | None) -> list[str]:
+    if not q:
+        return []
+    return [t for t in q.split() if t]
+
+
+def _fts_phrase(term: str) -> str:
+    # FTS5の構文記号（- : * ^ など）を素の文字列として扱うため、必ず "..." で囲む
+    return '"' + term.replace('"', '""') + '"'
+
+
+def _like_pattern(term: str) -> str:
+    return "%" + term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+def search_clause(
+    q: str | None,
+    *,
+    fts_table: str,
+    row_id: str,
+    like_columns: list[str],
+    alias: str = "f",
+) -> SearchClause | None:
+    """
+    q から検索条件を組み立てる。q が空なら None。
+
+    fts_table:    parts_fts など
+    row_id:       FTSの rowid と突き合わせる本体側の列（例: "p.id"）
+    like_columns: 短い語の LIKE 検索に使う本体側の列
+    """
+    terms = split_terms(q)
+    if not terms:
+        return None
+
+    long_terms = [t for t in terms if len(t) >= MIN_FTS_TERM]
+    short_terms = [t for t in terms if len(t) < MIN_FTS_TERM]
+
+    sc = SearchClause()
+
+    if long_terms:
+        sc.join = f" JOIN {fts_table} {alias} ON {alias}.rowid = {row_id}"
+        sc.where += f" AND {alias}.{fts_table} MATCH ?"
+        sc.params.append(" AND ".join(_fts_phrase(t) for t in long_terms))
+        sc.rank = f"{alias}.rank"
+
+    for t in short_terms:
+        ors = " OR ".join(f"{c} LIKE ? ESCAPE '\\'" for c in like_columns)
+        sc.where += f" AND ({ors})"
+        sc.params.extend([_like_pattern(t)] * len(like_columns))
+
+    return sc
@@ -1,12 +1,17 @@
 # src/tool_asset_system/services/tooling_lists.py
 from __future__ import annotations
 
+import json
+import math
 import os
 import sqlite3
 from typing import Any
 
-from tool_asset_system.db.db import connect
+from tool_asset_system.db.db import connect, transaction
 from tool_asset_system.services.idgen import issue_asset_code
+from tool_asset_system.services.log_payload import append_log
+from tool_asset_system.services.paging import SortKey, fetch_page, select_columns
+from tool_asset_system.services.search import search_clause
 
 
 def _actor() -> str:
@@ -19,13 +24,44 @@ def _row_to_dict(row: sqlite3.Row | None) -> dict[str, Any] | None:
     return {k: row[k] for k in row.keys()}
 
 
+def tooling_list_state(con: sqlite3.Connection, list_code: str) -> dict[str, Any]:
+    """tooling_lists の行 + items（item id -> 中身）。as-of で復元する形"""
+    row = con.execute("SELECT * FROM tooling_lists WHERE list_code=?", (list_code,)).fetchone()
+    if row is None:
+        raise ValueError(f"tooling_list not found: {list_code}")
+    state: dict[str, Any] = _row_to_dict(row)  # type: ignore[assignment]
+    state["items"] = {
+        str(r["id"]): {"assembly_code": r["assembly_code"], "tool_no": r["tool_no"], "qty": r["qty"], "note": r["note"]}
+        for r in con.execute(
+            """
+            SELECT tli.id, a.assembly_code, tli.tool_no, tli.qty, tli.note
+            FROM tooling_list_items tli
+            JOIN assemblies a ON a.id = tli.assembly_id
+            WHERE tli.tooling_list_id = ?
+            ORDER BY tli.id
+            """,
+            (row["id"],),
+        )
+    }
+    return state
+
+
+def _log(con: sqlite3.Connection, action: str, list_code: str, patch: dict[str, Any]) -> None:
+    append_log(
+        con,
+        action=action, target_type="TOOLING_LIST", target_code=list_code,
+        actor=_actor(),
+        patch=patch,
+        state=tooling_list_state(con, list_code),
+    )
+
+
 def add_tooling_list(*, title: str, note: str | None = None) -> str:
     t = (title or "").strip()
     if t == "":
         raise ValueError("title is required")
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
+    with transaction() as con:
         list_code = issue_asset_code(con, layer_code="TL")
 
         con.execute(
@@ -35,10 +71,64 @@ def add_tooling_list(*, title: str, note: str | None = None) -> str:
             """,
             (list_code, t, note),
         )
-        con.commit()
+        _log(con, "TL_ADD", list_code, {"title": t})
+        return list_code
+
+
+class ItemValidationError(ValueError):
+    """items のエラーをまとめて返す（1件目で止めずに全件分）。errors は画面にそのまま出せる文言"""
+
+    def __init__(self, errors: list[str]):
+        super().__init__("; ".join(errors))
+        self.errors = errors
+
+
+def create_tooling_list_with_items(
+    *,
+    title: str,
+    items: list[dict[str, Any]],
+    note: str | None = None,
+) -> str:
+    """
+    tooling_list と items を1トランザクションで作る（途中で失敗したら何も残らない）。
+    items: [{"assembly_code": "...", "tool_no": "...", "qty": 1.0, "note": None}, ...]
+    items の不備は ItemValidationError（errors に1件ずつ）。
+    """
+    t = (title or "").strip()
+    if t == "":
+        raise ValueError("title is required")
+
+    normalized = _normalize_items(items)
+
+    with transaction() as con:
+        asm_ids = _resolve_assembly_ids(con, [ac for ac, _, _, _ in normalized])
+
+        list_code = issue_asset_code(con, layer_code="TL")
+        list_id = con.execute(
+            """
+            INSERT INTO tooling_lists(list_code, title, note)
+            VALUES(?,?,?)
+            RETURNING id
+            """,
+            (list_code, t, note),
+        ).fetchone()["id"]
+
+        con.executemany(
+            """
+            INSERT INTO tooling_list_items(
+              tooling_list_id, assembly_id, tool_no, qty, note
+            ) VALUES(?,?,?,?,?)
+            """,
+            [(list_id, asm_ids[ac], tn, qty, n) for ac, tn, qty, n in normalized],
+        )
+        _log(con, "TL_ADD", list_code, {"title": t, "items": len(normalized)})
         return list_code
 
 
+# API の fields= で指定できる列
+TOOLING_LIST_FIELDS = ("list_code", "title", "note", "created_at", "updated_at")
+
+
 def get_tooling_list(list_code: str) -> dict[str, Any]:
     with connect() as con:
         row = con.execute(
@@ -50,21 +140,55 @@ def get_tooling_list(list_code: str) -> dict[str, Any]:
         return _row_to_dict(row)  # type: ignore[return-value]
 
 
-def list_tooling_lists(*, q: str | None = None, limit: int = 200) -> list[dict[str, Any]]:
-    sql = "SELECT * FROM tooling_lists WHERE 1=1"
+def list_tooling_lists_page(
+    *,
+    q: str | None = None,
+    limit: int | None = None,
+    after: str | None = None,
+    before: str | None = None,
+    fields: list[str] | None = None,
+) -> dict[str, Any]:
+    """
+    キーセットページング版の一覧（更新が新しい順）。fields を渡すとその列だけ SELECT する。
+    返り値: {"rows": [...], "next_cursor": ..., "prev_cursor": ...}
+    """
+    select = select_columns("t", fields, TOOLING_LIST_FIELDS)
+    search = search_clause(
+        q,
+        fts_table="tooling_lists_fts",
+        row_id="t.id",
+        like_columns=["t.list_code", "t.title", "t.note"],
+    )
+
+    from_where = "FROM tooling_lists t"
     params: list[Any] = []
 
-    if q and q.strip():
-        kw = f"%{q.strip()}%"
-        sql += " AND (list_code LIKE ? OR title LIKE ? OR note LIKE ?)"
-        params.extend([kw, kw, kw])
+    if search:
+        from_where += search.join
+    from_where += " WHERE 1=1"
+    if search:
+        from_where += search.where
+        params.extend(search.params)
 
-    sql += " ORDER BY updated_at DESC, list_code DESC LIMIT ?"
-    params.append(int(limit))
+    keys = [SortKey("t.updated_at", desc=True), SortKey("t.list_code", desc=True)]
+    if search and search.rank:
+        keys.insert(0, SortKey(search.rank))
 
     with connect() as con:
-        rows = con.execute(sql, params).fetchall()
-        return [_row_to_dict(r) for r in rows]  # type: ignore[misc]
+        return fetch_page(
+            con,
+            select=select,
+            from_where=from_where,
+            params=params,
+            keys=keys,
+            limit=limit,
+            after=after,
+            before=before,
+        )
+
+
+def list_tooling_lists(*, q: str | None = None, limit: int = 200) -> list[dict[str, Any]]:
+    return list_tooling_lists_page(q=q, limit=limit)["rows"]
 
 
 def update_tooling_list(
@@ -88,9 +212,7 @@ def update_tooling_list(
     if not fields:
         return
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
-
+    with transaction() as con:
         cur = con.execute(
             "SELECT 1 FROM tooling_lists WHERE list_code=?",
             (list_code,),
@@ -105,7 +227,7 @@ def update_tooling_list(
             f"UPDATE tooling_lists SET {set_sql} WHERE list_code = ?",
             params,
         )
-        con.commit()
+        _log(con, "TL_UPDATE", list_code, dict(fields))
 
 
 def _get_tooling_list_id(con: sqlite3.Connection, list_code: str) -> int:
@@ -128,6 +250,89 @@ def _get_assembly_id_by_code(con: sqlite3.Connection, assembly_code: str) -> int
     return int(row["id"])
 
 
+def _resolve_assembly_ids(con: sqlite3.Connection, assembly_codes: list[str]) -> dict[str, int]:
+    """assembly_code -> id を1クエリで引く。無いものがあれば ItemValidationError"""
+    rows = con.execute(
+        """
+        SELECT id, assembly_code
+        FROM assemblies
+        WHERE assembly_code IN (SELECT value FROM json_each(?))
+        """,
+        (json.dumps(assembly_codes),),
+    ).fetchall()
+    found = {r["assembly_code"]: int(r["id"]) for r in rows}
+
+    # assembly_codes は items と同じ並び（_normalize_items を通ったもの）なので、何件目かも付ける
+    missing = [
+        f"item {i} ({ac}): assembly not found"
+        for i, ac in enumerate(assembly_codes, start=1)
+        if ac not in found
+    ]
+    if missing:
+        raise ItemValidationError(missing)
+    return found
+
+
+def _normalize_items(items: list[dict[str, Any]]) -> list[tuple[str, str, float, str | None]]:
+    """
+    items を (assembly_code, tool_no, qty, note) に揃える。
+      - assembly_code / tool_no 必須
+      - qty は数値（未指定 / 空は 1）かつ > 0
+      - エラーはどれも "item {何件目} ({assembly_code}): ..." の形（どの行か画面で分かるように）
+      - 同じリスト内で tool_no / assembly_code の重複なし（UNIQUE に当たる前に分かりやすく）
+    """
+    if not items:
+        raise ItemValidationError(["items is empty"])
+
+    errors: list[str] = []
+    seen_tool_no: set[str] = set()
+    seen_asm: set[str] = set()
+
+    normalized: list[tuple[str, str, float, str | None]] = []
+    for i, it in enumerate(items, start=1):
+        ac = str(it.get("assembly_code") or "").strip()
+        tn = str(it.get("tool_no") or "").strip()
+        qty_raw = it.get("qty", 1.0)
+        n = (str(it.get("note") or "").strip() or None)
+
+        where = f"item {i} ({ac})" if ac else (f"item {i} (tool_no {tn})" if tn else f"item {i}")
+        if ac == "":
+            errors.append(f"{where}: assembly_code is required")
+            continue
+        if tn == "":
+            errors.append(f"{where}: tool_no is required")
+            continue
+
+        if qty_raw is None or (isinstance(qty_raw, str) and qty_raw.strip() == ""):
+            qty = 1.0
+        else:
+            try:
+                qty = float(qty_raw)
+            except (TypeError, ValueError, OverflowError):
+                qty = math.nan
+            if not math.isfinite(qty):
+                errors.append(f"{where}: qty must be a number: {qty_raw!r}")
+                continue
+        if qty <= 0:
+            errors.append(f"{where}: qty must be > 0")
+            continue
+
+        if tn in seen_tool_no:
+            errors.append(f"{where}: duplicate tool_no in the same list: {tn}")
+            continue
+        if ac in seen_asm:
+            errors.append(f"{where}: duplicate assembly_code in the same list")
+            continue
+
+        seen_tool_no.add(tn)
+        seen_asm.add(ac)
+        normalized.append((ac, tn, qty, n))
+
+    if errors:
+        raise ItemValidationError(errors)
+    return normalized
+
+
 def add_tooling_list_item(
     list_code: str,
     *,
@@ -142,9 +347,7 @@ def add_tooling_list_item(
     if qty <= 0:
         raise ValueError("qty must be > 0")
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
-
+    with transaction() as con:
         list_id = _get_tooling_list_id(con, list_code)
         asm_id = _get_assembly_id_by_code(con, assembly_code)
 
@@ -158,13 +361,14 @@ def add_tooling_list_item(
         )
 
         item_id = int(con.execute("SELECT last_insert_rowid() AS id").fetchone()["id"])
-        con.commit()
+        _log(con, "TL_ITEM_ADD", list_code, {
+            "item_id": item_id, "assembly_code": assembly_code, "tool_no": tn, "qty": float(qty), "note": note,
+        })
         return item_id
 
 
 def remove_tooling_list_item(list_code: str, *, item_id: int) -> None:
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
+    with transaction() as con:
         list_id = _get_tooling_list_id(con, list_code)
 
         cur = con.execute(
@@ -173,80 +377,108 @@ def remove_tooling_list_item(list_code: str, *, item_id: int) -> None:
         )
         if cur.rowcount != 1:
             raise ValueError(f"tooling_list_item not found: id={item_id} in {list_code}")
-
-        con.commit()
+        _log(con, "TL_ITEM_REMOVE", list_code, {"item_id": int(item_id)})
 
 
 def replace_tooling_list_items(
     list_code: str,
     *,
     items: list[dict[str, Any]],
-) -> None:
+) -> dict[str, int]:
     """
-    Replace tooling_list_items entirely for a tooling list.
+    Replace tooling_list_items for a tooling list with the payload.
     items: [{"assembly_code": "...", "tool_no": "...", "qty": 1.0}, ...]
     Enforces:
       - tool_no required
       - qty > 0
       - no duplicates (tool_no, assembly_code) inside the payload
-    """
-    # payload validation (friendly errors before hitting UNIQUE)
-    seen_tool_no: set[str] = set()
-    seen_asm: set[str] = set()
-
-    normalized: list[tuple[str, str, float]] = []
-    for it in items:
-        ac = str(it.get("assembly_code") or "").strip()
-        tn = str(it.get("tool_no") or "").strip()
-        qty_raw = it.get("qty", 1.0)
 
-        if ac == "":
-            raise ValueError("assembly_code is required")
-        if tn == "":
-            raise ValueError(f"tool_no is required: {ac}")
-
-        try:
-            qty = float(qty_raw)
-        except Exception:
-            qty = 1.0
-        if qty <= 0:
-            raise ValueError(f"qty must be > 0: {ac}")
-
-        if tn in seen_tool_no:
-            raise ValueError(f"duplicate tool_no in the same list: {tn}")
-        if ac in seen_asm:
-            raise ValueError(f"duplicate assembly_code in the same list: {ac}")
-
-        seen_tool_no.add(tn)
-        seen_asm.add(ac)
-        normalized.append((ac, tn, qty))
+    保存済みの items との差分（追加 / 削除 / tool_no・qty の変更）だけを書き込む。
+    行は assembly で対応付けるので、変わらない行は id も note もそのまま残る。
+    note は payload で指定した場合だけ上書きする。
+    返り値: {"added": n, "removed": n, "updated": n, "unchanged": n}
+    """
+    normalized = _normalize_items(items) if items else []
 
-    with connect() as con:
-        con.execute("BEGIN IMMEDIATE")
+    with transaction() as con:
         list_id = _get_tooling_list_id(con, list_code)
+        asm_ids = _resolve_assembly_ids(con, [ac for ac, _, _, _ in normalized])
+
+        current = {
+            int(r["assembly_id"]): r
+            for r in con.execute(
+                "SELECT id, assembly_id, tool_no, qty, note FROM tooling_list_items WHERE tooling_list_id=?",
+                (list_id,),
+            ).fetchall()
+        }
+
+        wanted: dict[int, tuple[str, float, str | None]] = {
+            asm_ids[ac]: (tn, qty, n) for ac, tn, qty, n in normalized
+        }
+
+        removes = [(int(r["id"]),) for asm_id, r in current.items() if asm_id not in wanted]
+        adds: list[tuple[Any, ...]] = []
+        updates: list[tuple[Any, ...]] = []
+        renumbered: list[tuple[int]] = []
+        unchanged = 0
+
+        for asm_id, (tn, qty, n) in wanted.items():
+            r = current.get(asm_id)
+            if r is None:
+                adds.append((list_id, asm_id, tn, qty, n))
+                continue
+
+            new_note = r["note"] if n is None else n
+            if r["tool_no"] == tn and float(r["qty"]) == qty and r["note"] == new_note:
+                unchanged += 1
+                continue
+
+            updates.append((tn, qty, new_note, int(r["id"])))
+            if r["tool_no"] != tn:
+                renumbered.append((int(r["id"]),))
+
+        if removes:
+            con.executemany("DELETE FROM tooling_list_items WHERE id=?", removes)
+
+        if renumbered:
+            # tool_no の入れ替え（T1<->T2 など）で UNIQUE(tooling_list_id, tool_no) に当たらないよう、
+            # 変更する行はいったん他と重ならない仮番号へ逃がしてから本番の番号を入れる
+            con.executemany(
+                "UPDATE tooling_list_items SET tool_no = char(0) || 'tmp:' || id WHERE id=?",
+                renumbered,
+            )
 
-        # delete all
-        con.execute("DELETE FROM tooling_list_items WHERE tooling_list_id=?", (list_id,))
+        if updates:
+            con.executemany(
+                "UPDATE tooling_list_items SET tool_no=?, qty=?, note=? WHERE id=?",
+                updates,
+            )
 
-        # insert all
-        for (assembly_code, tool_no, qty) in normalized:
-            asm_id = _get_assembly_id_by_code(con, assembly_code)
-            con.execute(
+        if adds:
+            con.executemany(
                 """
                 INSERT INTO tooling_list_items(
-                  tooling_list_id, assembly_id, tool_no, qty
-                ) VALUES(?,?,?,?)
+                  tooling_list_id, assembly_id, tool_no, qty, note
+                ) VALUES(?,?,?,?,?)
                 """,
-                (list_id, asm_id, tool_no, float(qty)),
+                adds,
             )
 
-        # parent updated_at を更新（items変更も更新扱いにする）
-        con.execute(
-            "UPDATE tooling_lists SET updated_at = CURRENT_TIMESTAMP WHERE id=?",
-            (list_id,),
-        )
+        result = {
+            "added": len(adds),
+            "removed": len(removes),
+            "updated": len(updates),
+            "unchanged": unchanged,
+        }
+        if removes or updates or adds:
+            # parent updated_at を更新（items変更も更新扱いにする）
+            con.execute(
+                "UPDATE tooling_lists SET updated_at = CURRENT_TIMESTAMP WHERE id=?",
+                (list_id,),
+            )
+            _log(con, "TL_ITEMS_REPLACE", list_code, result)
 
-        con.commit()
+        return result
 
 
 def list_tooling_list_items(list_code: str, *, limit: int = 500) -> list[dict[str, Any]]:
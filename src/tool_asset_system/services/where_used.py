@@ -0,0 +1,110 @@
+# src/tool_asset_system/services/where_used.py
+"""
+where-used（逆引き）：part → assemblies → tooling_lists。
+
+- part → assemblies は assembly_items(part_id) のインデックス
+- part → tooling_lists は part_where_used（トリガーで差分更新している閉包）
+- bulk 版は json_each で複数 part をまとめて1回で引く（「この300件をアーカイブしたら何に効くか」）
+"""
+from __future__ import annotations
+
+import json
+import sqlite3
+from typing import Any
+
+from tool_asset_system.db.db import connect
+
+
+def _assemblies_for(con: sqlite3.Connection, codes_json: str) -> list[sqlite3.Row]:
+    return con.execute(
+        """
+        SELECT DISTINCT
+          p.asset_code AS part_asset_code,
+          a.assembly_code, a.display_name
+        FROM json_each(?) j
+        JOIN parts p ON p.asset_code = j.value
+        JOIN assembly_items ai ON ai.part_id = p.id
+        JOIN assemblies a ON a.id = ai.assembly_id
+        ORDER BY a.assembly_code, p.asset_code
+        """,
+        (codes_json,),
+    ).fetchall()
+
+
+def _tooling_lists_for(con: sqlite3.Connection, codes_json: str) -> list[sqlite3.Row]:
+    return con.execute(
+        """
+        SELECT
+          p.asset_code AS part_asset_code,
+          t.list_code, t.title, t.updated_at
+        FROM json_each(?) j
+        JOIN parts p ON p.asset_code = j.value
+        JOIN part_where_used w ON w.part_id = p.id
+        JOIN tooling_lists t ON t.id = w.tooling_list_id
+        ORDER BY t.updated_at DESC, t.list_code DESC, p.asset_code
+        """,
+        (codes_json,),
+    ).fetchall()
+
+
+def where_used(asset_code: str) -> dict[str, Any]:
+    """
+    1 part の使用先。
+    返り値: {"assemblies": [{assembly_code, display_name}], "tooling_lists": [{list_code, title, updated_at}]}
+    """
+    codes_json = json.dumps([asset_code])
+    with connect() as con:
+        assemblies = [
+            {"assembly_code": r["assembly_code"], "display_name": r["display_name"]}
+            for r in _assemblies_for(con, codes_json)
+        ]
+        tooling_lists = [
+            {"list_code": r["list_code"], "title": r["title"], "updated_at": r["updated_at"]}
+            for r in _tooling_lists_for(con, codes_json)
+        ]
+    return {"assemblies": assemblies, "tooling_lists": tooling_lists}
+
+
+def where_used_bulk(asset_codes: list[str]) -> dict[str, Any]:
+    """
+    複数 part の影響範囲をまとめて返す。
+    返り値:
+      {
+        "missing": [存在しない asset_code],
+        "assemblies": [{assembly_code, display_name, parts: [asset_code...]}],
+        "tooling_lists": [{list_code, title, updated_at, parts: [asset_code...]}],
+      }
+    """
+    codes = list(dict.fromkeys(c.strip() for c in asset_codes if c and c.strip()))
+    codes_json = json.dumps(codes)
+
+    with connect() as con:
+        found = {
+            r["asset_code"]
+            for r in con.execute(
+                "SELECT asset_code FROM parts WHERE asset_code IN (SELECT value FROM json_each(?))",
+                (codes_json,),
+            ).fetchall()
+        }
+
+        assemblies: dict[str, dict[str, Any]] = {}
+        for r in _assemblies_for(con, codes_json):
+            a = assemblies.setdefault(
+                r["assembly_code"],
+                {"assembly_code": r["assembly_code"], "display_name": r["display_name"], "parts": []},
+            )
+            a["parts"].append(r["part_asset_code"])
+
+        tooling_lists: dict[str, dict[str, Any]] = {}
+        for r in _tooling_lists_for(con, codes_json):
+            t = tooling_lists.setdefault(
+                r["list_code"],
+                {"list_code": r["list_code"], "title": r["title"], "updated_at": r["updated_at"], "parts": []},
+            )
+            t["parts"].append(r["part_asset_code"])
+
+    return {
+        "missing": [c for c in codes if c not in found],
+        "assemblies": list(assemblies.values()),
+        "tooling_lists": list(tooling_lists.values()),
+    }
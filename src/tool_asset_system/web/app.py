@@ -2,19 +2,46 @@
 
 from __future__ import annotations
 
-from flask import Flask
+from flask import Flask, g
 
+from tool_asset_system.db.db import open_unit_of_work
+from tool_asset_system.web.profiler import install_profiler, profile_enabled
 from tool_asset_system.web.routes_parts import bp as parts_bp
 from tool_asset_system.web.routes_api import bp as api_bp
+from tool_asset_system.web.routes_admin import bp as admin_bp
+from tool_asset_system.web.routes_metrics import bp as metrics_bp, install_request_metrics
 from tool_asset_system.web.routes_assemblies import bp as assemblies_bp
 from tool_asset_system.web.routes_tooling_lists import bp as tooling_lists_bp
 
 
-def create_app() -> Flask:
+def create_app(*, profile: bool | None = None) -> Flask:
     app = Flask(__name__)
     app.secret_key = "dev"
     app.register_blueprint(parts_bp)
     app.register_blueprint(api_bp, url_prefix="/api")
     app.register_blueprint(assemblies_bp)
     app.register_blueprint(tooling_lists_bp)
-    return app
\ No newline at end of file
+    app.register_blueprint(admin_bp, url_prefix="/admin")
+    app.register_blueprint(metrics_bp)
+
+    # /metrics 用：リクエスト数とレイテンシ（常時）
+    install_request_metrics(app)
+
+    # SQL件数・時間 / レンダリング時間の計測（opt-in）
+    if profile is None:
+        profile = profile_enabled()
+    if profile:
+        install_profiler(app)
+
+    # 1リクエスト = 1接続 = 1読み取りスナップショット（services は connect() 経由で共有する）
+    @app.before_request
+    def _open_unit_of_work():
+        g.db_uow = open_unit_of_work()
+
+    @app.teardown_request
+    def _close_unit_of_work(exc):
+        uow = g.pop("db_uow", None)
+        if uow is not None:
+            uow.close()
+
+    return app
@@ -0,0 +1,67 @@
+# src/tool_asset_system/web/conditional.py
+"""
+条件付きGET（ETag / If-None-Match）。
+
+- 画面が依存するテーブル群の change_counters（トリガーで +1）から ETag を作る
+- 変わっていなければクエリもテンプレートも走らせずに 304 を返す
+- 確認は change_counters の PK 数行を読むだけ（リクエストの読み取りスナップショット上で）
+- flash メッセージが残っているときは本文が変わるので対象外
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import wraps
+from typing import Any, Callable
+
+from flask import Response, make_response, request, session
+
+from tool_asset_system.db.db import connect
+
+
+def counter_versions(names: tuple[str, ...]) -> dict[str, int]:
+    with connect() as con:
+        rows = con.execute(
+            "SELECT name, version FROM change_counters WHERE name IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(names)),),
+        ).fetchall()
+    return {r["name"]: int(r["version"]) for r in rows}
+
+
+def make_etag(names: tuple[str, ...]) -> str:
+    versions = counter_versions(names)
+    raw = "|".join([request.full_path] + [f"{n}={versions.get(n, 0)}" for n in names])
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:20]
+
+
+def conditional(*counters: str) -> Callable:
+    """
+    GET の view に付ける。counters はその画面が依存する change_counters の name。
+      @bp.get("/parts")
+      @conditional("dict", "parts")
+      def parts_list(): ...
+    """
+    names = tuple(counters)
+
+    def deco(view: Callable) -> Callable:
+        @wraps(view)
+        def wrapper(*args: Any, **kwargs: Any):
+            if request.method != "GET" or session.get("_flashes"):
+                return view(*args, **kwargs)
+
+            etag = make_etag(names)
+            if etag in request.if_none_match:
+                resp = Response(status=304)
+            else:
+                resp = make_response(view(*args, **kwargs))
+                if resp.status_code != 200:
+                    return resp
+
+            resp.set_etag(etag)
+            # 毎回サーバーに確認させる（変わっていなければ 304 で本文なし）
+            resp.headers["Cache-Control"] = "no-cache"
+            return resp
+
+        return wrapper
+
+    return deco
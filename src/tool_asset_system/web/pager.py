@@ -0,0 +1,42 @@
+# src/tool_asset_system/web/pager.py
+"""
+一覧画面のページング（after / before / limit）共通処理。
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from flask import abort, request, url_for
+
+from tool_asset_system.services.paging import clamp_limit, decode_cursor
+
+
+def page_args() -> dict[str, Any]:
+    """request から after / before / limit を取り出す（壊れたカーソルは 400）"""
+    after = request.args.get("after") or None
+    before = request.args.get("before") or None
+    for c in (after, before):
+        if c:
+            try:
+                decode_cursor(c)
+            except ValueError:
+                abort(400)
+    try:
+        limit = clamp_limit(int(request.args.get("limit") or 0))
+    except ValueError:
+        abort(400)
+    return {"after": after, "before": before, "limit": limit}
+
+
+def pager_links(page: dict[str, Any]) -> dict[str, str | None]:
+    """今の絞り込み条件を保ったまま、前/次ページのURLを作る"""
+    base = {k: v for k, v in request.args.to_dict(flat=False).items() if k not in ("after", "before")}
+    view_args = request.view_args or {}
+
+    def link(**cursor: str) -> str:
+        return url_for(request.endpoint or "", **view_args, **base, **cursor)
+
+    return {
+        "prev_url": link(before=page["prev_cursor"]) if page.get("prev_cursor") else None,
+        "next_url": link(after=page["next_cursor"]) if page.get("next_cursor") else None,
+    }
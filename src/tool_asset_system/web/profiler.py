@@ -0,0 +1,178 @@
+# src/tool_asset_system/web/profiler.py
+"""
+リクエスト単位のプロファイラ（opt-in：TOOL_ASSET_PROFILE=1 または create_app(profile=True)）。
+
+1リクエストごとに記録するもの
+- 借りた接続数 / 新しく開いた接続数
+- SQL 文ごとの実行時間（pool の statement listener 経由）
+- テンプレートのレンダリング時間（before_render_template / template_rendered シグナル）
+- 全体の wall time
+
+出力先
+- Server-Timing ヘッダ（ブラウザの開発者ツールで見える）
+- HTML 応答の末尾にデバッグ用フッタ（同じ SQL の繰り返し＝N+1 が回数つきで並ぶ）
+- ロガー "tool_asset_system.web.profiler" に JSON 1行
+"""
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import time
+from collections import Counter
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from flask import Flask, Response, before_render_template, request, template_rendered
+
+from tool_asset_system.db.pool import StatementEvent, add_acquire_listener, add_statement_listener
+
+logger = logging.getLogger(__name__)
+
+# フッタ / ログに出す「繰り返しの多い SQL」の件数
+TOP_STATEMENTS = 10
+
+
+def profile_enabled() -> bool:
+    return os.environ.get("TOOL_ASSET_PROFILE", "").strip().lower() in ("1", "true", "yes", "on")
+
+
+def _normalize_sql(sql: str) -> str:
+    return re.sub(r"\s+", " ", sql).strip()
+
+
+@dataclass
+class RequestProfile:
+    started: float = field(default_factory=time.perf_counter)
+    connections: int = 0
+    opened: int = 0
+    statements: list[tuple[str, float]] = field(default_factory=list)  # (sql, 秒)
+    render: float = 0.0
+    total: float = 0.0
+    _render_started: list[float] = field(default_factory=list)
+
+    @property
+    def sql_count(self) -> int:
+        return len(self.statements)
+
+    @property
+    def sql_time(self) -> float:
+        return sum(t for _, t in self.statements)
+
+    def grouped(self) -> list[dict[str, Any]]:
+        """同じ SQL をまとめて回数・合計時間の多い順に"""
+        counts: Counter[str] = Counter()
+        times: Counter[str] = Counter()
+        for sql, t in self.statements:
+            key = _normalize_sql(sql)
+            counts[key] += 1
+            times[key] += t
+        keys = sorted(counts, key=lambda k: (-counts[k], -times[k]))
+        return [{"sql": k, "count": counts[k], "ms": round(times[k] * 1000, 3)} for k in keys]
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "method": request.method,
+            "path": request.full_path.rstrip("?"),
+            "endpoint": request.endpoint,
+            "connections": self.connections,
+            "opened": self.opened,
+            "sql_count": self.sql_count,
+            "sql_ms": round(self.sql_time * 1000, 3),
+            "render_ms": round(self.render * 1000, 3),
+            "total_ms": round(self.total * 1000, 3),
+        }
+
+
+_current: ContextVar[RequestProfile | None] = ContextVar("tool_asset_profile", default=None)
+
+
+def current_profile() -> RequestProfile | None:
+    return _current.get()
+
+
+# ----------------------------
+# listeners（プロファイル中のリクエストにだけ記録する）
+# ----------------------------
+def _on_statement(ev: StatementEvent) -> None:
+    prof = _current.get()
+    if prof is not None:
+        prof.statements.append((ev.sql, ev.elapsed))
+
+
+def _on_acquire(opened: bool) -> None:
+    prof = _current.get()
+    if prof is not None:
+        prof.connections += 1
+        prof.opened += int(opened)
+
+
+def _on_before_render(sender: Flask, **extra: Any) -> None:
+    prof = _current.get()
+    if prof is not None:
+        prof._render_started.append(time.perf_counter())
+
+
+def _on_rendered(sender: Flask, **extra: Any) -> None:
+    prof = _current.get()
+    if prof is not None and prof._render_started:
+        started = prof._render_started.pop()
+        if not prof._render_started:  # 入れ子の render_template は外側だけ数える
+            prof.render += time.perf_counter() - started
+
+
+def _server_timing(prof: RequestProfile) -> str:
+    return ", ".join(
+        [
+            f'sql;dur={prof.sql_time * 1000:.1f};desc="{prof.sql_count} queries"',
+            f'conn;desc="{prof.connections} acquired / {prof.opened} opened"',
+            f"render;dur={prof.render * 1000:.1f}",
+            f"total;dur={prof.total * 1000:.1f}",
+        ]
+    )
+
+
+def _inject_footer(app: Flask, resp: Response, prof: RequestProfile) -> None:
+    if resp.is_streamed or resp.direct_passthrough or resp.mimetype != "text/html":
+        return
+    body = resp.get_data(as_text=True)
+    idx = body.rfind("</body>")
+    if idx < 0:
+        return
+    # render_template だとシグナルが飛んで自分の計測に混ざるので、jinja_env から直接描画する
+    footer = app.jinja_env.get_template("_profile_footer.html").render(
+        summary=prof.summary(), statements=prof.grouped()[:TOP_STATEMENTS]
+    )
+    resp.set_data(body[:idx] + footer + body[idx:])
+
+
+def install_profiler(app: Flask) -> None:
+    add_statement_listener(_on_statement)
+    add_acquire_listener(_on_acquire)
+    before_render_template.connect(_on_before_render, app)
+    template_rendered.connect(_on_rendered, app)
+
+    @app.before_request
+    def _start_profile():
+        _current.set(RequestProfile())
+
+    @app.after_request
+    def _finish_profile(resp: Response) -> Response:
+        prof = _current.get()
+        if prof is None:
+            return resp
+        prof.total = time.perf_counter() - prof.started
+        resp.headers["Server-Timing"] = _server_timing(prof)
+        _inject_footer(app, resp, prof)
+
+        line = prof.summary()
+        line["status"] = resp.status_code
+        line["top"] = prof.grouped()[:TOP_STATEMENTS]
+        logger.info(json.dumps(line, ensure_ascii=False))
+        return resp
+
+    @app.teardown_request
+    def _clear_profile(exc):
+        _current.set(None)
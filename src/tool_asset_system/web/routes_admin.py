@@ -0,0 +1,53 @@
+#src/tool_asset_system/web/routes_admin.py
+from __future__ import annotations
+
+from flask import Blueprint, abort, flash, render_template, request
+
+from tool_asset_system.db.slowlog import recent_slow_queries, settings, summarize
+from tool_asset_system.services.audit import audit_filter_options, get_audit_log, list_audit_logs_page
+from tool_asset_system.web.pager import page_args, pager_links
+
+bp = Blueprint("admin", __name__)
+
+AUDIT_FILTERS = ("target_type", "target_code", "actor", "action", "date_from", "date_to")
+
+
+@bp.get("/slow_queries")
+def slow_queries():
+    queries = recent_slow_queries()
+    return render_template(
+        "admin_slow_queries.html",
+        settings=settings(),
+        queries=queries,
+        summary=summarize(queries),
+    )
+
+
+@bp.get("/audit")
+def audit_logs():
+    current = {k: (request.args.get(k) or "").strip() or None for k in AUDIT_FILTERS}
+    try:
+        page = list_audit_logs_page(**current, **page_args())
+    except ValueError as e:
+        flash(str(e), "err")
+        page = {"rows": [], "next_cursor": None, "prev_cursor": None}
+    return render_template(
+        "admin_audit.html",
+        rows=page["rows"],
+        current=current,
+        options=audit_filter_options(),
+        pager=pager_links(page),
+    )
+
+
+@bp.get("/audit/<int:log_id>")
+def audit_log_detail(log_id: int):
+    log = get_audit_log(log_id)
+    if log is None:
+        abort(404)
+    before, after = log["before"] or {}, log["after"] or {}
+    changes = [
+        {"key": k, "before": before.get(k), "after": after.get(k), "changed": before.get(k) != after.get(k)}
+        for k in dict.fromkeys([*before, *after])
+    ]
+    return render_template("admin_audit_detail.html", log=log, changes=changes)
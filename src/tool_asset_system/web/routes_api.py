@@ -1,27 +1,228 @@
 #src/tool_asset_system/web/routes_api.py
+"""
+JSON API（/api/...）。
+
+- 一覧はキーセットページング：{"items": [...], "next_cursor": ..., "prev_cursor": ...}
+  次ページは ?after=<next_cursor>、前ページは ?before=<prev_cursor>
+- ?fields=asset_code,display_name で必要な列だけ SELECT する（列名はホワイトリスト）
+- /lookup は多数のコードを1クエリで引く（GET ?codes=a,b,c または POST JSON）
+- /changes は差分同期用の変更フィード（?since=<cursor>&limit=&tables=&wait=<秒> で long-poll）
+"""
 from __future__ import annotations
 
-from flask import Blueprint, request, jsonify
+from typing import Any
+
+from flask import Blueprint, abort, jsonify, request
+from werkzeug.exceptions import HTTPException
 
-from tool_asset_system.db.db import connect
+from tool_asset_system.services.assemblies import (
+    get_assemblies_bulk,
+    list_assemblies_page,
+)
+from tool_asset_system.services.changes import (
+    MAX_WAIT,
+    CursorExpiredError,
+    changes_since,
+    wait_for_changes,
+)
+from tool_asset_system.services.dictionaries import get_categories_for_layer
+from tool_asset_system.services.parts import get_parts_bulk, list_parts_page
+from tool_asset_system.services.tooling_lists import (
+    get_tooling_list,
+    list_tooling_list_items,
+    list_tooling_lists_page,
+)
+from tool_asset_system.web.conditional import conditional
+from tool_asset_system.web.pager import page_args
 
 bp = Blueprint("api", __name__)
 
+# /lookup 1回で受け付けるコード数の上限
+MAX_LOOKUP_CODES = 1000
+
+
+@bp.errorhandler(HTTPException)
+def _json_error(e: HTTPException):
+    return jsonify({"error": e.description}), e.code
+
+
+def _split(values: list[str]) -> list[str]:
+    """?x=a,b&x=c → [a, b, c]"""
+    return [v.strip() for raw in values for v in raw.split(",") if v.strip()]
+
+
+def _public(rows: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """内部 id は API に出さない（fields 未指定で * を読んだとき）"""
+    for r in rows:
+        r.pop("id", None)
+    return rows
+
+
+def _fields() -> list[str] | None:
+    return _split(request.args.getlist("fields")) or None
+
+
+def _page_response(fetch: Any, **filters: Any):
+    try:
+        page = fetch(**filters, **page_args(), fields=_fields())
+    except ValueError as e:
+        abort(400, str(e))
+    return jsonify({"items": _public(page["rows"]), "next_cursor": page["next_cursor"], "prev_cursor": page["prev_cursor"]})
+
+
+def _lookup_args(codes_key: str) -> tuple[list[str], list[str] | None, dict[str, Any]]:
+    """GET ?codes=&fields= / POST {"<codes_key>": [...], "fields": [...]} の両方を受ける"""
+    if request.method == "POST":
+        body = request.get_json(silent=True)
+        if not isinstance(body, dict) or not isinstance(body.get(codes_key), list):
+            abort(400, f"JSON body with {codes_key}: [...] is required")
+        codes = [str(c) for c in body[codes_key]]
+        fields = body.get("fields") or None
+        if fields is not None and not isinstance(fields, list):
+            abort(400, "fields must be a list")
+    else:
+        body = {}
+        codes = _split(request.args.getlist("codes"))
+        fields = _fields()
+
+    if len(codes) > MAX_LOOKUP_CODES:
+        abort(400, f"too many codes (max {MAX_LOOKUP_CODES})")
+    return codes, fields, body
+
+
 @bp.get("/categories")
+@conditional("dict")
 def categories():
     layer = request.args.get("layer")
     if not layer:
         return jsonify([])
 
-    with connect() as con:
-        rows = con.execute(
-            """
-            SELECT code,label,is_active
-            FROM categories
-            WHERE layer_code = ?
-            ORDER BY sort_order, code
-            """,
-            (layer,),
-        ).fetchall()
-
-    return jsonify([dict(r) for r in rows])
+    rows = get_categories_for_layer(layer)
+    return jsonify([{"code": r["code"], "label": r["label"], "is_active": r["is_active"]} for r in rows])
+
+
+# ============================================================
+# Parts
+# ============================================================
+
+@bp.get("/parts")
+@conditional("parts")
+def parts():
+    return _page_response(
+        list_parts_page,
+        layer_code=request.args.get("layer") or None,
+        category_code=request.args.get("category") or None,
+        status=request.args.get("status") or None,
+        q=request.args.get("q") or None,
+    )
+
+
+@bp.route("/parts/lookup", methods=["GET", "POST"])
+@conditional("parts")
+def parts_lookup():
+    codes, fields, _ = _lookup_args("asset_codes")
+    try:
+        found = get_parts_bulk(codes, fields=fields)
+    except ValueError as e:
+        abort(400, str(e))
+    return jsonify({"items": _public(found["rows"]), "missing": found["missing"]})
+
+
+@bp.get("/parts/<asset_code>")
+@conditional("parts")
+def part(asset_code: str):
+    try:
+        found = get_parts_bulk([asset_code], fields=_fields())
+    except ValueError as e:
+        abort(400, str(e))
+    if not found["rows"]:
+        abort(404, f"part not found: {asset_code}")
+    return jsonify(_public(found["rows"])[0])
+
+
+# ============================================================
+# Assemblies
+# ============================================================
+
+@bp.get("/assemblies")
+@conditional("assemblies")
+def assemblies():
+    return _page_response(list_assemblies_page, q=request.args.get("q") or None)
+
+
+@bp.route("/assemblies/lookup", methods=["GET", "POST"])
+@conditional("parts", "assemblies")
+def assemblies_lookup():
+    codes, fields, body = _lookup_args("assembly_codes")
+    include = body.get("include") if request.method == "POST" else _split(request.args.getlist("include"))
+    try:
+        found = get_assemblies_bulk(codes, fields=fields, with_items="items" in (include or []))
+    except ValueError as e:
+        abort(400, str(e))
+    return jsonify({"items": _public(found["rows"]), "missing": found["missing"]})
+
+
+@bp.get("/assemblies/<assembly_code>")
+@conditional("parts", "assemblies")
+def assembly(assembly_code: str):
+    try:
+        found = get_assemblies_bulk([assembly_code], fields=_fields(), with_items=True)
+    except ValueError as e:
+        abort(400, str(e))
+    if not found["rows"]:
+        abort(404, f"assembly not found: {assembly_code}")
+    return jsonify(_public(found["rows"])[0])
+
+
+# ============================================================
+# Tooling lists
+# ============================================================
+
+@bp.get("/tooling_lists")
+@conditional("tooling_lists")
+def tooling_lists():
+    return _page_response(list_tooling_lists_page, q=request.args.get("q") or None)
+
+
+@bp.get("/tooling_lists/<list_code>")
+@conditional("assemblies", "tooling_lists")
+def tooling_list(list_code: str):
+    try:
+        tl = get_tooling_list(list_code)
+        items = list_tooling_list_items(list_code)
+    except ValueError as e:
+        abort(404, str(e))
+    tl.pop("id", None)
+    tl["items"] = [{k: v for k, v in it.items() if k != "item_id"} for it in items]
+    return jsonify(tl)
+
+
+# ============================================================
+# Changes（変更フィード）
+# ============================================================
+
+@bp.get("/changes")
+def changes():
+    """
+    ?since=<next_cursor>（初回は 0、または全件エクスポート前に控えた head）
+    ?wait=<秒> を付けると、since より新しい変更が無いとき最大その秒数（上限 MAX_WAIT）待ってから返す
+    410 が返ったら since が古すぎる（全件取り直し）
+    """
+    since = request.args.get("since", "0")
+    tables = _split(request.args.getlist("tables")) or None
+    try:
+        wait = float(request.args.get("wait") or 0)
+    except ValueError:
+        abort(400, "wait must be a number")
+    try:
+        # 待つのは読み取りスナップショットを張る前（待った後の変更が見えるように）
+        if wait > 0:
+            wait_for_changes(since, min(wait, MAX_WAIT))
+        page = changes_since(since, limit=request.args.get("limit"), tables=tables)
+    except CursorExpiredError as e:
+        abort(410, str(e))
+    except ValueError as e:
+        abort(400, str(e))
+    resp = jsonify(page)
+    resp.headers["Cache-Control"] = "no-store"
+    return resp
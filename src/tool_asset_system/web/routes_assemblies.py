@@ -3,18 +3,19 @@ from __future__ import annotations
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 
-from tool_asset_system.db.db import connect
-from tool_asset_system.services.parts import list_parts
+from tool_asset_system.services.parts import list_parts_page
+from tool_asset_system.services.dictionaries import get_layers, get_categories_for_layer, get_label_maps
+from tool_asset_system.web.conditional import conditional
+from tool_asset_system.web.pager import page_args, pager_links
 from tool_asset_system.services.assemblies import (
-    add_assembly,
-    list_assemblies,
+    create_assembly_with_items,
+    list_assemblies_page,
     get_assembly,
     update_assembly,
     list_assembly_items,
-    add_assembly_item,
     remove_assembly_item,
     update_assembly_item,  # ★追加
-    make_signature_from_items,
+    find_assembly_by_parts,
 )
 
 bp = Blueprint("assemblies", __name__)
@@ -23,44 +24,6 @@ bp = Blueprint("assemblies", __name__)
 # =========================
 # Dict helpers (SSOT)
 # =========================
-def _get_layers():
-    with connect() as con:
-        return con.execute(
-            "SELECT code,label,allow_free_category FROM layers ORDER BY sort_order"
-        ).fetchall()
-
-
-def _get_categories_for_layer(layer_code: str):
-    with connect() as con:
-        return con.execute(
-            """
-            SELECT code,label,is_active
-            FROM categories
-            WHERE layer_code = ?
-            ORDER BY sort_order, code
-            """,
-            (layer_code,),
-        ).fetchall()
-
-
-def _get_label_maps():
-    """表示用：code -> label（辞書テーブルがSSOT）"""
-    with connect() as con:
-        layer_labels = {
-            r["code"]: r["label"]
-            for r in con.execute("SELECT code,label FROM layers").fetchall()
-        }
-        category_labels = {
-            r["code"]: r["label"]
-            for r in con.execute("SELECT code,label FROM categories").fetchall()
-        }
-        status_labels = {
-            r["code"]: r["label"]
-            for r in con.execute("SELECT code,label FROM statuses").fetchall()
-        }
-    return layer_labels, category_labels, status_labels
-
-
 def _role_choices_by_layer() -> dict[str, list[str]]:
     return {
         "HOLDER": ["HOLDER"],
@@ -79,8 +42,13 @@ def _role_choices_by_layer() -> dict[str, list[str]]:
 @bp.get("/assemblies")
 def assemblies_list():
     q = request.args.get("q") or None
-    rows = list_assemblies(q=q, limit=500)
-    return render_template("assemblies_list.html", rows=rows, current={"q": q})
+    page = list_assemblies_page(q=q, **page_args())
+    return render_template(
+        "assemblies_list.html",
+        rows=page["rows"],
+        current={"q": q},
+        pager=pager_links(page),
+    )
 
 
 @bp.route("/assemblies/new", methods=["GET", "POST"])
@@ -90,21 +58,24 @@ def assemblies_new():
     status = request.values.get("status") or "ACTIVE"
     q = request.values.get("q") or ""
 
-    layers = _get_layers()
-    categories = _get_categories_for_layer(layer) if layer else []
+    layers = get_layers()
+    categories = get_categories_for_layer(layer) if layer else []
 
-    parts_rows = list_parts(
+    parts_page = list_parts_page(
         layer_code=layer or None,
         category_code=category or None,
         status=status or None,
         q=q or None,
-        limit=500,
+        **page_args(),
     )
+    parts_rows = parts_page["rows"]
+    pager = pager_links(parts_page)
 
-    layer_labels, category_labels, status_labels = _get_label_maps()
+    layer_labels, category_labels, status_labels = get_label_maps()
     role_choices_by_layer = _role_choices_by_layer()
 
     created = request.args.get("created")
+    duplicates: list[dict] = []
 
     if request.method == "POST":
         action = (request.form.get("action") or "").strip() or "create"
@@ -137,6 +108,7 @@ def assemblies_new():
                 categories=categories,
                 current={"layer": layer, "category": category, "status": status, "q": q},
                 parts_rows=parts_rows,
+                pager=pager,
                 layer_labels=layer_labels,
                 category_labels=category_labels,
                 status_labels=status_labels,
@@ -145,27 +117,35 @@ def assemblies_new():
             )
 
         try:
-            code = add_assembly(
-                display_name=display_name,
-                tool_overall_length=to_float_or_none(tol_s),
-                tool_diameter=to_float_or_none(td_s),
-                note=note,
-            )
-
+            items = []
             for ac in selected_parts:
                 role = (request.form.get(f"role_{ac}") or "").strip() or None
                 qty_s = (request.form.get(f"qty_{ac}") or "1").strip()
                 qty = float(qty_s) if qty_s != "" else 1.0
-                add_assembly_item(code, part_asset_code=ac, qty=qty, role=role)
-
-            if display_name is None:
-                items = list_assembly_items(code)
-                sig = make_signature_from_items(items)
-                if sig:
-                    update_assembly(code, display_name=sig)
+                items.append({"part_asset_code": ac, "qty": qty, "role": role})
+
+            # 同じ parts 構成の ASM が既にあれば警告（確認チェック付きで再送信すれば作成する）
+            if request.form.get("confirm_duplicate") != "1":
+                duplicates = find_assembly_by_parts(selected_parts)
+
+            if duplicates:
+                flash(
+                    "同じ parts 構成の ASM が既にあります："
+                    + ", ".join(d["assembly_code"] for d in duplicates)
+                    + "（それでも作成する場合は確認にチェック）",
+                    "err",
+                )
+            else:
+                code = create_assembly_with_items(
+                    items=items,
+                    display_name=display_name,
+                    tool_overall_length=to_float_or_none(tol_s),
+                    tool_diameter=to_float_or_none(td_s),
+                    note=note,
+                )
 
-            flash(f"Created: {code}", "ok")
-            return redirect(url_for("assemblies.assemblies_new", created=code, reset=1))
+                flash(f"Created: {code}", "ok")
+                return redirect(url_for("assemblies.assemblies_new", created=code, reset=1))
 
         except Exception as e:
             flash(str(e), "err")
@@ -177,15 +157,18 @@ def assemblies_new():
         categories=categories,
         current={"layer": layer, "category": category, "status": status, "q": q},
         parts_rows=parts_rows,
+        pager=pager,
         layer_labels=layer_labels,
         category_labels=category_labels,
         status_labels=status_labels,
         role_choices_by_layer=role_choices_by_layer,
         created=created,
+        duplicates=duplicates,
     )
 
 
 @bp.get("/assemblies/<assembly_code>")
+@conditional("dict", "parts", "assemblies")
 def assembly_detail(assembly_code: str):
     try:
         assembly = get_assembly(assembly_code)
@@ -193,9 +176,9 @@ def assembly_detail(assembly_code: str):
         abort(404)
 
     items = list_assembly_items(assembly_code, limit=500)
-    signature = make_signature_from_items(items)
+    signature = assembly.get("signature") or ""
 
-    layer_labels, category_labels, _status_labels = _get_label_maps()
+    layer_labels, category_labels, _status_labels = get_label_maps()
 
     return render_template(
         "assemblies_detail.html",
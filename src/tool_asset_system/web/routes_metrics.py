@@ -0,0 +1,105 @@
+#src/tool_asset_system/web/routes_metrics.py
+"""
+/metrics（Prometheus テキスト形式）。
+
+- リクエスト数（blueprint × status）とレイテンシのヒストグラム（endpoint 別）は常時集計
+- DBファイル / WAL のサイズと主要テーブルの行数は scrape 時に取る
+  - parts / assemblies / tooling_lists は change_counters の version が変わったときだけ COUNT(*) し直す
+  - operation_logs は追記のみなので、増えた分（id > 前回の最大）だけ数える（先頭が消えたら数え直す）
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any
+
+from flask import Blueprint, Flask, Response, g, request
+
+from tool_asset_system import metrics
+from tool_asset_system.db.db import connect, get_pool
+from tool_asset_system.web.conditional import counter_versions
+
+bp = Blueprint("metrics", __name__)
+
+# テーブル -> 行数キャッシュの鍵にする change_counters.name
+COUNTED_TABLES = {"parts": "parts", "assemblies": "assemblies", "tooling_lists": "tooling_lists"}
+
+_row_counts: dict[tuple[str, str], tuple[Any, int]] = {}
+_row_counts_lock = threading.Lock()
+
+
+def install_request_metrics(app: Flask) -> None:
+    @app.before_request
+    def _metrics_start():
+        g._metrics_started = time.perf_counter()
+
+    @app.after_request
+    def _metrics_observe(resp: Response) -> Response:
+        started = g.pop("_metrics_started", None)
+        if started is not None:
+            metrics.HTTP_LATENCY.observe(time.perf_counter() - started, request.endpoint or "unmatched")
+        metrics.HTTP_REQUESTS.inc(request.blueprint or "app", str(resp.status_code))
+        return resp
+
+
+def _cached(path: str, table: str, key: Any, count: Any) -> int:
+    with _row_counts_lock:
+        hit = _row_counts.get((path, table))
+    if hit is not None and hit[0] == key:
+        return hit[1]
+    n = int(count(hit))
+    with _row_counts_lock:
+        _row_counts[(path, table)] = (key, n)
+    return n
+
+
+def table_row_counts() -> dict[str, int]:
+    path = str(get_pool().path)
+    versions = counter_versions(tuple(COUNTED_TABLES.values()))
+    out: dict[str, int] = {}
+    with connect() as con:
+        for table, counter in COUNTED_TABLES.items():
+            out[table] = _cached(
+                path,
+                table,
+                versions.get(counter, 0),
+                lambda _hit, t=table: con.execute(f"SELECT COUNT(*) FROM {t}").fetchone()[0],
+            )
+
+        lo, hi = con.execute("SELECT MIN(id), MAX(id) FROM operation_logs").fetchone()
+
+        def count_logs(hit: tuple[Any, int] | None) -> int:
+            if hit is not None and hit[0][0] == lo and hit[0][1] is not None and hi is not None and hi >= hit[0][1]:
+                added = con.execute("SELECT COUNT(*) FROM operation_logs WHERE id > ?", (hit[0][1],)).fetchone()[0]
+                return hit[1] + added
+            return con.execute("SELECT COUNT(*) FROM operation_logs").fetchone()[0]
+
+        out["operation_logs"] = _cached(path, "operation_logs", (lo, hi), count_logs)
+    return out
+
+
+def db_file_sizes() -> dict[str, int]:
+    path = get_pool().path
+    sizes = {}
+    for name, p in (("db", path), ("wal", path.with_name(path.name + "-wal"))):
+        try:
+            sizes[name] = os.path.getsize(p)
+        except OSError:
+            sizes[name] = 0
+    return sizes
+
+
+@bp.get("/metrics")
+def metrics_endpoint():
+    pool = get_pool()
+    lines = list(metrics.render_registry())
+    lines += metrics.render_gauge("tool_asset_db_file_bytes", "SQLite database / WAL file size.", "file", db_file_sizes())
+    lines += metrics.render_gauge("tool_asset_table_rows", "Row count per table.", "table", table_row_counts())
+    lines += metrics.render_gauge(
+        "tool_asset_db_pool_connections",
+        "Pooled connections by state.",
+        "state",
+        {"idle": pool.idle_count(), "checked_out": pool.stats["checked_out"]},
+    )
+    return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
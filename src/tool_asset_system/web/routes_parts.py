@@ -4,53 +4,21 @@ from __future__ import annotations
 
 from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
 
-from tool_asset_system.db.db import connect
+from tool_asset_system.db.db import connect, table_columns
 from tool_asset_system.services.parts import update_part, archive_part, restore_part
-from tool_asset_system.services.parts import add_part, list_parts
+from tool_asset_system.services.parts import add_part, list_parts_page, list_archived_parts_page
+from tool_asset_system.services.dictionaries import get_layers, get_categories_for_layer, get_label_maps
+from tool_asset_system.services.part_import import import_parts, iter_upload_rows
+from tool_asset_system.services.where_used import where_used
+from tool_asset_system.services.log_archive import log_history
+from tool_asset_system.web.conditional import conditional
+from tool_asset_system.web.pager import page_args, pager_links
 
 
 bp = Blueprint("parts", __name__)
 
-
-def _get_layers():
-    with connect() as con:
-        return con.execute(
-            "SELECT code,label,allow_free_category FROM layers ORDER BY sort_order"
-        ).fetchall()
-
-
-def _get_categories_for_layer(layer_code: str):
-    with connect() as con:
-        return con.execute(
-            """
-            SELECT code,label,is_active
-            FROM categories
-            WHERE layer_code = ?
-            ORDER BY sort_order, code
-            """,
-            (layer_code,),
-        ).fetchall()
-
-
-def _get_label_maps():
-    """
-    表示用：code -> label の辞書をまとめて返す。
-    DB上のSSOT（辞書テーブル）をそのままUIへ渡す。
-    """
-    with connect() as con:
-        layer_labels = {
-            r["code"]: r["label"]
-            for r in con.execute("SELECT code,label FROM layers").fetchall()
-        }
-        category_labels = {
-            r["code"]: r["label"]
-            for r in con.execute("SELECT code,label FROM categories").fetchall()
-        }
-        status_labels = {
-            r["code"]: r["label"]
-            for r in con.execute("SELECT code,label FROM statuses").fetchall()
-        }
-    return layer_labels, category_labels, status_labels
+# 取り込み結果画面に出すエラー行の上限（全件は CLI の parts import で確認する）
+IMPORT_ERRORS_SHOWN = 200
 
 
 @bp.get("/")
@@ -59,6 +27,7 @@ def home():
 
 
 @bp.get("/parts")
+@conditional("dict", "parts")
 def parts_list():
     layer = request.args.get("layer") or None
     category = request.args.get("category") or None
@@ -67,11 +36,12 @@ def parts_list():
         status = "ACTIVE"
     q = request.args.get("q") or None
 
-    rows = list_parts(layer_code=layer, category_code=category, status=status, q=q, limit=500)
-    layers = _get_layers()
-    categories = _get_categories_for_layer(layer) if layer else []
+    page = list_parts_page(layer_code=layer, category_code=category, status=status, q=q, **page_args())
+    rows = page["rows"]
+    layers = get_layers()
+    categories = get_categories_for_layer(layer) if layer else []
 
-    layer_labels, category_labels, status_labels = _get_label_maps()
+    layer_labels, category_labels, status_labels = get_label_maps()
 
     return render_template(
         "parts_list.html",
@@ -79,6 +49,7 @@ def parts_list():
         layers=layers,
         categories=categories,
         current=dict(layer=layer, category=category, status=status, q=q),
+        pager=pager_links(page),
         layer_labels=layer_labels,
         category_labels=category_labels,
         status_labels=status_labels,
@@ -87,8 +58,8 @@ def parts_list():
 
 @bp.route("/parts/new", methods=["GET", "POST"])
 def parts_new():
-    layers = _get_layers()
-    layer_labels, category_labels, status_labels = _get_label_maps()
+    layers = get_layers()
+    layer_labels, category_labels, status_labels = get_label_maps()
 
     if request.method == "POST":
         layer = (request.form.get("layer") or "").strip()
@@ -119,7 +90,7 @@ def parts_new():
 
     # GET or error re-render
     selected_layer = request.values.get("layer") or (layers[0]["code"] if layers else None)
-    categories = _get_categories_for_layer(selected_layer) if selected_layer else []
+    categories = get_categories_for_layer(selected_layer) if selected_layer else []
 
     return render_template(
         "parts_new.html",
@@ -133,6 +104,40 @@ def parts_new():
     )
 
 
+@bp.route("/parts/import", methods=["GET", "POST"])
+def parts_import():
+    result = None
+
+    if request.method == "POST":
+        f = request.files.get("file")
+        dry_run = request.form.get("dry_run") == "1"
+        encoding = (request.form.get("encoding") or "utf-8-sig").strip()
+
+        if f is None or not f.filename:
+            flash("file is required", "err")
+        else:
+            try:
+                result = import_parts(
+                    iter_upload_rows(f.stream, f.filename, encoding=encoding),
+                    dry_run=dry_run,
+                    reason=f"import:{f.filename}",
+                )
+                if dry_run:
+                    flash(f"Dry run: {result.ok} ok / {len(result.errors)} errors (of {result.total})", "ok")
+                else:
+                    flash(f"Imported: {result.inserted} parts / {len(result.errors)} errors (of {result.total})", "ok")
+            except (ValueError, RuntimeError, UnicodeDecodeError) as e:
+                flash(str(e), "err")
+
+    return render_template(
+        "parts_import.html",
+        result=result,
+        errors=(result.errors[:IMPORT_ERRORS_SHOWN] if result else []),
+        errors_shown=IMPORT_ERRORS_SHOWN,
+        form=request.form,
+    )
+
+
 @bp.get("/parts/<asset_code>")
 def part_detail(asset_code: str):
     with connect() as con:
@@ -159,27 +164,19 @@ def part_detail(asset_code: str):
             abort(404)
 
         # operation_logs の列は将来変わる可能性があるので、存在する列だけ表示する
-        cols = [r["name"] for r in con.execute("PRAGMA table_info(operation_logs)").fetchall()]
+        cols = table_columns("operation_logs")
         want = ["id", "action", "target_code", "actor", "created_at"]
         select_cols = [c for c in want if c in cols]
-        if not select_cols:
-            logs = []
-        else:
-            sql = f"""
-            SELECT {", ".join(select_cols)}
-            FROM operation_logs
-            WHERE target_code = ?
-            ORDER BY id DESC
-            LIMIT 50
-            """
-            logs = con.execute(sql, (asset_code,)).fetchall()
+        # 古いログはアーカイブDBへ移っていることがある（log_history が必要なときだけ ATTACH して引く）
+        logs = log_history("PART", asset_code, limit=50, columns=select_cols) if select_cols else []
 
-    layer_labels, category_labels, status_labels = _get_label_maps()
+    layer_labels, category_labels, status_labels = get_label_maps()
 
     return render_template(
         "parts_detail.html",
         part=part,
         logs=logs,
+        used=where_used(asset_code),
         layer_labels=layer_labels,
         category_labels=category_labels,
         status_labels=status_labels,
@@ -228,7 +225,7 @@ def part_edit(asset_code: str):
     if part is None:
         abort(404)
 
-    layer_labels, category_labels, status_labels = _get_label_maps()
+    layer_labels, category_labels, status_labels = get_label_maps()
 
     return render_template(
         "parts_edit.html",
@@ -252,38 +249,24 @@ def parts_archived():
     category = request.args.get("category") or ""
     q = request.args.get("q") or ""
 
-    with connect() as con:
-        categories = _get_categories_for_layer(layer) if layer else []
-
-        sql = """
-        SELECT asset_code, layer_code, category_code, category_free_text,
-               status, maker, part_no, display_name
-        FROM parts
-        WHERE status = 'ARCHIVED'
-        """
-        params = []
-        if layer:
-            sql += " AND layer_code = ?"
-            params.append(layer)
-        if category:
-            sql += " AND category_code = ?"
-            params.append(category)
-        if q:
-            sql += " AND (asset_code LIKE ? OR maker LIKE ? OR part_no LIKE ? OR display_name LIKE ?)"
-            like = f"%{q}%"
-            params += [like, like, like, like]
-
-        sql += " ORDER BY updated_at DESC, asset_code"
-        rows = con.execute(sql, params).fetchall()
-
-    layer_labels, category_labels, status_labels = _get_label_maps()
+    categories = get_categories_for_layer(layer) if layer else []
+    page = list_archived_parts_page(
+        layer_code=layer or None,
+        category_code=category or None,
+        q=q or None,
+        **page_args(),
+    )
+    rows = page["rows"]
+
+    layer_labels, category_labels, status_labels = get_label_maps()
 
     return render_template(
         "parts_archived.html",
         rows=rows,
-        layers=_get_layers(),
+        layers=get_layers(),
         categories=categories,
         current={"layer": layer, "category": category, "status": "ARCHIVED", "q": q},
+        pager=pager_links(page),
         layer_labels=layer_labels,
         category_labels=category_labels,
         status_labels=status_labels,
@@ -1,28 +1,45 @@
 # src/tool_asset_system/web/routes_tooling_lists.py
 from __future__ import annotations
 
-from flask import Blueprint, render_template, request, redirect, url_for, flash, abort
+from flask import Blueprint, Response, render_template, request, redirect, url_for, flash, abort, stream_with_context
 
-from tool_asset_system.services.assemblies import list_assemblies
+from tool_asset_system.services.assemblies import list_assemblies_page
 from tool_asset_system.services.tooling_lists import (
-    add_tooling_list,
-    list_tooling_lists,
+    ItemValidationError,
+    create_tooling_list_with_items,
+    list_tooling_lists_page,
     get_tooling_list,
     update_tooling_list,
-    add_tooling_list_item,
     remove_tooling_list_item,
     list_tooling_list_items,
     replace_tooling_list_items,
 )
+from tool_asset_system.services.rollup import iter_csv, iter_rollup, parse_list_codes
+from tool_asset_system.web.conditional import conditional
+from tool_asset_system.web.pager import page_args, pager_links
 
 bp = Blueprint("tooling_lists", __name__)
 
 
+def _flash_error(e: Exception) -> None:
+    # items のエラーは1件ずつ出す（どのASM / tool_no が悪いか分かるように）
+    if isinstance(e, ItemValidationError):
+        for msg in e.errors:
+            flash(msg, "err")
+    else:
+        flash(str(e), "err")
+
+
 @bp.get("/tooling_lists")
 def tooling_lists_list():
     q = request.args.get("q") or None
-    rows = list_tooling_lists(q=q, limit=500)
-    return render_template("tooling_lists_list.html", rows=rows, current={"q": q})
+    page = list_tooling_lists_page(q=q, **page_args())
+    return render_template(
+        "tooling_lists_list.html",
+        rows=page["rows"],
+        current={"q": q},
+        pager=pager_links(page),
+    )
 
 
 # ============================================================
@@ -32,7 +49,9 @@ def tooling_lists_list():
 def tooling_lists_new():
     # assemblies 検索（GET）
     q = request.values.get("q") or ""
-    asm_rows = list_assemblies(q=q or None, limit=500)
+    asm_page = list_assemblies_page(q=q or None, **page_args())
+    asm_rows = asm_page["rows"]
+    pager = pager_links(asm_page)
 
     created = request.args.get("created")  # GET only
 
@@ -52,6 +71,7 @@ def tooling_lists_new():
                 existing_items=[],
                 current={"q": q},
                 asm_rows=asm_rows,
+                pager=pager,
                 form=request.form,
                 created=created,
             )
@@ -66,6 +86,7 @@ def tooling_lists_new():
                 existing_items=[],
                 current={"q": q},
                 asm_rows=asm_rows,
+                pager=pager,
                 form=request.form,
                 created=created,
             )
@@ -82,30 +103,26 @@ def tooling_lists_new():
                 existing_items=[],
                 current={"q": q},
                 asm_rows=asm_rows,
+                pager=pager,
                 form=request.form,
                 created=created,
             )
 
         try:
-            list_code = add_tooling_list(title=title, note=note)
-
+            items = []
             for ac in selected_asms:
                 tool_no = (request.form.get(f"tool_no_{ac}") or "").strip()
-                qty_s = (request.form.get(f"qty_{ac}") or "1").strip()
-                qty = float(qty_s) if qty_s != "" else 1.0
-
-                add_tooling_list_item(
-                    list_code,
-                    assembly_code=ac,
-                    tool_no=tool_no,
-                    qty=qty,
-                )
+                # 数値の確認は service 側（何件目のどの値かをエラーにする）
+                qty = (request.form.get(f"qty_{ac}") or "").strip()
+                items.append({"assembly_code": ac, "tool_no": tool_no, "qty": qty})
+
+            list_code = create_tooling_list_with_items(title=title, note=note, items=items)
 
             flash(f"Created: {list_code}", "ok")
             return redirect(url_for("tooling_lists.tooling_lists_new", created=list_code, reset=1))
 
         except Exception as e:
-            flash(str(e), "err")
+            _flash_error(e)
 
     return render_template(
         "tooling_lists_new.html",
@@ -115,15 +132,50 @@ def tooling_lists_new():
         existing_items=[],
         current={"q": q},
         asm_rows=asm_rows,
+        pager=pager,
         form=request.form,
         created=created,
     )
 
 
+# ============================================================
+# Rollup（所要量展開）
+# ============================================================
+@bp.get("/tooling_lists/rollup")
+def tooling_lists_rollup():
+    lists_text = request.args.get("lists") or ""
+    codes = parse_list_codes(lists_text)
+    shortage_only = request.args.get("shortage_only") == "1"
+
+    rows = []
+    if codes:
+        try:
+            it = iter_rollup(codes, shortage_only=shortage_only)
+        except ValueError as e:
+            flash(str(e), "err")
+        else:
+            if request.args.get("format") == "csv":
+                return Response(
+                    stream_with_context(iter_csv(it)),
+                    mimetype="text/csv",
+                    headers={"Content-Disposition": "attachment; filename=rollup.csv"},
+                )
+            rows = list(it)
+
+    return render_template(
+        "tooling_lists_rollup.html",
+        rows=rows,
+        codes=codes,
+        shortage_count=sum(1 for r in rows if r["shortage_qty"] > 0),
+        current={"lists": lists_text, "shortage_only": shortage_only},
+    )
+
+
 # ============================================================
 # Detail
 # ============================================================
 @bp.get("/tooling_lists/<list_code>")
+@conditional("assemblies", "tooling_lists")
 def tooling_list_detail(list_code: str):
     try:
         tl = get_tooling_list(list_code)
@@ -172,7 +224,9 @@ def tooling_list_edit(list_code: str):
 
     # assemblies 検索（GET）
     q = request.values.get("q") or ""
-    asm_rows = list_assemblies(q=q or None, limit=500)
+    asm_page = list_assemblies_page(q=q or None, **page_args())
+    asm_rows = asm_page["rows"]
+    pager = pager_links(asm_page)
 
     # 既存 items（bootstrap用）
     existing_items = list_tooling_list_items(list_code, limit=500)
@@ -193,6 +247,7 @@ def tooling_list_edit(list_code: str):
                 existing_items=existing_items,
                 current={"q": q},
                 asm_rows=asm_rows,
+                pager=pager,
                 form=request.form,
                 created=None,
             )
@@ -207,6 +262,7 @@ def tooling_list_edit(list_code: str):
                 existing_items=existing_items,
                 current={"q": q},
                 asm_rows=asm_rows,
+                pager=pager,
                 form=request.form,
                 created=None,
             )
@@ -223,6 +279,7 @@ def tooling_list_edit(list_code: str):
                 existing_items=existing_items,
                 current={"q": q},
                 asm_rows=asm_rows,
+                pager=pager,
                 form=request.form,
                 created=None,
             )
@@ -231,8 +288,7 @@ def tooling_list_edit(list_code: str):
         new_items = []
         for ac in selected_asms:
             tool_no = (request.form.get(f"tool_no_{ac}") or "").strip()
-            qty_s = (request.form.get(f"qty_{ac}") or "1").strip()
-            qty = float(qty_s) if qty_s != "" else 1.0
+            qty = (request.form.get(f"qty_{ac}") or "").strip()
             new_items.append({"assembly_code": ac, "tool_no": tool_no, "qty": qty})
 
         try:
@@ -245,7 +301,7 @@ def tooling_list_edit(list_code: str):
             flash("Saved.", "ok")
             return redirect(url_for("tooling_lists.tooling_list_detail", list_code=list_code))
         except Exception as e:
-            flash(str(e), "err")
+            _flash_error(e)
 
     # GET
     return render_template(
@@ -256,6 +312,7 @@ def tooling_list_edit(list_code: str):
         existing_items=existing_items,
         current={"q": q},
         asm_rows=asm_rows,
+        pager=pager,
         form=request.form,
         created=None,
     )
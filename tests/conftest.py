@@ -0,0 +1,31 @@
+#tests/conftest.py
+"""
+テスト共通の準備。
+- src/ を import パスに載せる（PYTHONPATH 未設定でも動くように）
+- db: 一時ディレクトリに migrations を全部適用したDBを作り、接続プールをそこへ向ける
+"""
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+
+import pytest
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+if str(SRC) not in sys.path:
+    sys.path.insert(0, str(SRC))
+
+
+@pytest.fixture()
+def db(tmp_path):
+    from tool_asset_system.db import db as db_mod
+    from tool_asset_system.db.scripts.manage import upgrade
+
+    path = tmp_path / "tool_asset.db"
+    upgrade(path)
+
+    original = db_mod.DB_PATH
+    pool = db_mod.configure_pool(path)
+    yield path
+    pool.close()
+    db_mod.configure_pool(original)
@@ -0,0 +1,64 @@
+#tests/test_api.py
+"""
+JSON API：カーソルページング / fields= 射影 / コードまとめ引き。
+"""
+from __future__ import annotations
+
+from tool_asset_system.services.assemblies import create_assembly_with_items
+from tool_asset_system.services.parts import add_part
+from tool_asset_system.services.tooling_lists import create_tooling_list_with_items
+from tool_asset_system.web.app import create_app
+
+
+def test_parts_paging_and_fields(db):
+    c = create_app().test_client()
+    codes = [add_part("SCREW", None, f"M{i}", "M") for i in range(5)]
+
+    r = c.get("/api/parts?layer=SCREW&limit=2&fields=asset_code,part_no")
+    body = r.get_json()
+    assert r.status_code == 200
+    assert [it["asset_code"] for it in body["items"]] == codes[:2]
+    assert set(body["items"][0]) == {"asset_code", "part_no"}
+    assert body["prev_cursor"] is None
+
+    seen = [it["asset_code"] for it in body["items"]]
+    while body["next_cursor"]:
+        body = c.get(f"/api/parts?layer=SCREW&limit=2&fields=asset_code&after={body['next_cursor']}").get_json()
+        seen += [it["asset_code"] for it in body["items"]]
+    assert seen == codes
+
+    # 全列のときも内部 id は出さない
+    assert "id" not in c.get(f"/api/parts/{codes[0]}").get_json()
+
+    r = c.get("/api/parts?fields=asset_code,id")
+    assert r.status_code == 400
+    assert "unknown field: id" in r.get_json()["error"]
+    assert c.get("/api/parts?after=@@@").status_code == 400
+    assert c.get("/api/parts/NOPE").status_code == 404
+
+
+def test_bulk_lookup(db):
+    c = create_app().test_client()
+    holder = add_part("HOLDER", "COLLET_CHUCK", "BT40", "M")
+    insert = add_part("INSERT", "MILLING_INSERT", "APMT", "M")
+
+    r = c.post("/api/parts/lookup", json={"asset_codes": [insert, "NOPE", holder, insert], "fields": ["display_name"]})
+    body = r.get_json()
+    assert [it["asset_code"] for it in body["items"]] == [insert, holder]  # 指定順・重複除去
+    assert set(body["items"][0]) == {"asset_code", "display_name"}
+    assert body["missing"] == ["NOPE"]
+
+    assert c.get(f"/api/parts/lookup?codes={holder},{insert}").get_json()["missing"] == []
+    assert c.post("/api/parts/lookup", json={"codes": []}).status_code == 400
+
+    asm = create_assembly_with_items(items=[{"part_asset_code": insert, "qty": 4}, {"part_asset_code": holder}])
+    body = c.get(f"/api/assemblies/lookup?codes={asm}&include=items&fields=display_name").get_json()
+    assert body["items"][0]["assembly_code"] == asm
+    assert [(it["asset_code"], it["qty"]) for it in body["items"][0]["items"]] == [(holder, 1), (insert, 4)]
+    assert "items" not in c.get(f"/api/assemblies/lookup?codes={asm}").get_json()["items"][0]
+
+    tl = create_tooling_list_with_items(title="T", items=[{"assembly_code": asm, "tool_no": "1"}])
+    detail = c.get(f"/api/tooling_lists/{tl}").get_json()
+    assert detail["list_code"] == tl
+    assert [it["assembly_code"] for it in detail["items"]] == [asm]
+    assert c.get("/api/tooling_lists?fields=list_code,title").get_json()["items"] == [{"list_code": tl, "title": "T"}]
@@ -0,0 +1,151 @@
+#tests/test_as_of.py
+"""
+as of：operation_logs から、ある時点の part / assembly / tooling_list を復元する。
+assemblies / tooling_lists も書き込みごとに状態をログに残す。
+"""
+from __future__ import annotations
+
+import pytest
+
+from tool_asset_system.cli import main
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.services import log_payload as lp
+from tool_asset_system.services.as_of import assembly_as_of, part_as_of, state_as_of, tooling_list_as_of
+from tool_asset_system.services.assemblies import (
+    add_assembly_item,
+    create_assembly_with_items,
+    remove_assembly_item,
+    update_assembly,
+    update_assembly_item,
+)
+from tool_asset_system.services.log_archive import archive_logs
+from tool_asset_system.services.parts import add_part, update_part
+from tool_asset_system.services.tooling_lists import (
+    add_tooling_list_item,
+    create_tooling_list_with_items,
+    replace_tooling_list_items,
+    update_tooling_list,
+)
+
+
+def _stamp(created_at: str) -> None:
+    """まだ日付を付けていないログ（今日の日付のもの）を created_at にする"""
+    with transaction() as con:
+        con.execute("UPDATE operation_logs SET created_at = ? WHERE created_at >= date('now')", (created_at,))
+
+
+@pytest.fixture()
+def history(db):
+    screw = add_part("SCREW", None, "M3", "M")
+    holder = add_part("HOLDER", "COLLET_CHUCK", "BT40", "M")
+    asm = create_assembly_with_items(items=[{"part_asset_code": screw, "qty": 2}], display_name="A")
+    other = create_assembly_with_items(items=[{"part_asset_code": holder}], display_name="B")
+    tl = create_tooling_list_with_items(title="T", items=[{"assembly_code": other, "tool_no": "10"}])
+    _stamp("2025-03-01 09:00:00")
+
+    update_part(screw, note="march")
+    add_assembly_item(asm, part_asset_code=holder)
+    add_tooling_list_item(tl, assembly_code=asm, tool_no="2")
+    _stamp("2025-03-15 12:00:00")
+
+    update_part(screw, note="april")
+    update_assembly(asm, display_name="A2")
+    with connect() as con:
+        screw_item = con.execute(
+            "SELECT ai.id FROM assembly_items ai JOIN parts p ON p.id = ai.part_id WHERE p.asset_code = ?", (screw,)
+        ).fetchone()["id"]
+    update_assembly_item(asm, item_id=screw_item, qty=3)
+    update_tooling_list(tl, title="T2")
+    replace_tooling_list_items(tl, items=[{"assembly_code": asm, "tool_no": "5"}])
+    _stamp("2025-04-10 08:00:00")
+    return screw, holder, asm, tl, screw_item
+
+
+def test_part_as_of(history):
+    screw, *_ = history
+    assert part_as_of(screw, "2025-02-28") is None
+    assert part_as_of(screw, "2025-03-01")["note"] is None
+    assert part_as_of(screw, "2025-03-15 11:59")["note"] is None
+    assert part_as_of(screw, "2025-03-15 12:00")["note"] == "march"
+    assert part_as_of(screw, "2025-03-31")["note"] == "march"
+    assert part_as_of(screw, "2099-01-01")["note"] == "april"
+    with pytest.raises(ValueError):
+        part_as_of(screw, "2025/03/01")
+    with pytest.raises(ValueError):
+        state_as_of("NOPE", screw, "2025-03-01")
+
+
+def test_assembly_and_tooling_list_as_of(history):
+    screw, holder, asm, tl, screw_item = history
+
+    a = assembly_as_of(asm, "2025-03-01")
+    assert a["assembly"]["display_name"] == "A"
+    assert [(i["part_asset_code"], i["qty"]) for i in a["items"]] == [(screw, 2.0)]
+
+    a = assembly_as_of(asm, "2025-03-20")
+    # 並びは list_assembly_items と同じ（layer 順）。part も同じ時点の状態
+    assert [i["part_asset_code"] for i in a["items"]] == [holder, screw]
+    assert a["items"][1]["part"]["note"] == "march"
+
+    a = assembly_as_of(asm, "2025-04-30")
+    assert a["assembly"]["display_name"] == "A2"
+    assert {i["item_id"]: i["qty"] for i in a["items"]}[screw_item] == 3.0
+    assert a["items"][1]["part"]["note"] == "april"
+
+    t = tooling_list_as_of(tl, "2025-03-20")
+    assert t["tooling_list"]["title"] == "T"
+    assert [i["tool_no"] for i in t["items"]] == ["2", "10"]
+    assert t["items"][0]["assembly"]["display_name"] == "A"
+    assert "items" not in t["items"][0]["assembly"]
+
+    t = tooling_list_as_of(tl, "2025-04-30")
+    assert t["tooling_list"]["title"] == "T2"
+    assert [(i["tool_no"], i["assembly"]["display_name"]) for i in t["items"]] == [("5", "A2")]
+
+    assert tooling_list_as_of(tl, "2025-01-01") is None
+
+
+def test_removed_items_and_archived_logs(history):
+    screw, holder, asm, tl, screw_item = history
+    remove_assembly_item(asm, item_id=screw_item)
+    _stamp("2025-05-01 00:00:00")
+    assert [i["part_asset_code"] for i in assembly_as_of(asm, "2025-05-01")["items"]] == [holder]
+
+    # 古いログはアーカイブへ。as of はそちらからも引ける
+    archive_logs("2025-04-01")
+    a = assembly_as_of(asm, "2025-03-20")
+    assert [i["part_asset_code"] for i in a["items"]] == [holder, screw]
+    assert a["items"][1]["part"]["note"] == "march"
+    assert assembly_as_of(asm, "2025-05-01")["assembly"]["display_name"] == "A2"
+
+
+def test_rebuild_reads_at_most_one_checkpoint_span(db):
+    asm = create_assembly_with_items(items=[{"part_asset_code": add_part("SCREW", None, "M3", "M")}])
+    for n in range(lp.CHECKPOINT_EVERY * 2 + 3):
+        update_assembly(asm, note=f"n{n}")
+    with connect() as con:
+        kinds = [r[0] for r in con.execute(
+            "SELECT payload_kind FROM operation_logs WHERE target_code = ? ORDER BY id", (asm,)
+        )]
+        # 最新の状態に要るのは最後の FULL 以降だけ
+        tail = len(kinds) - max(i for i, k in enumerate(kinds) if k == "FULL")
+    assert kinds.count("FULL") == 3 and tail <= lp.CHECKPOINT_EVERY
+    assert state_as_of("ASSEMBLY", asm, "2099-01-01")["note"] == f"n{lp.CHECKPOINT_EVERY * 2 + 2}"
+
+
+def test_nested_patch_roundtrip():
+    a = {"title": "T", "items": {"1": {"qty": 1.0, "note": None}, "2": {"qty": 2.0}}}
+    b = {"title": "T", "items": {"1": {"qty": 3.0, "note": None}, "3": {"qty": 1.0}}}
+    ops = lp.diff(a, b)
+    # 変わった item の中の値だけを書く
+    assert {o["path"] for o in ops} == {"/items/1/qty", "/items/2", "/items/3"}
+    assert lp.apply(a, ops) == b
+    assert a["items"]["1"]["qty"] == 1.0
+
+
+def test_cli_asof(history, capsys):
+    _, _, asm, _, _ = history
+    main(["asof", "assembly", asm, "--at", "2025-03-01"])
+    assert '"display_name": "A"' in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        main(["asof", "part", "NOPE", "--at", "2025-03-01"])
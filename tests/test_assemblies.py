@@ -0,0 +1,88 @@
+#tests/test_assemblies.py
+"""
+assembly の作成：items まで1トランザクション（失敗時は何も残らない）。
+signature：items の変更で更新され、インデックスで構成一致を引ける。
+"""
+from __future__ import annotations
+
+import pytest
+
+from tool_asset_system.db.db import connect
+from tool_asset_system.services.assemblies import (
+    add_assembly_item,
+    create_assembly_with_items,
+    find_assembly_by_parts,
+    get_assembly,
+    list_assembly_items,
+    remove_assembly_item,
+)
+from tool_asset_system.services.parts import add_part
+
+
+def test_create_with_items_sets_signature_name(db):
+    screw = add_part("SCREW", None, "M3", "M")
+    holder = add_part("HOLDER", "COLLET_CHUCK", "BT40", "M")
+
+    code = create_assembly_with_items(
+        items=[
+            {"part_asset_code": screw, "qty": 2, "role": "SCREW"},
+            {"part_asset_code": holder},
+        ],
+        tool_diameter=10.0,
+    )
+
+    a = get_assembly(code)
+    assert a["display_name"] == f"{holder}_{screw}"
+    assert a["tool_diameter"] == 10.0
+    items = list_assembly_items(code)
+    assert [(i["asset_code"], i["qty"], i["role"]) for i in items] == [
+        (holder, 1.0, None),
+        (screw, 2.0, "SCREW"),
+    ]
+
+
+def test_create_with_unknown_part_leaves_nothing(db):
+    screw = add_part("SCREW", None, "M3", "M")
+
+    with pytest.raises(ValueError, match="part not found: NOPE_1"):
+        create_assembly_with_items(
+            items=[{"part_asset_code": screw}, {"part_asset_code": "NOPE_1"}],
+            display_name="X",
+        )
+
+    with connect() as con:
+        assert con.execute("SELECT count(*) FROM assemblies").fetchone()[0] == 0
+        assert con.execute("SELECT count(*) FROM assembly_items").fetchone()[0] == 0
+        assert con.execute("SELECT next_no FROM id_sequences WHERE layer_code = 'ASM'").fetchone()[0] == 1
+
+
+def test_signature_is_maintained_and_indexed_lookup(db):
+    screw = add_part("SCREW", None, "M3", "M")
+    holder = add_part("HOLDER", "COLLET_CHUCK", "BT40", "M")
+    insert = add_part("INSERT", "MILLING_INSERT", "APMT", "M")
+
+    code = create_assembly_with_items(
+        items=[{"part_asset_code": screw}, {"part_asset_code": holder}],
+        display_name="named",
+    )
+    assert get_assembly(code)["signature"] == f"{holder}_{screw}"
+    assert [a["assembly_code"] for a in find_assembly_by_parts([screw, holder])] == [code]
+    assert find_assembly_by_parts([holder]) == []
+    assert find_assembly_by_parts([holder, "NOPE_1"]) == []
+
+    item_id = add_assembly_item(code, part_asset_code=insert)
+    assert get_assembly(code)["signature"] == f"{holder}_{insert}_{screw}"
+    assert find_assembly_by_parts([screw, holder]) == []
+    assert [a["assembly_code"] for a in find_assembly_by_parts([insert, screw, holder])] == [code]
+
+    remove_assembly_item(code, item_id=item_id)
+    for it in list_assembly_items(code):
+        remove_assembly_item(code, item_id=it["item_id"])
+    assert get_assembly(code)["signature"] is None
+
+    with connect() as con:
+        plan = " ".join(
+            r["detail"]
+            for r in con.execute("EXPLAIN QUERY PLAN SELECT * FROM assemblies WHERE signature = ?", ("x",))
+        )
+    assert "idx_assemblies_signature" in plan
@@ -0,0 +1,119 @@
+#tests/test_audit.py
+"""
+監査ログ検索：対象 / actor / action / 日付で絞り込み、新しい順のキーセットページング。一覧はインデックスだけで返る。
+"""
+from __future__ import annotations
+
+import pytest
+
+from tool_asset_system.db import db as db_mod
+from tool_asset_system.db.db import connect, table_columns, transaction
+from tool_asset_system.services.audit import (
+    AUDIT_COLUMNS,
+    audit_filter_options,
+    get_audit_log,
+    list_audit_logs_page,
+)
+from tool_asset_system.services.parts import add_part, archive_part, update_part
+from tool_asset_system.web.app import create_app
+
+
+@pytest.fixture()
+def logs(db):
+    a = add_part("SCREW", None, "M3", "M")
+    b = add_part("SCREW", None, "M4", "M")
+    for n in range(5):
+        update_part(a, note=f"n{n}", actor="alice")
+    archive_part(b, actor="bob")
+    with transaction() as con:
+        # 日付はばらしておく（同じ日時の行もつくって id で並ぶことを見る）
+        con.execute("UPDATE operation_logs SET created_at = '2025-03-01 09:00:00' WHERE action = 'PART_ADD'")
+        con.execute(
+            "UPDATE operation_logs SET created_at = '2025-03-0' || (id % 3 + 2) || ' 10:00:00' WHERE action = 'PART_UPDATE'"
+        )
+        con.execute("UPDATE operation_logs SET created_at = '2025-04-01 08:00:00' WHERE action = 'PART_ARCHIVE'")
+    return a, b
+
+
+def _all(**filters):
+    rows, after = [], None
+    while True:
+        page = list_audit_logs_page(limit=2, after=after, **filters)
+        rows += page["rows"]
+        after = page["next_cursor"]
+        if not after:
+            return rows
+
+
+def test_filters_and_keyset_order(logs):
+    a, b = logs
+    with connect() as con:
+        expected = [
+            dict(r)
+            for r in con.execute(
+                f"SELECT {', '.join(AUDIT_COLUMNS)} FROM operation_logs ORDER BY created_at DESC, id DESC"
+            )
+        ]
+    assert _all() == expected
+
+    assert [r["action"] for r in _all(actor="bob")] == ["PART_ARCHIVE"]
+    assert {r["target_code"] for r in _all(target_type="PART", target_code=a)} == {a}
+    assert len(_all(target_code=a)) == 6
+    assert len(_all(action="PART_UPDATE", actor="alice")) == 5
+    march = _all(date_from="2025-03-02", date_to="2025-03-03")
+    assert march and all("2025-03-02" <= r["created_at"] < "2025-03-04" for r in march)
+
+    # 前ページへ戻る
+    p1 = list_audit_logs_page(limit=3)
+    p2 = list_audit_logs_page(limit=3, after=p1["next_cursor"])
+    assert list_audit_logs_page(limit=3, before=p2["prev_cursor"])["rows"] == p1["rows"]
+
+    opts = audit_filter_options()
+    assert opts["actions"] == ["PART_ADD", "PART_ARCHIVE", "PART_UPDATE"]
+    assert opts["target_types"] == ["PART"]
+
+    with pytest.raises(ValueError):
+        list_audit_logs_page(date_from="2025/03/01")
+
+
+def test_list_query_uses_covering_index(logs):
+    with connect() as con:
+        for where, params in (
+            ("l.actor = ?", ["x"]),
+            ("l.action = ?", ["x"]),
+            ("l.target_type = ? AND l.target_code = ?", ["x", "y"]),
+            ("l.created_at >= ?", ["2025"]),
+        ):
+            plan = con.execute(
+                f"EXPLAIN QUERY PLAN SELECT {', '.join('l.' + c for c in AUDIT_COLUMNS)} FROM operation_logs l "
+                f"WHERE {where} AND (l.created_at, l.id) < (?, ?) ORDER BY l.created_at DESC, l.id DESC LIMIT 10",
+                [*params, "9", 1 << 40],
+            ).fetchall()
+            detail = " / ".join(r[3] for r in plan)
+            assert "COVERING INDEX" in detail and "TEMP B-TREE" not in detail, detail
+
+
+def test_detail_and_pages(logs):
+    a, _ = logs
+    row = _all(target_code=a, action="PART_UPDATE")[0]
+    log = get_audit_log(row["id"])
+    assert log["before"]["note"] != log["after"]["note"]
+    assert get_audit_log(10**9) is None
+
+    client = create_app().test_client()
+    r = client.get("/admin/audit?actor=alice&limit=2")
+    assert r.status_code == 200 and "after=" in r.get_data(as_text=True)
+    r = client.get(f"/admin/audit/{row['id']}")
+    assert r.status_code == 200 and log["after"]["note"] in r.get_data(as_text=True)
+    assert client.get("/admin/audit?date_from=bad").status_code == 200
+    assert client.get("/admin/audit/999999").status_code == 404
+
+
+def test_table_columns_cached_per_process(db):
+    db_mod._columns.clear()
+    cols = table_columns("operation_logs")
+    assert "payload" in cols
+    with transaction() as con:
+        con.execute("ALTER TABLE operation_logs ADD COLUMN extra TEXT")
+    # 再起動するまで引き直さない
+    assert table_columns("operation_logs") is cols
@@ -0,0 +1,102 @@
+#tests/test_benchmarks.py
+"""
+ベンチマーク用データ生成：シードが同じなら同じ中身、比率どおりの件数、整合性が取れていること。
+"""
+from __future__ import annotations
+
+import json
+import random
+
+import pytest
+
+from benchmarks.bench_services import _cases, _measure
+from benchmarks.datagen import DatasetSpec, ensure_dataset, generate
+
+from tool_asset_system.db.db import connect
+
+
+def _fingerprint() -> tuple:
+    with connect() as con:
+        return (
+            con.execute("SELECT COUNT(*) FROM parts").fetchone()[0],
+            con.execute("SELECT COUNT(*) FROM assemblies WHERE signature IS NOT NULL").fetchone()[0],
+            con.execute("SELECT COUNT(*) FROM tooling_lists").fetchone()[0],
+            con.execute("SELECT group_concat(display_name, '|') FROM (SELECT display_name FROM parts ORDER BY id LIMIT 20)").fetchone()[0],
+            con.execute("SELECT SUM(part_id * qty) FROM assembly_items").fetchone()[0],
+            con.execute("SELECT COUNT(*), SUM(ref_count) FROM part_where_used").fetchone()[:],
+        )
+
+
+def test_datagen_is_seeded_and_consistent(db, tmp_path):
+    spec = DatasetSpec(parts=300, seed=7)
+    generate(tmp_path / "a.db", spec, quiet=True)
+    fp = _fingerprint()
+    assert fp[:3] == (300, spec.assemblies, spec.tooling_lists)
+    assert fp[5][0] > 0  # where-used はトリガーで埋まっている
+
+    generate(tmp_path / "b.db", spec, quiet=True)
+    assert _fingerprint() == fp
+
+    cases = _cases(random.Random(0))
+    r = _measure("tiny", "replace_tooling_list_items", cases["replace_tooling_list_items"], repeat=2, warmup=1)
+    assert r.repeat == 2 and r.min_ms <= r.median_ms
+
+
+def test_ensure_dataset_regenerates_when_migrations_change(db, tmp_path):
+    path = ensure_dataset(300, seed=3, directory=tmp_path, quiet=True)
+    meta = path.with_name(path.name + ".json")
+    stamp = path.stat().st_mtime_ns
+    assert ensure_dataset(300, seed=3, directory=tmp_path, quiet=True) == path
+    assert path.stat().st_mtime_ns == stamp
+
+    # 後から migration が増えた（古いスキーマのまま残っている）データセットは作り直す
+    old = json.loads(meta.read_text(encoding="utf-8"))
+    meta.write_text(json.dumps({**old, "migrations": old["migrations"][:-1]}), encoding="utf-8")
+    ensure_dataset(300, seed=3, directory=tmp_path, quiet=True)
+    assert path.stat().st_mtime_ns != stamp
+    assert json.loads(meta.read_text(encoding="utf-8")) == old
+
+
+def test_loadtest_runs_locally_and_reports_percentiles(db, tmp_path):
+    from benchmarks.loadtest import _percentile, _run_process, parse_mix, summarize
+
+    assert _percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.0
+    assert _percentile([float(i) for i in range(1, 101)], 99) == 99.0
+
+    path = generate(tmp_path / "load.db", DatasetSpec(parts=300, seed=1), quiet=True)
+    samples, _ = _run_process(str(path), 2, parse_mix("browse=1,assembly=1,edit=1"), 1, 0.3)
+    stats = {s.route: s for s in summarize(samples, 0.3)}
+
+    assert stats["ALL"].count == len(samples) > 0
+    assert stats["ALL"].error_rate == 0
+    assert stats["ALL"].p50_ms <= stats["ALL"].p95_ms <= stats["ALL"].p99_ms <= stats["ALL"].max_ms
+
+
+def test_loadtest_times_each_request_and_records_errors_per_route():
+    import sqlite3
+    import time
+
+    from benchmarks.loadtest import SCENARIOS, RouteFailed
+
+    class Resp:
+        status_code = 200
+        data = b'<a href="/parts?layer=X&amp;after=abc">next</a>'
+
+        def get_data(self, as_text=False):
+            return self.data.decode()
+
+    class Client:
+        def get(self, url, **kw):
+            if "after=" in url:
+                raise sqlite3.OperationalError("database is locked")
+            time.sleep(0.03)
+            return Resp()
+
+    rng = random.Random()
+    rng.random = lambda: 0.0  # 必ず次ページへ進む
+    with pytest.raises(RouteFailed) as ei:
+        SCENARIOS["browse"](Client(), rng, {})
+    # 1本目は自分の時間、例外は2本目のルートの失敗
+    ((route, ms, ok, _),) = ei.value.done
+    assert (route, ok) == ("parts_list", True) and ms >= 30
+    assert ei.value.route == "parts_list_next" and ei.value.ms < 30
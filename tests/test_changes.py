@@ -0,0 +1,141 @@
+#tests/test_changes.py
+"""
+変更フィード：parts / assemblies / tooling_lists（items 含む）の書き込みがトリガーで change_log に積まれ、
+カーソル（seq）から差分だけ取れる。同じ行の連続変更は1件にまとまる。
+"""
+from __future__ import annotations
+
+import json
+import time
+
+import pytest
+
+from tool_asset_system.cli import main
+from tool_asset_system.db.db import transaction
+from tool_asset_system.services.assemblies import (
+    create_assembly_with_items,
+    remove_assembly_item,
+    update_assembly,
+)
+from tool_asset_system.services.changes import (
+    CursorExpiredError,
+    changes_since,
+    head_cursor,
+    prune_changes,
+    wait_for_changes,
+)
+from tool_asset_system.services.parts import add_part, update_part
+from tool_asset_system.services.tooling_lists import create_tooling_list_with_items, replace_tooling_list_items
+from tool_asset_system.web.app import create_app
+
+
+def _pull(since=0, **kw):
+    out = []
+    while True:
+        page = changes_since(since, **kw)
+        out += page["changes"]
+        since = page["next_cursor"]
+        if not page["has_more"]:
+            return out, since
+
+
+def test_feed_covers_all_tables_and_coalesces(db):
+    assert head_cursor() == 0
+    screw = add_part("SCREW", None, "M3", "M")
+    asm = create_assembly_with_items(items=[{"part_asset_code": screw, "qty": 2}], display_name="A")
+    tl = create_tooling_list_with_items(title="T", items=[{"assembly_code": asm, "tool_no": "1"}])
+
+    changes, cursor = _pull()
+    assert {c["table"] for c in changes} == {
+        "parts", "assemblies", "assembly_items", "tooling_lists", "tooling_list_items",
+    }
+    assert all(c["op"] == "upsert" for c in changes)
+    # 同じ行は1件（assemblies は insert 後に signature 更新があるが1件）
+    assert len({(c["table"], c["id"]) for c in changes}) == len(changes)
+    item = next(c for c in changes if c["table"] == "assembly_items")
+    assert item["code"] == asm and item["row"]["part_asset_code"] == screw and item["row"]["qty"] == 2.0
+    assert next(c for c in changes if c["table"] == "tooling_list_items")["row"]["list_code"] == tl
+    assert cursor == head_cursor()
+
+    # 差分だけ：カーソル以降の変更
+    for n in range(3):
+        update_part(screw, note=f"n{n}")
+    update_assembly(asm, note="x")
+    changes, cursor2 = _pull(cursor)
+    assert [(c["table"], c["code"]) for c in changes] == [("parts", screw), ("assemblies", asm)]
+    assert changes[0]["row"]["note"] == "n2"
+
+    # 削除
+    item_id = item["id"]
+    remove_assembly_item(asm, item_id=item_id)
+    replace_tooling_list_items(tl, items=[])
+    changes, _ = _pull(cursor2)
+    deleted = {(c["table"], c["id"]) for c in changes if c["op"] == "delete"}
+    assert ("assembly_items", item_id) in deleted
+    assert all(c["row"] is None for c in changes if c["op"] == "delete")
+
+    # tables で絞る / 小さい limit でも取りこぼさない
+    only_parts, _ = _pull(0, tables=["parts"])
+    assert {c["table"] for c in only_parts} == {"parts"}
+    small, _ = _pull(0, limit=1)
+    assert {(c["table"], c["id"]) for c in small} == {(c["table"], c["id"]) for c in _pull(0)[0]}
+
+    with pytest.raises(ValueError):
+        changes_since(0, tables=["operation_logs"])
+    with pytest.raises(ValueError):
+        changes_since(head_cursor() + 1)
+
+
+def test_prune_expires_old_cursors(db):
+    code = add_part("SCREW", None, "M3", "M")
+    cursor = head_cursor()
+    update_part(code, note="n")
+    with transaction() as con:
+        con.execute("UPDATE change_log SET changed_at = '2020-01-01 00:00:00' WHERE seq <= ?", (cursor,))
+    assert prune_changes("2021-01-01") == cursor
+
+    with pytest.raises(CursorExpiredError):
+        changes_since(0)
+    assert [c["row"]["note"] for c in changes_since(cursor)["changes"]] == ["n"]
+
+    # 全部消えても、末尾以降のカーソルは有効
+    prune_changes("2999-01-01")
+    assert changes_since(head_cursor())["changes"] == []
+    with pytest.raises(CursorExpiredError):
+        changes_since(cursor)
+
+
+def test_api_and_long_poll(db):
+    c = create_app().test_client()
+    code = add_part("SCREW", None, "M3", "M")
+
+    body = c.get("/api/changes?since=0").get_json()
+    assert [x["code"] for x in body["changes"]] == [code]
+    assert body["has_more"] is False
+
+    t0 = time.monotonic()
+    r = c.get(f"/api/changes?since={body['next_cursor']}&wait=0.3")
+    assert r.status_code == 200 and r.get_json()["changes"] == []
+    assert time.monotonic() - t0 >= 0.25
+    # 変更があればすぐ返る
+    assert wait_for_changes(0, 5) is True
+
+    assert c.get("/api/changes?since=abc").status_code == 400
+    assert c.get("/api/changes?tables=nope").status_code == 400
+    with transaction() as con:
+        con.execute("UPDATE change_log SET changed_at = '2020-01-01'")
+    prune_changes("2021-01-01")
+    assert c.get("/api/changes?since=0").status_code == 410
+
+
+def test_cli_pull_resumes_from_state(db, tmp_path, capsys):
+    state = tmp_path / "cursor"
+    out = tmp_path / "changes.jsonl"
+    a = add_part("SCREW", None, "M3", "M")
+    main(["changes", "pull", "--state", str(state), "--out", str(out), "--limit", "1"])
+    b = add_part("SCREW", None, "M4", "M")
+    main(["changes", "pull", "--state", str(state), "--out", str(out)])
+
+    lines = [json.loads(x) for x in out.read_text(encoding="utf-8").splitlines()]
+    assert [x["code"] for x in lines] == [a, b]
+    assert int(state.read_text()) == head_cursor()
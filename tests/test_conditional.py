@@ -0,0 +1,48 @@
+#tests/test_conditional.py
+"""
+条件付きGET：変更がなければ 304、依存テーブルが変われば ETag が変わる。
+"""
+from __future__ import annotations
+
+from tool_asset_system.services.parts import add_part, update_part
+from tool_asset_system.services.tooling_lists import add_tooling_list
+from tool_asset_system.web.app import create_app
+
+
+def test_parts_list_etag_follows_parts_counter(db):
+    c = create_app().test_client()
+    code = add_part("SCREW", None, "M3", "M")
+
+    r1 = c.get("/parts")
+    assert r1.status_code == 200
+    etag = r1.headers["ETag"]
+    assert r1.headers["Cache-Control"] == "no-cache"
+
+    r2 = c.get("/parts", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+    assert r2.get_data() == b""
+
+    # 別の一覧（クエリ違い）は別の ETag
+    assert c.get("/parts?layer=SCREW").headers["ETag"] != etag
+
+    # 関係ないテーブルの変更では変わらない / parts の変更で変わる
+    add_tooling_list(title="x")
+    assert c.get("/parts", headers={"If-None-Match": etag}).status_code == 304
+    update_part(code, note="changed")
+    r3 = c.get("/parts", headers={"If-None-Match": etag})
+    assert r3.status_code == 200
+    assert r3.headers["ETag"] != etag
+
+
+def test_flash_and_errors_bypass_304(db):
+    c = create_app().test_client()
+    etag = c.get("/api/categories?layer=INSERT").headers["ETag"]
+    assert c.get("/api/categories?layer=INSERT", headers={"If-None-Match": etag}).status_code == 304
+
+    with c.session_transaction() as s:
+        s["_flashes"] = [("ok", "hello")]
+    r = c.get("/parts", headers={"If-None-Match": "*"})
+    assert r.status_code == 200
+    assert "ETag" not in r.headers
+
+    assert c.get("/assemblies/ASM_NOPE").status_code == 404
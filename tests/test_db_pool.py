@@ -0,0 +1,140 @@
+#tests/test_db_pool.py
+"""
+接続プールの基本動作。
+"""
+from __future__ import annotations
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from tool_asset_system.db.pool import (
+    ConnectionPool,
+    PoolConfig,
+    add_statement_listener,
+    remove_statement_listener,
+)
+
+
+def _pool(tmp_path, **kw) -> ConnectionPool:
+    return ConnectionPool(tmp_path / "t.db", PoolConfig().with_overrides(**kw))
+
+
+def test_pragmas_applied(tmp_path):
+    pool = _pool(tmp_path, busy_timeout_ms=1234, synchronous="NORMAL")
+    with pool.acquire() as con:
+        assert con.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        assert con.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+        assert con.execute("PRAGMA busy_timeout").fetchone()[0] == 1234
+        assert con.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+        assert isinstance(con, sqlite3.Connection)
+    pool.close()
+
+
+def test_connection_is_reused_and_commits(tmp_path):
+    pool = _pool(tmp_path)
+    with pool.acquire() as con:
+        con.execute("CREATE TABLE t(x)")
+        con.execute("INSERT INTO t VALUES (1)")
+        first = id(con)
+    with pool.acquire() as con:
+        assert id(con) == first
+        assert con.execute("SELECT count(*) FROM t").fetchone()[0] == 1
+    assert pool.stats["opened"] == 1
+    assert pool.stats["reused"] == 1
+    pool.close()
+
+
+def test_rollback_on_error_and_nested_with(tmp_path):
+    pool = _pool(tmp_path)
+    with pool.acquire() as con:
+        con.execute("CREATE TABLE t(x)")
+
+    with pytest.raises(ValueError):
+        with pool.acquire() as con:
+            con.execute("INSERT INTO t VALUES (1)")
+            with con:  # 入れ子は外側のトランザクションを確定させない
+                pass
+            assert con.in_transaction
+            raise ValueError("boom")
+
+    with pool.acquire() as con:
+        assert con.execute("SELECT count(*) FROM t").fetchone()[0] == 0
+    pool.close()
+
+
+def test_size_limits_idle(tmp_path):
+    pool = _pool(tmp_path, size=1)
+    a = pool.acquire()
+    b = pool.acquire()
+    pool.release(a)
+    pool.release(b)
+    assert pool.idle_count() == 1
+    assert pool.stats["discarded"] == 1
+    pool.close()
+
+
+def test_release_from_other_thread_is_rejected(tmp_path):
+    pool = _pool(tmp_path)
+    con = pool.acquire()
+    con.execute("CREATE TABLE t (x INTEGER)")
+    errors: list[Exception] = []
+
+    def worker():
+        try:
+            with con:  # __exit__ は commit してから release
+                con.execute("INSERT INTO t VALUES (1)")
+        except RuntimeError as e:
+            errors.append(e)
+
+    t = threading.Thread(target=worker)
+    t.start()
+    t.join()
+    assert errors
+    # 貸し出し数は戻り、接続はプールに戻らず閉じている
+    assert pool.stats["checked_out"] == 0
+    assert pool.idle_count() == 0
+    with pytest.raises(sqlite3.ProgrammingError):
+        con.execute("SELECT 1")
+    pool.release(con)  # 2回目は何もしない
+    assert pool.stats["checked_out"] == 0
+    with pool.acquire() as con2:
+        assert con2.execute("SELECT count(*) FROM t").fetchone()[0] == 1
+    pool.close()
+
+
+def test_closed_connection_is_not_pooled(tmp_path):
+    pool = _pool(tmp_path)
+    con = pool.acquire()
+    con.close()
+    pool.release(con)
+    assert pool.idle_count() == 0
+    with pool.acquire() as con2:
+        assert con2.execute("SELECT 1").fetchone()[0] == 1
+    pool.close()
+
+
+def test_statement_time_includes_fetch(tmp_path):
+    pool = _pool(tmp_path)
+    events = []
+    add_statement_listener(events.append)
+    try:
+        with pool.acquire() as con:
+            # 1行ごとに 20ms。execute で進むのは1行目まで、残りは fetch のとき
+            con.create_function("slow", 1, lambda x: time.sleep(0.02) or x)
+            sql = "SELECT slow(value) FROM json_each('[1,2,3,4,5]')"
+            assert [r[0] for r in con.execute(sql).fetchall()] == [1, 2, 3, 4, 5]
+            assert [r[0] for r in con.execute(sql)] == [1, 2, 3, 4, 5]
+            con.execute(sql).fetchone()  # 読み切らずに捨てても1回だけ通知される
+            con.execute("CREATE TABLE t(x)")
+    finally:
+        remove_statement_listener(events.append)
+        pool.close()
+
+    slow = [e for e in events if e.sql == sql]
+    assert len(slow) == 3
+    assert slow[0].elapsed >= 0.09 and slow[1].elapsed >= 0.09
+    assert 0.015 <= slow[2].elapsed < 0.09
+    assert [e.sql for e in events][-1] == "CREATE TABLE t(x)"
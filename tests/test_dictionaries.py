@@ -0,0 +1,68 @@
+#tests/test_dictionaries.py
+"""
+辞書キャッシュ：change_counters('dict') で無効化される。
+"""
+from __future__ import annotations
+
+import pytest
+
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.services import dictionaries
+from tool_asset_system.services.parts import add_part
+
+
+def test_snapshot_is_cached_until_dict_changes(db):
+    dictionaries.invalidate()
+    a = dictionaries.snapshot()
+    b = dictionaries.snapshot()
+    assert a is b
+    assert "INSERT" in a.layer_labels
+
+    with transaction() as con:
+        con.execute(
+            "INSERT INTO categories(code, layer_code, label, sort_order) VALUES('NEW_CAT','INSERT','新カテゴリ',99)"
+        )
+
+    c = dictionaries.snapshot()
+    assert c is not a
+    assert c.version > a.version
+    assert c.category_labels["NEW_CAT"] == "新カテゴリ"
+    assert [r["code"] for r in dictionaries.get_categories_for_layer("INSERT")][-1] == "NEW_CAT"
+
+
+def test_add_part_validates_against_cached_dict(db):
+    with pytest.raises(ValueError, match="unknown layer_code"):
+        add_part("NOPE", None, "X", "M")
+    with pytest.raises(ValueError, match="category_code is required"):
+        add_part("INSERT", None, "X", "M")
+    with pytest.raises(ValueError, match="not found in categories"):
+        add_part("INSERT", "COLLET_CHUCK", "X", "M")
+
+    assert add_part("SCREW", None, "X", "M").startswith("SCREW_")
+    with connect() as con:
+        assert con.execute("SELECT count(*) FROM parts").fetchone()[0] == 1
+
+
+def test_cache_is_per_database(db, tmp_path):
+    from tool_asset_system.db import db as db_mod
+    from tool_asset_system.db.scripts.manage import upgrade
+
+    with transaction() as con:
+        con.execute("UPDATE layers SET label = 'A側' WHERE code = 'INSERT'")
+    a = dictionaries.snapshot()
+    assert a.layer_labels["INSERT"] == "A側"
+
+    # 別DB（同じ version になる）へ切り替えても、前のDBの辞書は使わない
+    other = tmp_path / "other.db"
+    upgrade(other)
+    pool = db_mod.configure_pool(other)
+    try:
+        with transaction() as con:
+            con.execute("UPDATE layers SET label = 'B側' WHERE code = 'INSERT'")
+        b = dictionaries.snapshot()
+        assert b.version == a.version
+        assert b.layer_labels["INSERT"] == "B側"
+    finally:
+        pool.close()
+        db_mod.configure_pool(db)
+    assert dictionaries.snapshot().layer_labels["INSERT"] == "A側"
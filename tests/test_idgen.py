@@ -0,0 +1,37 @@
+#tests/test_idgen.py
+"""
+採番：ブロック予約は1回の UPDATE で連番を確保し、形式は LAYER_00000001 のまま。
+"""
+from __future__ import annotations
+
+import pytest
+
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.services.idgen import issue_asset_code, reserve_asset_codes
+
+
+def test_reserve_block_is_contiguous_and_continues_single_issue(db):
+    with transaction() as con:
+        first = issue_asset_code(con, "SCREW")
+        block = reserve_asset_codes(con, "SCREW", 3)
+        after = issue_asset_code(con, "SCREW")
+
+    assert first == "SCREW_00000001"
+    assert block == ["SCREW_00000002", "SCREW_00000003", "SCREW_00000004"]
+    assert after == "SCREW_00000005"
+
+
+def test_reserve_rolls_back_with_transaction(db):
+    with pytest.raises(RuntimeError):
+        with transaction() as con:
+            reserve_asset_codes(con, "TL", 10)
+            raise RuntimeError("boom")
+
+    with connect() as con:
+        assert con.execute("SELECT next_no FROM id_sequences WHERE layer_code = 'TL'").fetchone()[0] == 1
+
+    with transaction() as con:
+        with pytest.raises(ValueError, match="no row"):
+            reserve_asset_codes(con, "NOPE", 2)
+        with pytest.raises(ValueError):
+            reserve_asset_codes(con, "TL", 0)
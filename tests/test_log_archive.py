@@ -0,0 +1,85 @@
+#tests/test_log_archive.py
+"""
+operation_logs のアーカイブ：期間ごとのファイルへ移し、履歴は ATTACH で透過的に引ける。
+"""
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from tool_asset_system.cli import main as cli_main
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.services.log_archive import archive_logs, list_archives, log_history
+from tool_asset_system.services.parts import add_part, update_part
+from tool_asset_system.web.app import create_app
+
+
+def _backdate(code: str, dates: list[str]) -> None:
+    """code のログを古い順に dates の日時へ書き換える"""
+    with transaction() as con:
+        ids = [r[0] for r in con.execute("SELECT id FROM operation_logs WHERE target_code = ? ORDER BY id", (code,))]
+        for i, d in zip(ids, dates):
+            con.execute("UPDATE operation_logs SET created_at = ? WHERE id = ?", (d, i))
+
+
+def test_archive_moves_by_period_and_history_spans_files(db, capsys):
+    code = add_part("SCREW", None, "M3", "M")
+    for n in range(3):
+        update_part(code, note=f"n{n}")
+    _backdate(code, ["2024-11-03 10:00:00", "2024-12-24 10:00:00", "2025-01-10 10:00:00"])
+    before = [r["id"] for r in log_history("PART", code)]
+
+    dry = archive_logs("2025-01-01", dry_run=True)
+    assert dry["periods"] == [{"period": "2024-11", "rows": 1}, {"period": "2024-12", "rows": 1}]
+    assert dry["moved"] == 0
+
+    r = archive_logs("2025-01-01", chunk_size=1)
+    assert r["moved"] == 2
+    assert (db.parent / "archive" / "oplog_2024-11.db").exists()
+    with connect() as con:
+        assert con.execute("SELECT COUNT(*) FROM operation_logs WHERE target_code = ?", (code,)).fetchone()[0] == 2
+    assert [(a["period"], a["row_count"]) for a in list_archives()] == [("2024-11", 1), ("2024-12", 1)]
+
+    # 本体 2件 + アーカイブ 2ファイル。新しい順・重複なし
+    assert [r["id"] for r in log_history("PART", code)] == before
+    assert [r["id"] for r in log_history("PART", code, limit=3)] == before[:3]
+
+    # 画面のログ欄もアーカイブ分を含む
+    html = create_app().test_client().get(f"/parts/{code}").get_data(as_text=True)
+    assert html.count("PART_UPDATE") == 3
+
+    cli_main(["logs", "archives"])
+    assert "oplog_2024-12.db" in capsys.readouterr().out
+
+
+def test_rerun_after_partial_copy_does_not_duplicate(db):
+    code = add_part("SCREW", None, "M3", "M")
+    update_part(code, note="x")
+    _backdate(code, ["2023-05-01 00:00:00", "2023-06-01 00:00:00"])
+
+    # 1段目（コピー）だけ済んで落ちた状態を作る：アーカイブに同じ行を先に入れておく
+    archive_logs("2023-05-15", period="year")
+    with transaction() as con:
+        con.execute("UPDATE operation_logs SET created_at = '2023-05-02 00:00:00' WHERE target_code = ?", (code,))
+    with sqlite3.connect(db.parent / "archive" / "oplog_2023.db") as arc, connect() as con:
+        row = con.execute("SELECT * FROM operation_logs WHERE target_code = ?", (code,)).fetchone()
+        cols = ", ".join(row.keys())
+        arc.execute(f"INSERT INTO operation_logs({cols}) VALUES({', '.join('?' * len(row))})", tuple(row))
+
+    assert [r["id"] for r in log_history("PART", code)] == [row["id"], row["id"] - 1]
+
+    r = archive_logs("2024-01-01", period="year")
+    assert r["moved"] == 1
+    assert list_archives()[0]["row_count"] == 2
+    with sqlite3.connect(db.parent / "archive" / "oplog_2023.db") as arc:
+        assert arc.execute("SELECT COUNT(*) FROM operation_logs").fetchone()[0] == 2
+
+
+def test_invalid_arguments(db):
+    with pytest.raises(ValueError):
+        archive_logs("2025/01/01")
+    with pytest.raises(ValueError):
+        archive_logs("2025-01-01", period="week")
+    with pytest.raises(ValueError):
+        log_history("PART", "X", columns=["nope"])
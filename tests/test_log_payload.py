@@ -0,0 +1,104 @@
+#tests/test_log_payload.py
+"""
+operation_logs の payload：差分＋チェックポイントで残し、任意の版を復元できる。旧形式は 0018 で変換する。
+"""
+from __future__ import annotations
+
+import json
+
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.db.scripts.manage import upgrade
+from tool_asset_system.services import log_payload as lp
+from tool_asset_system.services.log_archive import archive_logs
+from tool_asset_system.services.parts import add_part, archive_part, get_part, update_part
+
+
+def test_codec_and_patch_roundtrip():
+    a = {"id": 1, "note": None, "a/b": 1, "x~y": "s", "qty": 1}
+    b = {"id": 1, "note": "ｎｏｔｅ", "a/b": 2, "qty": 1.0, "new": [1, 2]}
+    ops = lp.diff(a, b)
+    assert {o["op"] for o in ops} == {"add", "remove", "replace"}
+    assert lp.apply(a, lp.decode(lp.encode(ops))) == b
+    assert lp.diff(b, b) == []
+
+
+def test_every_version_rebuilds_with_periodic_checkpoints(db):
+    code = add_part("SCREW", None, "M3", "M")
+    expected = [get_part(code)]
+    for n in range(lp.CHECKPOINT_EVERY + 3):
+        update_part(code, note=f"note {n}", stock_qty=n)
+        expected.append(get_part(code))
+    archive_part(code)
+    expected.append(get_part(code))
+
+    with connect() as con:
+        logs = con.execute(
+            "SELECT id, payload_kind, payload, before_json, after_json FROM operation_logs WHERE target_code = ? ORDER BY id",
+            (code,),
+        ).fetchall()
+    kinds = [r["payload_kind"] for r in logs]
+    assert kinds[0] == "FULL" and kinds[lp.CHECKPOINT_EVERY] == "FULL"
+    assert kinds.count("FULL") == 2
+    assert all(r["before_json"] is None and r["after_json"] is None for r in logs)
+
+    for r, want in zip(logs, expected):
+        assert lp.rebuild("PART", code, r["id"]) == want
+    assert lp.rebuild("PART", code) == expected[-1]
+
+    vs = lp.versions("PART", code)
+    assert [v["after"] for v in vs] == expected
+    assert vs[1]["before"] == expected[0]
+    assert vs[-1]["action"] == "PART_ARCHIVE"
+
+    # 1版ごとに before / after を平文で持った場合と比べて 1/10 以下
+    plain = sum(len(json.dumps(v["after"], ensure_ascii=False)) + len(json.dumps(v["before"], ensure_ascii=False)) for v in vs)
+    stored = sum(len(r["payload"]) for r in logs)
+    assert stored * 10 <= plain
+
+
+def test_migration_converts_legacy_rows(db):
+    states = [
+        {"id": 9, "asset_code": "X_1", "note": None, "status": "ACTIVE"},
+        {"id": 9, "asset_code": "X_1", "note": "n", "status": "ACTIVE"},
+        {"id": 9, "asset_code": "X_1", "note": "n", "status": "ARCHIVED"},
+    ]
+    with transaction() as con:
+        for i, s in enumerate(states):
+            con.execute(
+                "INSERT INTO operation_logs(action, target_type, target_code, before_json, after_json) VALUES(?,?,?,?,?)",
+                ("PART_UPDATE", "PART", "X_1", json.dumps(states[i - 1]) if i else None, json.dumps(s)),
+            )
+        con.execute("INSERT INTO operation_logs(action, target_type, target_code) VALUES('PART_UPDATE', 'PART', 'X_1')")
+        con.execute("DELETE FROM schema_migrations WHERE version = '0018_delta_encode_operation_logs'")
+
+    # 変換前でも読める
+    assert lp.rebuild("PART", "X_1") == states[-1]
+
+    upgrade(db)
+    with connect() as con:
+        logs = con.execute("SELECT * FROM operation_logs WHERE target_code = 'X_1' ORDER BY id").fetchall()
+    assert [r["payload_kind"] for r in logs] == ["FULL", "DELTA", "DELTA", None]
+    assert all(r["after_json"] is None and r["before_json"] is None for r in logs)
+    assert [lp.rebuild("PART", "X_1", r["id"]) for r in logs] == [*states, states[-1]]
+
+
+def test_anchor_in_archive(db):
+    code = add_part("SCREW", None, "M3", "M")
+    update_part(code, note="old")
+    with transaction() as con:
+        con.execute("UPDATE operation_logs SET created_at = '2020-01-01 00:00:00' WHERE target_code = ?", (code,))
+    archive_logs("2021-01-01")
+
+    update_part(code, note="new")
+    with connect() as con:
+        kind = con.execute(
+            "SELECT payload_kind FROM operation_logs WHERE target_code = ? ORDER BY id DESC", (code,)
+        ).fetchone()[0]
+    # 起点が本体に無いので FULL から始め直す
+    assert kind == "FULL"
+    assert lp.rebuild("PART", code)["note"] == "new"
+
+    first, second, third = lp.versions("PART", code)
+    assert second["after"]["note"] == "old"
+    assert lp.rebuild("PART", code, second["id"]) == second["after"]
+    assert third["before"] == second["after"]
@@ -0,0 +1,67 @@
+#tests/test_metrics.py
+"""
+/metrics：Prometheus テキスト形式。リクエスト / 書き込みトランザクション / 行数。
+"""
+from __future__ import annotations
+
+import re
+import sqlite3
+
+import pytest
+
+from tool_asset_system import metrics
+from tool_asset_system.db.db import get_pool, transaction
+from tool_asset_system.services.parts import add_part
+from tool_asset_system.web.app import create_app
+
+
+def _value(text: str, series: str) -> float:
+    m = re.search(rf"^{re.escape(series)} (\S+)$", text, re.MULTILINE)
+    assert m, series
+    return float(m.group(1))
+
+
+def test_metrics_endpoint(db):
+    c = create_app().test_client()
+    before = metrics.HTTP_REQUESTS.value("parts", "200")
+    hold_before = metrics.TX_HOLD.count()
+
+    add_part("SCREW", None, "M3", "M")
+    c.get("/parts")
+    c.get("/nope")
+    text = c.get("/metrics").get_data(as_text=True)
+
+    assert _value(text, 'tool_asset_http_requests_total{blueprint="parts",status="200"}') == before + 1
+    assert 'tool_asset_http_requests_total{blueprint="app",status="404"}' in text
+    assert 'tool_asset_http_request_duration_seconds_bucket{endpoint="parts.parts_list",le="+Inf"}' in text
+    assert _value(text, "tool_asset_db_tx_hold_seconds_count") == hold_before + 1
+    assert _value(text, 'tool_asset_table_rows{table="parts"}') == 1
+    assert _value(text, 'tool_asset_table_rows{table="operation_logs"}') == 1
+    assert _value(text, 'tool_asset_db_file_bytes{file="db"}') > 0
+
+    # 行数キャッシュ：追加分が反映される
+    add_part("SCREW", None, "M4", "M")
+    text = c.get("/metrics").get_data(as_text=True)
+    assert _value(text, 'tool_asset_table_rows{table="parts"}') == 2
+    assert _value(text, 'tool_asset_table_rows{table="operation_logs"}') == 2
+
+
+def test_busy_is_retried_then_counted(db):
+    get_pool().config = get_pool().config.with_overrides(busy_timeout_ms=0, busy_retries=1)
+    with transaction():  # 接続を1本開いて WAL にしておく（PRAGMA ではなく BEGIN で待たせたい）
+        pass
+    with get_pool().acquire() as con:
+        con.execute("PRAGMA busy_timeout = 0")
+
+    blocker = sqlite3.connect(db, timeout=0)
+    blocker.execute("BEGIN IMMEDIATE")
+    retries, errors = metrics.DB_BUSY_RETRIES.value(), metrics.DB_BUSY_ERRORS.value()
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            with transaction():
+                pass
+    finally:
+        blocker.rollback()
+        blocker.close()
+    assert metrics.DB_BUSY_RETRIES.value() == retries + 1
+    assert metrics.DB_BUSY_ERRORS.value() == errors + 1
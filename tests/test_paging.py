@@ -0,0 +1,84 @@
+#tests/test_paging.py
+"""
+キーセットページング：前後に辿って全件を重複/欠落なく返すこと。
+"""
+from __future__ import annotations
+
+import pytest
+
+from tool_asset_system.db.db import transaction
+from tool_asset_system.services.paging import decode_cursor, encode_cursor
+from tool_asset_system.services.parts import (
+    add_part,
+    archive_part,
+    list_archived_parts_page,
+    list_parts,
+    list_parts_page,
+)
+
+
+def _walk(fetch, size):
+    """next で最後まで → prev で先頭まで戻り、両方向の並びを返す"""
+    forward, pages = [], []
+    page = fetch(limit=size)
+    while True:
+        pages.append(page)
+        forward += [r["asset_code"] for r in page["rows"]]
+        if not page["next_cursor"]:
+            break
+        page = fetch(limit=size, after=page["next_cursor"])
+
+    # 最後のページから before= で先頭まで戻る（最後のページ自身も含めて全件になるはず）
+    backward = [r["asset_code"] for r in page["rows"]]
+    while page["prev_cursor"]:
+        page = fetch(limit=size, before=page["prev_cursor"])
+        backward = [r["asset_code"] for r in page["rows"]] + backward
+    return forward, backward, pages
+
+
+@pytest.fixture()
+def parts(db):
+    codes = []
+    for i in range(4):
+        codes.append(add_part("INSERT", "MILLING_INSERT", f"MILL-INS-{i}", "MK"))
+        codes.append(add_part("SCREW", None, f"SCREW-INS-{i}", "MK"))  # category_code NULL
+    codes.append(add_part("HOLDER", "COLLET_CHUCK", "HOLDER-INS", "MK"))
+    return codes
+
+
+def test_walks_all_rows_in_both_directions(parts):
+    expected = [r["asset_code"] for r in list_parts(limit=1000)]
+    assert len(expected) == 9
+
+    forward, backward, pages = _walk(lambda **kw: list_parts_page(**kw), 4)
+    assert forward == expected
+    assert pages[0]["prev_cursor"] is None
+    assert backward == expected
+
+
+def test_ranked_search_pages(parts):
+    expected = [r["asset_code"] for r in list_parts(q="-INS", limit=1000)]
+    forward, _, _ = _walk(lambda **kw: list_parts_page(q="-INS", **kw), 2)
+    assert forward == expected
+    assert len(forward) == 9
+
+
+def test_archived_mixed_direction_keys(parts):
+    with transaction() as con:
+        for i, code in enumerate(parts):
+            con.execute(
+                "UPDATE parts SET status='ARCHIVED', updated_at=? WHERE asset_code=?",
+                (f"2026-01-0{1 + i % 3} 00:00:00", code),
+            )
+    archive_part(parts[0])
+
+    expected = [r["asset_code"] for r in list_archived_parts_page(limit=1000)["rows"]]
+    assert expected[0] == parts[0]  # 最新の更新が先頭
+    forward, _, _ = _walk(lambda **kw: list_archived_parts_page(**kw), 2)
+    assert forward == expected
+
+
+def test_cursor_roundtrip_and_validation():
+    assert decode_cursor(encode_cursor(["INSERT", "", "INSERT_00000001"])) == ["INSERT", "", "INSERT_00000001"]
+    with pytest.raises(ValueError):
+        decode_cursor("not-a-cursor!!")
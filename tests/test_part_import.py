@@ -0,0 +1,118 @@
+#tests/test_part_import.py
+"""
+parts の一括取り込み：行単位のエラー / ファイル内・既存との重複 / dry run / ログ。
+"""
+from __future__ import annotations
+
+import io
+
+from tool_asset_system.db.db import connect, transaction
+from tool_asset_system.services.log_payload import decode
+from tool_asset_system.services.part_import import import_parts, iter_csv_rows
+from tool_asset_system.web.app import create_app
+from tool_asset_system.services.parts import add_part
+
+CSV = """\
+Layer,Category,Part No,Maker,Name,Qty
+INSERT,MILLING_INSERT,APMT1135,MAKER_A,チップ,10
+INSERT,,NO_CAT,MAKER_A,,
+NOPE,,X1,MAKER_A,,
+SCREW,,M3X8,MAKER_B,,abc
+
+SCREW,,M3X10,MAKER_B,,
+SCREW,,M3X10,MAKER_B,,
+SCREW,,EXISTING,MAKER_B,,
+"""
+
+
+def _rows():
+    return iter_csv_rows(io.StringIO(CSV))
+
+
+def test_dry_run_reports_errors_and_writes_nothing(db):
+    add_part("SCREW", None, "EXISTING", "MAKER_B")
+
+    r = import_parts(_rows(), dry_run=True, batch_size=2)
+
+    assert r.total == 7
+    assert r.inserted == 0
+    assert [(e.line, e.message.split(":")[0]) for e in r.errors] == [
+        (3, "category_code is required for this layer"),
+        (4, "unknown layer_code='NOPE'"),
+        (5, "stock_qty must be a number"),
+        (8, "duplicate maker/part_no in file"),
+        (9, "part already exists"),
+    ]
+    with connect() as con:
+        assert con.execute("SELECT count(*) FROM parts").fetchone()[0] == 1
+
+
+def test_import_inserts_valid_rows_with_logs(db):
+    r = import_parts(_rows(), batch_size=2, actor="tester", reason="import:test.csv")
+
+    assert r.inserted == 3
+    assert len(r.errors) == 4
+    assert [c.split("_")[0] for c in r.asset_codes] == ["INSERT", "SCREW", "SCREW"]
+
+    with connect() as con:
+        p = con.execute("SELECT * FROM parts WHERE part_no = 'APMT1135'").fetchone()
+        assert p["display_name"] == "チップ"
+        assert p["stock_qty"] == 10
+        assert con.execute("SELECT display_name FROM parts WHERE part_no = 'M3X8'").fetchone() is None
+
+        logs = con.execute(
+            "SELECT * FROM operation_logs WHERE action = 'PART_ADD' ORDER BY id"
+        ).fetchall()
+    assert [l["target_code"] for l in logs] == r.asset_codes
+    assert logs[0]["actor"] == "tester"
+    assert logs[0]["reason"] == "import:test.csv"
+    assert logs[0]["payload_kind"] == "FULL"
+    assert decode(logs[0]["payload"])["part_no"] == "APMT1135"
+
+
+def test_bad_numbers_and_constraint_errors_are_row_errors(db):
+    csv_text = """\
+Layer,Part No,Maker,Qty,Price,Lead Time
+SCREW,A1,M,inf,,
+SCREW,A2,M,,nan,
+SCREW,A3,M,,,1e400
+SCREW,A4,M,1,,
+SCREW,BLOCKED,M,1,,
+SCREW,A5,M,1,,3.0
+SCREW,A6,M,1,,1.5
+"""
+    # DB 側の制約（トリガー）で弾かれる行
+    with transaction() as con:
+        con.execute(
+            "CREATE TRIGGER trg_test_block AFTER INSERT ON parts WHEN NEW.part_no = 'BLOCKED' "
+            "BEGIN SELECT RAISE(ABORT, 'blocked by test'); END"
+        )
+
+    r = import_parts(iter_csv_rows(io.StringIO(csv_text)), batch_size=10)
+
+    assert [(e.line, e.message.split(":")[0]) for e in r.errors] == [
+        (2, "stock_qty must be a number"),
+        (3, "unit_price must be a number"),
+        (4, "lead_time_days must be an integer"),
+        (6, "blocked by test"),
+        (8, "lead_time_days must be an integer"),
+    ]
+    assert r.inserted == 2
+    with connect() as con:
+        assert [x[0] for x in con.execute("SELECT part_no FROM parts ORDER BY id")] == ["A4", "A5"]
+        assert con.execute("SELECT count(*) FROM operation_logs").fetchone()[0] == 2
+    # 弾いた行の分の番号は巻き戻っている（連番のまま）
+    assert [c.split("_")[-1] for c in r.asset_codes] == ["00000001", "00000002"]
+
+
+def test_web_import_rejects_unknown_encoding(db):
+    c = create_app().test_client()
+    r = c.post(
+        "/parts/import",
+        data={"file": (io.BytesIO(b"Layer,Part No,Maker\nSCREW,A1,M\n"), "a.csv"), "encoding": "bogus"},
+        content_type="multipart/form-data",
+    )
+    assert r.status_code == 200
+    assert "unknown encoding" in r.get_data(as_text=True)
+    with connect() as con:
+        assert con.execute("SELECT count(*) FROM parts").fetchone()[0] == 0
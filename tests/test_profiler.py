@@ -0,0 +1,43 @@
+#tests/test_profiler.py
+"""
+opt-in プロファイラ：Server-Timing ヘッダ / HTML フッタ / JSON ログ行。
+"""
+from __future__ import annotations
+
+import json
+import logging
+
+from tool_asset_system.services.parts import add_part
+from tool_asset_system.web.app import create_app
+
+
+def test_profile_header_footer_and_log(db, caplog):
+    add_part("SCREW", None, "M3", "M")
+    c = create_app(profile=True).test_client()
+
+    with caplog.at_level(logging.INFO, logger="tool_asset_system.web.profiler"):
+        r = c.get("/parts")
+
+    timing = r.headers["Server-Timing"]
+    assert timing.startswith("sql;dur=") and "total;dur=" in timing
+
+    html = r.get_data(as_text=True)
+    assert html.index('class="profile-footer"') < html.rindex("</body>")
+    assert "FROM parts p" in html
+
+    line = json.loads(caplog.records[-1].getMessage())
+    assert line["endpoint"] == "parts.parts_list"
+    assert line["connections"] == 1  # UnitOfWork の1本だけ
+    assert any(s["sql"].startswith("SELECT p.*") for s in line["top"])
+    assert line["render_ms"] > 0
+
+    # JSON 応答にはフッタを付けない
+    r = c.get("/api/parts")
+    assert "Server-Timing" in r.headers
+    assert r.get_json()["items"]
+
+
+def test_profile_is_opt_in(db):
+    r = create_app(profile=False).test_client().get("/parts")
+    assert "Server-Timing" not in r.headers
+    assert "profile-footer" not in r.get_data(as_text=True)
@@ -0,0 +1,56 @@
+#tests/test_rollup.py
+"""
+所要量展開：Σ tooling_list_items.qty × assembly_items.qty を part ごとに集計し、在庫と比べる。
+"""
+from __future__ import annotations
+
+import pytest
+
+from tool_asset_system.services.assemblies import create_assembly_with_items
+from tool_asset_system.services.parts import add_part, update_part
+from tool_asset_system.services.rollup import COLUMNS, iter_csv, iter_rollup, parse_list_codes, rollup
+from tool_asset_system.services.tooling_lists import create_tooling_list_with_items
+
+
+def test_rollup_multiplies_and_compares_with_stock(db):
+    holder = add_part("HOLDER", "COLLET_CHUCK", "BT40", "M")
+    insert = add_part("INSERT", "MILLING_INSERT", "APMT", "M")
+    screw = add_part("SCREW", None, "M3", "M")
+    update_part(insert, stock_qty=10, min_stock_qty=5)
+    update_part(holder, stock_qty=5)
+
+    # 1 ASM = holder x1 + insert x4 + screw x4
+    a1 = create_assembly_with_items(
+        items=[
+            {"part_asset_code": holder},
+            {"part_asset_code": insert, "qty": 4},
+            {"part_asset_code": screw, "qty": 4},
+        ]
+    )
+    a2 = create_assembly_with_items(items=[{"part_asset_code": insert, "qty": 2}])
+
+    t1 = create_tooling_list_with_items(
+        title="T1", items=[{"assembly_code": a1, "tool_no": "1"}, {"assembly_code": a2, "tool_no": "2", "qty": 2}]
+    )
+    t2 = create_tooling_list_with_items(title="T2", items=[{"assembly_code": a1, "tool_no": "1"}])
+
+    rows = {r["asset_code"]: r for r in rollup([t1, t2])}
+    assert list(rows) == [holder, insert, screw]  # LAYER_ORDER 順
+
+    # insert: T1 (4x1 + 2x2) + T2 (4x1) = 12
+    r = rows[insert]
+    assert (r["required_qty"], r["stock_qty"], r["shortage_qty"], r["remaining_qty"]) == (12, 10, 2, -2)
+    assert r["below_min"] is True
+    assert (r["list_count"], r["assembly_count"]) == (2, 2)
+    assert (rows[holder]["required_qty"], rows[holder]["shortage_qty"], rows[holder]["below_min"]) == (2, 0, False)
+    assert rows[screw]["shortage_qty"] == 8
+
+    assert [r["asset_code"] for r in rollup([t1, t2], shortage_only=True)] == [insert, screw]
+
+    csv_text = "".join(iter_csv(iter_rollup(parse_list_codes(f"{t1}, {t2}\n{t1}"))))
+    lines = csv_text.lstrip("﻿").splitlines()
+    assert lines[0] == ",".join(COLUMNS)
+    assert len(lines) == 4
+
+    with pytest.raises(ValueError, match="tooling_list not found: TL_X"):
+        iter_rollup([t1, "TL_X"])
@@ -0,0 +1,39 @@
+#tests/test_search.py
+"""
+FTS5（trigram）検索：部分一致・日本語・短い語のLIKEフォールバック・トリガー同期。
+"""
+from __future__ import annotations
+
+from tool_asset_system.services.assemblies import add_assembly, list_assemblies, update_assembly
+from tool_asset_system.services.parts import add_part, list_parts
+from tool_asset_system.services.tooling_lists import add_tooling_list, list_tooling_lists
+
+
+def _codes(rows, key="asset_code"):
+    return [r[key] for r in rows]
+
+
+def test_parts_search_substring_japanese_and_short_terms(db):
+    a = add_part("INSERT", "MILLING_INSERT", "XOGT160520PDFR", "DIJET", display_name="ミーリング用インサート")
+    b = add_part("INSERT", "TURNING_INSERT", "CNMG120408", "KYOCERA", display_name="旋削用インサート")
+    c = add_part("SCREW", None, "M5X12", "OSG", category_free_text="ねじ")
+
+    assert _codes(list_parts(q="0520")) == [a]
+    assert set(_codes(list_parts(q="インサート"))) == {a, b}
+    assert _codes(list_parts(q="インサート kyocera")) == [b]
+    assert _codes(list_parts(q="M5")) == [c]             # 2文字 → LIKE
+    assert _codes(list_parts(q="旋削 インサート")) == [b]  # 短い語 + 長い語
+    assert _codes(list_parts(q='"5X')) == []              # 構文記号はそのまま文字として扱う
+    assert _codes(list_parts(q="100%")) == []
+
+
+def test_index_follows_updates(db):
+    code = add_assembly(display_name="FACE MILL 80")
+    assert _codes(list_assemblies(q="mill"), "assembly_code") == [code]
+
+    update_assembly(code, display_name="DRILL 10")
+    assert list_assemblies(q="mill") == []
+    assert _codes(list_assemblies(q="drill"), "assembly_code") == [code]
+
+    tl = add_tooling_list(title="5軸マシニング用リスト", note="workA")
+    assert _codes(list_tooling_lists(q="マシニング"), "list_code") == [tl]
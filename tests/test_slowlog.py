@@ -0,0 +1,81 @@
+#tests/test_slowlog.py
+"""
+スロークエリログ：しきい値以上の文を EXPLAIN QUERY PLAN つきで記録し、全走査に印を付ける。
+"""
+from __future__ import annotations
+
+import json
+import logging
+import time
+
+import pytest
+
+from tool_asset_system.db import slowlog
+from tool_asset_system.db.db import connect
+from tool_asset_system.services.parts import add_part
+from tool_asset_system.web.app import create_app
+
+
+@pytest.fixture()
+def slow_log(db, tmp_path):
+    path = tmp_path / "logs" / "slow.log"
+    slowlog.install_slow_query_log(0, path)  # 0ms：全部記録
+    yield path
+    slowlog.uninstall_slow_query_log()
+
+
+def test_records_plan_and_flags_full_scan(slow_log):
+    code = add_part("SCREW", None, "M3", "M")
+    with connect() as con:
+        con.execute("SELECT * FROM parts WHERE note LIKE ?", ("%x%",)).fetchall()
+        con.execute("SELECT * FROM parts WHERE asset_code = ?", (code,)).fetchall()
+
+    scan, lookup = slowlog.recent_slow_queries()[:2][::-1]
+    assert scan.sql == "SELECT * FROM parts WHERE note LIKE ?"
+    assert scan.params == ["%x%"]
+    assert scan.full_scan and "full scan: parts" in scan.flags
+    assert not lookup.full_scan and lookup.plan[0].startswith("SEARCH parts")
+
+    lines = [json.loads(x) for x in slow_log.read_text(encoding="utf-8").splitlines()]
+    assert lines[-2]["flags"] == ["full scan: parts"]
+
+    # EXPLAIN 自体は記録しない
+    assert not any(q.sql.startswith("EXPLAIN") for q in slowlog.recent_slow_queries())
+
+
+def test_threshold_and_admin_page(slow_log):
+    slowlog.install_slow_query_log(10_000, slow_log)
+    add_part("SCREW", None, "M3", "M")
+    assert slowlog.recent_slow_queries() == []
+
+    r = create_app().test_client().get("/admin/slow_queries")
+    assert r.status_code == 200
+    assert "threshold: 10000.0 ms" in r.get_data(as_text=True)
+
+
+def test_logs_query_slow_in_fetch(slow_log):
+    for n in range(5):
+        add_part("SCREW", None, f"M{n}", "M")
+    slowlog.install_slow_query_log(50, slow_log)
+    with connect() as con:
+        # 1行 20ms の全走査。execute は1行目までなので、時間の大半は fetch 側
+        con.create_function("slow", 1, lambda x: time.sleep(0.02) or x)
+        rows = con.execute("SELECT asset_code FROM parts WHERE slow(note) IS NULL").fetchall()
+    assert len(rows) == 5
+
+    (q,) = slowlog.recent_slow_queries()
+    assert q.sql == "SELECT asset_code FROM parts WHERE slow(note) IS NULL"
+    assert q.ms >= 90
+    assert "full scan: parts" in q.flags
+    assert json.loads(slow_log.read_text(encoding="utf-8").splitlines()[-1])["ms"] == q.ms
+
+
+def test_bad_threshold_env_disables_log(db, monkeypatch, caplog):
+    slowlog.uninstall_slow_query_log()
+    monkeypatch.setenv("TOOL_ASSET_SLOW_QUERY_MS", "50ms")
+    with caplog.at_level(logging.WARNING, logger="tool_asset_system.db.slowlog"):
+        slowlog.install_from_env()
+    assert not slowlog.settings()["enabled"]
+    assert "TOOL_ASSET_SLOW_QUERY_MS" in caplog.text
+    # 接続まわりは普通に動く
+    assert create_app().test_client().get("/parts").status_code == 200
@@ -0,0 +1,139 @@
+#tests/test_tooling_lists.py
+"""
+tooling_list の作成：items まで1トランザクション / items のエラーは全件まとめて返す。
+items の置換：差分だけ書く（変わらない行は id / note を保つ）。
+"""
+from __future__ import annotations
+
+import pytest
+
+from tool_asset_system.db.db import connect
+from tool_asset_system.services.assemblies import create_assembly_with_items
+from tool_asset_system.services.parts import add_part
+from tool_asset_system.services.tooling_lists import (
+    ItemValidationError,
+    create_tooling_list_with_items,
+    list_tooling_list_items,
+    replace_tooling_list_items,
+)
+from tool_asset_system.web.app import create_app
+
+
+@pytest.fixture()
+def asms(db):
+    p = add_part("SCREW", None, "M3", "M")
+    return [create_assembly_with_items(items=[{"part_asset_code": p}], display_name=f"A{i}") for i in range(3)]
+
+
+def test_create_with_items(asms):
+    code = create_tooling_list_with_items(
+        title="5軸 120本",
+        items=[{"assembly_code": ac, "tool_no": str(10 - i), "qty": 1} for i, ac in enumerate(asms)],
+    )
+    items = list_tooling_list_items(code)
+    assert [(i["tool_no"], i["assembly_code"]) for i in items] == [
+        ("8", asms[2]), ("9", asms[1]), ("10", asms[0]),
+    ]
+
+
+def test_item_errors_are_reported_together_and_nothing_is_written(asms):
+    with pytest.raises(ItemValidationError) as ei:
+        create_tooling_list_with_items(
+            title="T",
+            items=[
+                {"assembly_code": asms[0], "tool_no": "1"},
+                {"assembly_code": asms[1], "tool_no": "1"},
+                {"assembly_code": asms[2], "tool_no": ""},
+                {"assembly_code": asms[0], "tool_no": "2"},
+                {"assembly_code": "", "tool_no": "5"},
+                {"assembly_code": asms[1], "tool_no": "6", "qty": 0},
+            ],
+        )
+    assert ei.value.errors == [
+        f"item 2 ({asms[1]}): duplicate tool_no in the same list: 1",
+        f"item 3 ({asms[2]}): tool_no is required",
+        f"item 4 ({asms[0]}): duplicate assembly_code in the same list",
+        "item 5 (tool_no 5): assembly_code is required",
+        f"item 6 ({asms[1]}): qty must be > 0",
+    ]
+
+    with pytest.raises(ItemValidationError) as ei:
+        create_tooling_list_with_items(
+            title="T",
+            items=[
+                {"assembly_code": "ASM_X", "tool_no": "1"},
+                {"assembly_code": asms[0], "tool_no": "2"},
+                {"assembly_code": "ASM_Y", "tool_no": "3"},
+            ],
+        )
+    assert ei.value.errors == ["item 1 (ASM_X): assembly not found", "item 3 (ASM_Y): assembly not found"]
+
+    with connect() as con:
+        assert con.execute("SELECT count(*) FROM tooling_lists").fetchone()[0] == 0
+        assert con.execute("SELECT count(*) FROM tooling_list_items").fetchone()[0] == 0
+
+
+def test_replace_applies_only_the_diff(asms):
+    a, b, c = asms
+    code = create_tooling_list_with_items(
+        title="T",
+        items=[
+            {"assembly_code": a, "tool_no": "1", "note": "keep me"},
+            {"assembly_code": b, "tool_no": "2"},
+        ],
+    )
+    before = {i["assembly_code"]: i for i in list_tooling_list_items(code)}
+
+    # a と b の tool_no を入れ替え（UNIQUE に当たらないこと）+ c を追加
+    r = replace_tooling_list_items(
+        code,
+        items=[
+            {"assembly_code": a, "tool_no": "2"},
+            {"assembly_code": b, "tool_no": "1", "qty": 3},
+            {"assembly_code": c, "tool_no": "3"},
+        ],
+    )
+    assert r == {"added": 1, "removed": 0, "updated": 2, "unchanged": 0}
+
+    after = {i["assembly_code"]: i for i in list_tooling_list_items(code)}
+    assert (after[a]["tool_no"], after[a]["item_note"]) == ("2", "keep me")
+    assert (after[b]["tool_no"], after[b]["qty"]) == ("1", 3.0)
+    assert after[a]["item_id"] == before[a]["item_id"]
+    assert after[b]["item_id"] == before[b]["item_id"]
+
+    # 何も変えなければ何も書かない / 外したものだけ消える
+    same = [{"assembly_code": i["assembly_code"], "tool_no": i["tool_no"], "qty": i["qty"]} for i in after.values()]
+    assert replace_tooling_list_items(code, items=same)["unchanged"] == 3
+    r = replace_tooling_list_items(code, items=same[:1])
+    assert r == {"added": 0, "removed": 2, "updated": 0, "unchanged": 1}
+    assert [i["item_id"] for i in list_tooling_list_items(code)] == [after[same[0]["assembly_code"]]["item_id"]]
+
+
+def test_non_numeric_qty_is_an_item_error(asms):
+    with pytest.raises(ItemValidationError) as ei:
+        create_tooling_list_with_items(
+            title="T",
+            items=[
+                {"assembly_code": asms[0], "tool_no": "1", "qty": "2"},
+                {"assembly_code": asms[1], "tool_no": "2", "qty": "abc"},
+                {"assembly_code": asms[2], "tool_no": "3", "qty": "nan"},
+            ],
+        )
+    assert ei.value.errors == [
+        f"item 2 ({asms[1]}): qty must be a number: 'abc'",
+        f"item 3 ({asms[2]}): qty must be a number: 'nan'",
+    ]
+
+    # 未指定 / 空欄は 1
+    code = create_tooling_list_with_items(
+        title="T", items=[{"assembly_code": asms[0], "tool_no": "1", "qty": ""}, {"assembly_code": asms[1], "tool_no": "2"}]
+    )
+    assert [i["qty"] for i in list_tooling_list_items(code)] == [1.0, 1.0]
+
+    # 画面からも 500 にならずにエラー表示
+    r = create_app().test_client().post(
+        f"/tooling_lists/{code}/edit",
+        data={"title": "T", "selected_assemblies": [asms[0]], f"tool_no_{asms[0]}": "1", f"qty_{asms[0]}": "x"},
+    )
+    assert r.status_code == 200
+    assert f"item 1 ({asms[0]}): qty must be a number" in r.get_data(as_text=True)
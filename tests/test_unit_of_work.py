@@ -0,0 +1,50 @@
+#tests/test_unit_of_work.py
+"""
+リクエスト単位の UnitOfWork：1接続・1スナップショットで読む。
+"""
+from __future__ import annotations
+
+import threading
+
+from tool_asset_system.db import db as db_mod
+from tool_asset_system.services.parts import add_part, list_parts
+
+
+def test_connect_shares_one_connection(db):
+    with db_mod.unit_of_work():
+        with db_mod.connect() as a:
+            with db_mod.connect() as b:
+                assert a is b
+        with db_mod.connect() as c:
+            assert c is a
+    assert db_mod.get_pool().stats["checked_out"] == 0
+
+
+def test_reads_use_one_snapshot_and_writes_refresh_it(db):
+    add_part("INSERT", "MILLING_INSERT", "P-1", "MK")
+
+    with db_mod.unit_of_work():
+        assert len(list_parts()) == 1
+
+        # 別スレッドの書き込みはこのスナップショットには見えない
+        t = threading.Thread(target=lambda: add_part("INSERT", "MILLING_INSERT", "P-2", "MK"))
+        t.start()
+        t.join()
+        assert len(list_parts()) == 1
+
+        # 自分で書いたら、以降の読み取りは新しいスナップショット
+        add_part("INSERT", "MILLING_INSERT", "P-3", "MK")
+        assert len(list_parts()) == 3
+
+
+def test_web_request_checks_out_single_connection(db):
+    from tool_asset_system.web.app import create_app
+
+    app = create_app()
+    pool = db_mod.get_pool()
+    opened = pool.stats["opened"]
+
+    res = app.test_client().get("/parts")
+    assert res.status_code == 200
+    assert pool.stats["opened"] - opened <= 1
+    assert pool.stats["checked_out"] == 0
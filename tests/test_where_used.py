@@ -0,0 +1,86 @@
+#tests/test_where_used.py
+"""
+where-used：part_where_used はトリガーで差分更新され、常に全件再計算と一致する。
+"""
+from __future__ import annotations
+
+from tool_asset_system.db.db import connect
+from tool_asset_system.services.assemblies import (
+    add_assembly_item,
+    create_assembly_with_items,
+    list_assembly_items,
+    remove_assembly_item,
+)
+from tool_asset_system.services.parts import add_part
+from tool_asset_system.services.tooling_lists import (
+    create_tooling_list_with_items,
+    remove_tooling_list_item,
+    list_tooling_list_items,
+    replace_tooling_list_items,
+)
+from tool_asset_system.services.where_used import where_used, where_used_bulk
+
+
+def _closure_matches_recompute() -> None:
+    with connect() as con:
+        stored = {
+            (r[0], r[1], r[2])
+            for r in con.execute("SELECT part_id, tooling_list_id, ref_count FROM part_where_used")
+        }
+        expected = {
+            (r[0], r[1], r[2])
+            for r in con.execute(
+                """
+                SELECT ai.part_id, tli.tooling_list_id, count(*)
+                FROM assembly_items ai
+                JOIN tooling_list_items tli ON tli.assembly_id = ai.assembly_id
+                GROUP BY 1, 2
+                """
+            )
+        }
+    assert stored == expected
+
+
+def test_closure_follows_writes_and_lookups(db):
+    holder = add_part("HOLDER", "COLLET_CHUCK", "BT40", "M")
+    screw = add_part("SCREW", None, "M3", "M")
+    insert = add_part("INSERT", "MILLING_INSERT", "APMT", "M")
+
+    a1 = create_assembly_with_items(items=[{"part_asset_code": holder}, {"part_asset_code": screw}])
+    a2 = create_assembly_with_items(items=[{"part_asset_code": screw}, {"part_asset_code": screw}])
+
+    t1 = create_tooling_list_with_items(
+        title="T1", items=[{"assembly_code": a1, "tool_no": "1"}, {"assembly_code": a2, "tool_no": "2"}]
+    )
+    t2 = create_tooling_list_with_items(title="T2", items=[{"assembly_code": a2, "tool_no": "1"}])
+    _closure_matches_recompute()
+
+    assert [a["assembly_code"] for a in where_used(screw)["assemblies"]] == [a1, a2]
+    assert sorted(t["list_code"] for t in where_used(screw)["tooling_lists"]) == [t1, t2]
+    assert [t["list_code"] for t in where_used(holder)["tooling_lists"]] == [t1]
+
+    # assembly 側の変更
+    item_id = add_assembly_item(a2, part_asset_code=insert)
+    _closure_matches_recompute()
+    assert sorted(t["list_code"] for t in where_used(insert)["tooling_lists"]) == [t1, t2]
+    remove_assembly_item(a2, item_id=item_id)
+    _closure_matches_recompute()
+    assert where_used(insert) == {"assemblies": [], "tooling_lists": []}
+
+    # tooling_list 側の変更（入れ替え / 削除）
+    replace_tooling_list_items(t1, items=[{"assembly_code": a1, "tool_no": "2"}, {"assembly_code": a2, "tool_no": "1"}])
+    _closure_matches_recompute()
+    replace_tooling_list_items(t1, items=[{"assembly_code": a2, "tool_no": "1"}])
+    _closure_matches_recompute()
+    assert where_used(holder)["tooling_lists"] == []
+
+    for it in list_tooling_list_items(t2):
+        remove_tooling_list_item(t2, item_id=it["item_id"])
+    for it in list_assembly_items(a1):
+        remove_assembly_item(a1, item_id=it["item_id"])
+    _closure_matches_recompute()
+
+    bulk = where_used_bulk([screw, holder, "NOPE_1", screw])
+    assert bulk["missing"] == ["NOPE_1"]
+    assert [(a["assembly_code"], a["parts"]) for a in bulk["assemblies"]] == [(a2, [screw])]
+    assert [(t["list_code"], t["parts"]) for t in bulk["tooling_lists"]] == [(t1, [screw])]